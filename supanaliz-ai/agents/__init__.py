@@ -2,11 +2,22 @@
 
 from .sales_agent import SalesAgent
 from .purchase_agent import PurchaseAgent
-from .decision_agent import DecisionAgent, MaterialMatch
+from .decision_agent import DecisionAgent, MaterialMatch, MaterialMatches
+from .rules import RuleSet, load_rules, get_rules
+from .inputs import sales_inputs, purchase_inputs
+from .similarity import SimilarMaterialIndex, similar_material_candidates
 
 __all__ = [
     "SalesAgent",
     "PurchaseAgent",
     "DecisionAgent",
     "MaterialMatch",
+    "MaterialMatches",
+    "RuleSet",
+    "load_rules",
+    "get_rules",
+    "sales_inputs",
+    "purchase_inputs",
+    "SimilarMaterialIndex",
+    "similar_material_candidates",
 ]
@@ -3,11 +3,45 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
+import numpy as np
+import pandas as pd
 
-@dataclass
+from monitoring import instrument
+from .inputs import (
+    PurchaseInput,
+    SalesInput,
+    column,
+    numeric,
+    purchase_inputs,
+    sales_inputs,
+)
+from .rules import RuleSet, get_rules
+
+
+# Öncelik listesine alınan en riskli tedarikçi sayısı
+PRIORITY_SUPPLIER_LIMIT = 5
+# Grid hesabında tek seferde tutulan (ayar × malzeme) eleman sayısı
+GRID_CHUNK_ELEMENTS = 4_000_000
+
+
+MATCH_FIELDS = (
+    "sales_material",
+    "sales_material_group",
+    "purchase_material",
+    "purchase_material_group",
+    "match_type",
+    "sales_total",
+    "purchase_total",
+)
+
+
+@dataclass(slots=True)
 class MaterialMatch:
+    """
+    Tek eşleşme satırı (MaterialMatches[i]); sadece satır bazlı erişim için üretilir.
+    """
     sales_material: Optional[str]
     sales_material_group: Optional[str]
     purchase_material: Optional[str]
@@ -16,110 +50,246 @@ class MaterialMatch:
     sales_total: float
     purchase_total: float
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in MATCH_FIELDS}
+
+
+class MaterialMatches:
+    """
+    Eşleştirme motorunun struct-of-arrays çıktısı: alan başına tek NumPy kolonu
+    (satış malzemesi başına bir satır, satış tablosu sırasında).
+    """
+
+    __slots__ = MATCH_FIELDS
+
+    def __init__(self, **columns: np.ndarray):
+        for name in MATCH_FIELDS:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.match_type)
+
+    def __getitem__(self, i: int) -> MaterialMatch:
+        return MaterialMatch(**self.to_records([i])[0])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in MATCH_FIELDS}
+
+    def rule_frame(self) -> pd.DataFrame:
+        """
+        Kural motorunun "match" hedefi için kolonlar.
+        """
+        return pd.DataFrame(
+            {
+                "material": self.sales_material,
+                "material_group": self.sales_material_group,
+                "match_type": self.match_type,
+                "sales_total": self.sales_total,
+                "purchase_total": self.purchase_total,
+            }
+        )
+
+    def to_records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Seçilen satırlar (None → hepsi) → JSON uyumlu dict listesi.
+        """
+        return column_records(self.columns(), rows)
+
+
+def column_records(
+    columns: Dict[str, np.ndarray], rows: Optional[np.ndarray] = None
+) -> List[Dict[str, Any]]:
+    """
+    Kolon dizileri → satır dict'leri (kolon başına tek tolist, satır nesnesi yok).
+    """
+    if rows is not None:
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = {name: values[rows] for name, values in columns.items()}
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[n].tolist() for n in names))]
+
 
 class DecisionAgent:
     """
     Satış ve satınalma ajan çıktısını birleştirip yönetici özeti üretir.
     Malzeme eşleştirme motoru zorunlu parça.
+    Risk koşulları ve mesajlar agents.rules kural setinden gelir; eşleşmeler
+    üzerinde tek kolonel geçişte değerlendirilir.
     """
 
-    def _build_material_index(
-        self, material_stats: List[Dict[str, Any]], key: str
-    ) -> Dict[str, Dict[str, Any]]:
-        idx: Dict[str, Dict[str, Any]] = {}
-        for m in material_stats:
-            val = m.get(key)
-            if val:
-                idx[str(val)] = m
-        return idx
+    def __init__(self, rules: Optional[RuleSet] = None):
+        self.rules = get_rules(rules)
+
+    @staticmethod
+    def _match_keys(values: np.ndarray, trim: int = 0) -> np.ndarray:
+        """
+        Lookup anahtarları: str'e çevrilmiş değer (sondan `trim` karakter atılır);
+        boş / None → None.
+        """
+        end = -trim if trim else None
+        return np.array([(str(v)[:end] or None) if v else None for v in values], dtype=object)
+
+    def _build_material_index(self, keys: np.ndarray) -> pd.Series:
+        """
+        Anahtar → satır indeksi (tekrar eden anahtarlarda son satır kazanır).
+        """
+        rows = np.flatnonzero(pd.notna(keys))
+        idx = pd.Series(rows, index=pd.Index(keys[rows], dtype=object))
+        return idx[~idx.index.duplicated(keep="last")]
+
+    @staticmethod
+    def _lookup(index: pd.Series, keys: np.ndarray) -> np.ndarray:
+        # Bulunamayan anahtar → -1 (boş indeks: hepsi -1)
+        if len(index) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = index.index.get_indexer(keys)
+        return np.where(pos >= 0, index.to_numpy()[np.maximum(pos, 0)], -1)
 
     def _material_matching_engine(
         self,
-        sales_material_stats: List[Dict[str, Any]],
-        purchase_material_stats: List[Dict[str, Any]],
-    ) -> List[MaterialMatch]:
+        sales_material_stats: pd.DataFrame,
+        purchase_material_stats: pd.DataFrame,
+    ) -> MaterialMatches:
         """
         1) Direkt malzeme kodu eşleşmesi
         2) Grup kodu eşleşmesi (MalzemeGrup[:-1] == MalKodGrup)
         3) Hiç eşleşmeyen → match_type = "none"
         """
+        p_mat = column(purchase_material_stats, "material")
+        p_grp = column(purchase_material_stats, "material_group")
+        p_total = numeric(purchase_material_stats, "total_order_value", default=0.0)
+
         # Purchase tarafında lookup indexleri
-        purchase_by_material = self._build_material_index(
-            purchase_material_stats, "material"
+        purchase_by_material = self._build_material_index(self._match_keys(p_mat))
+        purchase_by_group_clean = self._build_material_index(self._match_keys(p_grp, trim=1))
+
+        s_mat = column(sales_material_stats, "material")
+        s_grp = column(sales_material_stats, "material_group")
+        sales_total = numeric(sales_material_stats, "total_sales", default=0.0)
+
+        # 1) Direkt malzeme eşleşmesi, 2) grup eşleşmesi
+        direct = self._lookup(purchase_by_material, self._match_keys(s_mat))
+        group = self._lookup(purchase_by_group_clean, self._match_keys(s_grp))
+        p = np.where(direct >= 0, direct, group)
+        found = p >= 0
+        match_type = np.where(
+            direct >= 0, "direct", np.where(group >= 0, "group", "none")
+        ).astype(object)
+
+        def pick(values: np.ndarray) -> np.ndarray:
+            out = np.full(len(p), None, dtype=object)
+            out[found] = values[p[found]]
+            return out
+
+        purchase_total = np.zeros(len(p))
+        purchase_total[found] = p_total[p[found]]
+
+        return MaterialMatches(
+            sales_material=s_mat,
+            sales_material_group=s_grp,
+            purchase_material=pick(p_mat),
+            purchase_material_group=pick(p_grp),
+            match_type=match_type,
+            sales_total=sales_total,
+            purchase_total=purchase_total,
         )
-        purchase_by_group_clean: Dict[str, Dict[str, Any]] = {}
-        for m in purchase_material_stats:
-            group = m.get("material_group")
-            if group:
-                clean = str(group)[:-1] if len(str(group)) > 0 else ""
-                if clean:
-                    purchase_by_group_clean[clean] = m
-
-        matches: List[MaterialMatch] = []
-
-        for s in sales_material_stats:
-            s_mat = s.get("material")
-            s_grp = s.get("material_group")
-            sales_total = float(s.get("total_sales", 0.0))
-
-            # 1) Direkt malzeme eşleşmesi
-            direct = purchase_by_material.get(str(s_mat)) if s_mat else None
-
-            if direct:
-                matches.append(
-                    MaterialMatch(
-                        sales_material=s_mat,
-                        sales_material_group=s_grp,
-                        purchase_material=direct.get("material"),
-                        purchase_material_group=direct.get("material_group"),
-                        match_type="direct",
-                        sales_total=sales_total,
-                        purchase_total=float(
-                            direct.get("total_order_value", 0.0)
-                        ),
-                    )
-                )
-                continue
-
-            # 2) Grup eşleşmesi
-            if s_grp:
-                p = purchase_by_group_clean.get(str(s_grp))
-            else:
-                p = None
-
-            if p:
-                matches.append(
-                    MaterialMatch(
-                        sales_material=s_mat,
-                        sales_material_group=s_grp,
-                        purchase_material=p.get("material"),
-                        purchase_material_group=p.get("material_group"),
-                        match_type="group",
-                        sales_total=sales_total,
-                        purchase_total=float(
-                            p.get("total_order_value", 0.0)
-                        ),
-                    )
-                )
-            else:
-                matches.append(
-                    MaterialMatch(
-                        sales_material=s_mat,
-                        sales_material_group=s_grp,
-                        purchase_material=None,
-                        purchase_material_group=None,
-                        match_type="none",
-                        sales_total=sales_total,
-                        purchase_total=0.0,
-                    )
-                )
-
-        return matches
 
+    def match_table(self, sales_summary: SalesInput, purchase_summary: PurchaseInput) -> pd.DataFrame:
+        """
+        Eşleştirme motorunun sonucu (malzeme başına tek satır); grid analizleri
+        aynı tabloyu tekrar tekrar kullanır.
+        """
+        sales = sales_inputs(sales_summary, tables=("material_stats",))
+        purchase = purchase_inputs(purchase_summary, tables=("material_stats",))
+        return self._material_matching_engine(
+            sales.material_stats, purchase.material_stats
+        ).rule_frame()
+
+    @instrument("agents.decision.threshold_grid")
+    def threshold_grid(
+        self,
+        sales_summary: SalesInput,
+        purchase_summary: PurchaseInput,
+        purchase_sales_ratios: Sequence[float] = (0.7,),
+        supplier_risk_cutoffs: Sequence[float] = (60.0,),
+        supplier_limits: Sequence[int] = (PRIORITY_SUPPLIER_LIMIT,),
+        direction: Optional[str] = None,
+        matches: Optional[pd.DataFrame] = None,
+    ) -> pd.DataFrame:
+        """
+        Eşik ayarları ızgarası (oran × risk eşiği × tedarikçi limiti) için kritik ürün,
+        riskli tedarikçi ve öncelik listesi sayıları; tek eşleştirme + tek vektörel geçiş.
+        Semantik analyze() ile aynıdır:
+        - kritik = eşleşmeyen satış + (trend up ise) satınalma < oran × satış olan eşleşmeler
+        - riskli tedarikçi = risk_score >= eşik
+        - öncelik listesi = kritik ürünler + ilk `limit` riskli tedarikçi
+        direction: None → satış özetindeki trend.
+        matches: önceden hesaplanmış match_table (yoksa hesaplanır).
+        """
+        ratios = np.asarray(purchase_sales_ratios, dtype=float)
+        cutoffs = np.asarray(supplier_risk_cutoffs, dtype=float)
+        limits = np.asarray(supplier_limits, dtype=np.int64)
+        if not (len(ratios) and len(cutoffs) and len(limits)):
+            raise ValueError("Grid için her parametrede en az bir değer gerekli.")
+        if (limits < 0).any():
+            raise ValueError("Tedarikçi limiti negatif olamaz.")
+
+        if direction is None:
+            direction = sales_inputs(sales_summary, tables=()).trend.get("direction", "flat")
+        if matches is None:
+            matches = self.match_table(sales_summary, purchase_summary)
+
+        match_type = matches["match_type"].to_numpy(dtype=object)
+        sales_total = matches["sales_total"].to_numpy(dtype=float)
+        purchase_total = matches["purchase_total"].to_numpy(dtype=float)
+        unmatched = int(((match_type == "none") & (sales_total > 0)).sum())
+
+        # Oran boyutu: (oran × malzeme) karşılaştırması, parça parça
+        lagging = np.zeros(len(ratios), dtype=np.int64)
+        if direction == "up":
+            matched = np.isin(match_type, ["direct", "group"])
+            p_tot, s_tot = purchase_total[matched], sales_total[matched]
+            step = max(1, GRID_CHUNK_ELEMENTS // max(len(p_tot), 1))
+            for lo in range(0, len(ratios), step):
+                r = ratios[lo:lo + step, None]
+                lagging[lo:lo + step] = (p_tot[None, :] < r * s_tot[None, :]).sum(axis=1)
+
+        # Risk eşiği boyutu: sıralı skorlar üzerinde searchsorted
+        supplier_stats = purchase_inputs(purchase_summary, tables=("supplier_stats",)).supplier_stats
+        scores = numeric(supplier_stats, "risk_score")
+        scores = np.sort(scores[np.isfinite(scores)])
+        risky = len(scores) - np.searchsorted(scores, cutoffs, side="left")
+
+        # Kartezyen çarpım (oran, eşik, limit)
+        ri, ci, li = (g.ravel() for g in np.meshgrid(
+            np.arange(len(ratios)), np.arange(len(cutoffs)), np.arange(len(limits)), indexing="ij"
+        ))
+        critical = unmatched + lagging[ri]
+        priority_suppliers = np.minimum(risky[ci], limits[li])
+
+        return pd.DataFrame(
+            {
+                "purchase_sales_ratio": ratios[ri],
+                "supplier_risk_cutoff": cutoffs[ci],
+                "supplier_limit": limits[li],
+                "critical_products": critical,
+                "unmatched_products": np.full(len(ri), unmatched, dtype=np.int64),
+                "lagging_products": lagging[ri],
+                "risky_suppliers": risky[ci],
+                "priority_materials": critical,
+                "priority_suppliers": priority_suppliers,
+                "priority_total": critical + priority_suppliers,
+            }
+        )
+
+    @instrument("agents.decision.analyze")
     def analyze(
         self,
-        sales_summary: Dict[str, Any],
-        purchase_summary: Dict[str, Any],
+        sales_summary: SalesInput,
+        purchase_summary: PurchaseInput,
         sales_agent_output: Dict[str, Any],
         purchase_agent_output: Dict[str, Any],
     ) -> Dict[str, Any]:
@@ -127,66 +297,54 @@ class DecisionAgent:
         DecisionAgent ana fonksiyonu.
         """
 
-        sales_trend = sales_summary.get("trend", {})
-        direction = sales_trend.get("direction", "flat")
-
-        sales_material_stats = sales_summary.get("material_stats", [])
-        purchase_material_stats = purchase_summary.get("material_stats", [])
+        sales = sales_inputs(sales_summary, tables=("material_stats",))
+        purchase = purchase_inputs(purchase_summary, tables=("material_stats",))
+        direction = sales.trend.get("direction", "flat")
 
         matches = self._material_matching_engine(
-            sales_material_stats, purchase_material_stats
+            sales.material_stats, purchase.material_stats
         )
 
-        # Satış artışı + satınalma yetersizliği
+        # Eşleşme bazlı kurallar (satış artışı + satınalma yetersizliği, eşleşmeyen satış)
+        match_hits = self.rules.evaluate("match", matches.rule_frame(), {"direction": direction})
+        match_columns = matches.columns()
+
         sales_up_purchase_risk: List[Dict[str, Any]] = []
-        if direction == "up":
-            for m in matches:
-                if m.match_type in ("direct", "group"):
-                    # Çok kaba eşik: satınalma toplamı satış toplamının %70'inden azsa risk
-                    if m.purchase_total < 0.7 * m.sales_total:
-                        sales_up_purchase_risk.append(
-                            {
-                                "material": m.sales_material,
-                                "material_group": m.sales_material_group,
-                                "sales_total": m.sales_total,
-                                "purchase_total": m.purchase_total,
-                                "match_type": m.match_type,
-                                "message": "Satış artarken satınalma hacmi geride; stokout riski.",
-                            }
-                        )
+        risk_columns = {
+            "material": matches.sales_material,
+            "material_group": matches.sales_material_group,
+            "sales_total": matches.sales_total,
+            "purchase_total": matches.purchase_total,
+            "match_type": matches.match_type,
+        }
+        for rule, rows in match_hits.get("sales_up_purchase_risk", []):
+            items = column_records(risk_columns, rows)
+            for item, message in zip(items, rule.render_rows(match_columns, rows)):
+                item["message"] = message
+            sales_up_purchase_risk.extend(items)
 
         # Fiyat artışı + satış düşüşü (yaklaşımı kaba, ama sinyal verir)
         price_vol_comment = purchase_agent_output.get(
             "price_volatility_comment", ""
         )
-        sales_down_price_risk: List[str] = []
-        if direction == "down" and "yüksek" in price_vol_comment.lower():
-            sales_down_price_risk.append(
-                "Satış trendi aşağı, satınalma tarafında fiyat volatilitesi yüksek; fiyat baskısı kaynaklı talep kaybı riski var."
-            )
+        sales_down_price_risk: List[str] = self.rules.messages(
+            "decision_signals",
+            {"direction": direction, "price_volatility_comment": price_vol_comment},
+        ).get("sales_down_price_risk", [])
 
-        # Kritik ürün listesi: 
+        # Kritik ürün listesi (kural sırasıyla):
         #  - match_type == "none" olanlar (stokout riski)
         #  - satış güçlü, satınalma zayıf olanlar
         critical_products: List[Dict[str, Any]] = []
-        for m in matches:
-            if m.match_type == "none" and m.sales_total > 0:
-                critical_products.append(
-                    {
-                        "material": m.sales_material,
-                        "material_group": m.sales_material_group,
-                        "reason": "Satış var, satınalma datasında eşleşen malzeme yok (stokout riski).",
-                    }
-                )
-        # Ek olarak yukarıdaki risk listesinde olanları da ekle
-        for r in sales_up_purchase_risk:
-            critical_products.append(
-                {
-                    "material": r["material"],
-                    "material_group": r["material_group"],
-                    "reason": "Satış hacmi satınalmadan hızlı büyüyor; kapasite ve stok riski.",
-                }
-            )
+        critical_columns = {
+            "material": matches.sales_material,
+            "material_group": matches.sales_material_group,
+        }
+        for rule, rows in match_hits.get("critical_products", []):
+            items = column_records(critical_columns, rows)
+            for item, reason in zip(items, rule.render_rows(match_columns, rows)):
+                item["reason"] = reason
+            critical_products.extend(items)
 
         # Öncelik sırası: kritik ürünler + yüksek riskli tedarikçiler
         risky_suppliers = purchase_agent_output.get("risky_suppliers", [])
@@ -202,7 +360,7 @@ class DecisionAgent:
                 }
             )
 
-        for s in risky_suppliers[:5]:
+        for s in risky_suppliers[:PRIORITY_SUPPLIER_LIMIT]:
             priority_list.append(
                 {
                     "type": "supplier",
@@ -222,32 +380,21 @@ class DecisionAgent:
                 "lead_time_comment", "Lead time analizi mevcut."
             )
         )
-        if critical_products:
-            management_summary.append(
-                f"{len(critical_products)} adet kritik malzeme tespit edildi; stokout ve kapasite riskleri içeriyor."
-            )
-        if risky_suppliers:
-            management_summary.append(
-                f"{len(risky_suppliers)} tedarikçi yüksek risk skoruna sahip."
-            )
-
-        # 3 maddelik aksiyon planı
-        action_plan: List[str] = []
+        context = {
+            "critical_count": len(critical_products),
+            "risky_supplier_count": len(risky_suppliers),
+        }
+        management_summary.extend(
+            self.rules.messages("decision_summary", context).get("management_summary", [])
+        )
 
-        if critical_products:
-            action_plan.append(
-                "Kritik malzemeler için (stokout riski olanlar) satınalma planı ve güvenli stok seviyeleri ivedilikle gözden geçirilsin."
-            )
-        if risky_suppliers:
-            action_plan.append(
-                "Yüksek riskli tedarikçilerle teslimat ve fiyat koşulları yeniden müzakere edilsin; alternatif tedarikçi opsiyonları oluşturulsun."
-            )
-        action_plan.append(
-            "Satış ve satınalma ajan çıktıları haftalık toplantılarda gözden geçirilerek üretim planı ve bütçe revizyonlarına veri sağlayacak şekilde kullanılmalı."
+        # Aksiyon planı
+        action_plan: List[str] = self.rules.messages("decision_actions", context).get(
+            "action_plan", []
         )
 
         return {
-            "matches": [m.__dict__ for m in matches],
+            "matches": matches.to_records(),
             "sales_up_purchase_risk": sales_up_purchase_risk,
             "sales_down_price_risk": sales_down_price_risk,
             "critical_products": critical_products,
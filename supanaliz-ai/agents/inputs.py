@@ -0,0 +1,155 @@
+# supanaliz-ai/agents/inputs.py
+
+from __future__ import annotations
+
+import dataclasses
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from features.summaries import (
+    PurchaseSummaryFrames,
+    SalesSummaryFrames,
+    frame_to_records,
+    json_safe,
+)
+
+
+# Agent girdileri: JSON özet (API) ya da kolonel özet (feature builder'lar)
+SalesInput = Union[Mapping[str, Any], SalesSummaryFrames]
+PurchaseInput = Union[Mapping[str, Any], PurchaseSummaryFrames]
+# list-of-dict girdide satırın orijinal dict'i bu kolonda taşınır; records() satırları
+# girdideki şekliyle (anahtar kümesi, int / float tipleri) döndürür
+SOURCE_COLUMN = "__source_record__"
+
+
+def as_frame(value: Any) -> pd.DataFrame:
+    """
+    list-of-dict / DataFrame / Arrow tablosu → DataFrame (satır sırası korunur).
+    list-of-dict girdide orijinal satırlar SOURCE_COLUMN'da tutulur.
+    """
+    if value is None:
+        return pd.DataFrame(index=pd.RangeIndex(0))
+    if isinstance(value, pd.DataFrame):
+        return value
+    if hasattr(value, "to_pandas"):
+        return value.to_pandas()
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return pd.DataFrame(index=pd.RangeIndex(0))
+        rows = list(value)
+        frame = pd.DataFrame.from_records(rows)
+        source = np.empty(len(rows), dtype=object)
+        source[:] = rows
+        frame[SOURCE_COLUMN] = source
+        return frame
+    raise ValueError(f"Tablo bekleniyordu (list-of-dict, DataFrame ya da Arrow): {type(value).__name__}")
+
+
+def _table(summary: Mapping[str, Any], name: str, tables: Optional[Sequence[str]]) -> pd.DataFrame:
+    # İstenmeyen tablolar dönüştürülmez (ör. DecisionAgent order_totals'ı okumaz)
+    if tables is not None and name not in tables:
+        return as_frame(None)
+    return as_frame(summary.get(name))
+
+
+def sales_inputs(summary: SalesInput, tables: Optional[Sequence[str]] = None) -> SalesSummaryFrames:
+    """
+    sales_summary (dict ya da SalesSummaryFrames) → tipli kolonel girdi.
+    tables: dict girdide dönüştürülecek tablolar (None → hepsi).
+    """
+    if isinstance(summary, SalesSummaryFrames):
+        frames = summary
+    else:
+        frames = SalesSummaryFrames(
+            monthly_series=_table(summary, "monthly_series", tables),
+            trend=summary.get("trend") or {},
+            seasonality=_table(summary, "seasonality", tables),
+            aggregates=summary.get("aggregates") or {},
+            material_stats=_table(summary, "material_stats", tables),
+            meta=summary.get("meta") or {},
+            warnings=list(summary.get("warnings") or []),
+        )
+    return dataclasses.replace(frames, trend=json_safe(frames.trend))
+
+
+def purchase_inputs(
+    summary: PurchaseInput, tables: Optional[Sequence[str]] = None
+) -> PurchaseSummaryFrames:
+    """
+    purchase_summary (dict ya da PurchaseSummaryFrames) → tipli kolonel girdi.
+    tables: dict girdide dönüştürülecek tablolar (None → hepsi).
+    """
+    if isinstance(summary, PurchaseSummaryFrames):
+        frames = summary
+    else:
+        frames = PurchaseSummaryFrames(
+            order_totals=_table(summary, "order_totals", tables),
+            lead_time_stats=summary.get("lead_time_stats") or {},
+            material_stats=_table(summary, "material_stats", tables),
+            supplier_stats=_table(summary, "supplier_stats", tables),
+            meta=summary.get("meta") or {},
+            warnings=list(summary.get("warnings") or []),
+        )
+    return dataclasses.replace(frames, lead_time_stats=json_safe(frames.lead_time_stats))
+
+
+def numeric(frame: pd.DataFrame, column: str, default: float = np.nan) -> np.ndarray:
+    """
+    Kolon → float dizisi; kolon yoksa / değer sayı değilse default.
+    """
+    if column not in frame.columns:
+        return np.full(len(frame), default, dtype=float)
+    values = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    if not np.isnan(default):
+        values = np.where(np.isnan(values), default, values)
+    return values
+
+
+def column(frame: pd.DataFrame, name: str) -> np.ndarray:
+    """
+    Kolon → object dizisi (NaN → None); kolon yoksa None'lar.
+    list-of-dict girdide değerler SOURCE_COLUMN'daki dict'lerden okunur: pandas int + null
+    kolonu float'a çevirir (123 → 123.0), eşleştirme anahtarı / etiketler girdideki tipte kalır.
+    """
+    if name not in frame.columns:
+        return np.full(len(frame), None, dtype=object)
+    if SOURCE_COLUMN in frame.columns:
+        values = np.fromiter(
+            (row.get(name) for row in frame[SOURCE_COLUMN]), dtype=object, count=len(frame)
+        )
+    else:
+        values = frame[name].to_numpy(dtype=object)
+    return np.where(pd.isna(values), None, values)
+
+
+def top_k(values: np.ndarray, k: Optional[int] = None, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Azalan sırada (eşitlerde girdi sırası korunur) ilk k satırın indeksleri.
+    rows verilirse sadece o satırlar arasından seçilir.
+    """
+    rows = np.arange(len(values)) if rows is None else np.asarray(rows, dtype=np.int64)
+    order = rows[np.argsort(-values[rows], kind="stable")]
+    return order if k is None else order[:k]
+
+
+def records(
+    frame: pd.DataFrame,
+    rows: Optional[Sequence[int]] = None,
+    overrides: Sequence[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Seçilen satırları JSON uyumlu dict'lere çevirir (agent çıktı sınırı).
+    Frame list-of-dict girdiden geldiyse girdideki dict'ler (kopya) döner;
+    overrides: agent'ın türettiği / değiştirdiği kolonlar, dict'lerin üzerine yazılır.
+    """
+    if rows is not None:
+        frame = frame.iloc[np.asarray(rows, dtype=np.int64)]
+    if SOURCE_COLUMN not in frame.columns:
+        return frame_to_records(frame)
+    out = [dict(row) for row in frame[SOURCE_COLUMN]]
+    if overrides:
+        for row, values in zip(out, frame_to_records(frame[list(overrides)])):
+            row.update(values)
+    return out
@@ -1,7 +1,14 @@
 import pandas as pd
 
+from compute import get_backend
+from compute.partials import MaterialPartials
+from monitoring import instrument
 
-def build_matching_table(sales_df: pd.DataFrame, purchase_df: pd.DataFrame) -> pd.DataFrame:
+
+@instrument("agents.matching.build_matching_table")
+def build_matching_table(
+    sales_df: pd.DataFrame, purchase_df: pd.DataFrame, backend=None
+) -> pd.DataFrame:
     """
     Satış ve satın alma verilerini ürün bazında doğru şekilde eşleştirir.
     Kritik düzeltmeler:
@@ -9,34 +16,45 @@ def build_matching_table(sales_df: pd.DataFrame, purchase_df: pd.DataFrame) -> p
     - Satış sadece Malzeme bazında toplanır
     - Satınalma sadece Malzeme bazında toplanır
     - Birimler ayrı kolonlarda tutulur
+    sales_df / purchase_df: parse edilmiş DataFrame ya da Parquet yolu.
+    """
+
+    # --- 1-2) SATIŞ / PURCHASE AGG (SADECE MALZEME BAZLI) ---
+    # Satır seviyesindeki groupby seçilen compute backend'de çalışır (pandas / duckdb)
+    sales_agg, purchase_agg = get_backend(backend).matching_aggregates(sales_df, purchase_df)
+
+    return combine_matching_aggregates(sales_agg, purchase_agg)
+
+
+@instrument("agents.matching.build_matching_table_from_partials")
+def build_matching_table_from_partials(
+    sales_partials: MaterialPartials, purchase_partials: MaterialPartials
+) -> pd.DataFrame:
+    """
+    Parça parça (chunk / dosya / yıl) üretilip birleştirilmiş partial'lardan
+    eşleştirme tablosu. Ham satırlar bellekte tutulmaz.
     """
 
-    # --- 1) SATIŞ AGG (SADECE MALZEME BAZLI) ---
-    sales_agg = (
-        sales_df
-        .groupby("Malzeme", as_index=False)
-        .agg(
-            total_sales_qty=("Miktar", "sum"),
-            total_sales_usd=("Genel Toplam (USD)", "sum"),
-            sales_unit=("Miktar Br.", "first"),
-            MalKodGrup=("MalKodGrup", "first"),
-        )
+    return combine_matching_aggregates(
+        sales_partials.to_matching_aggregates(),
+        purchase_partials.to_matching_aggregates(),
     )
+
+
+def combine_matching_aggregates(
+    sales_agg: pd.DataFrame, purchase_agg: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Malzeme bazlı satış + satınalma toplamlarından eşleştirme tablosunu kurar.
+    """
+
+    sales_agg = sales_agg.copy()
+    purchase_agg = purchase_agg.copy()
+
     sales_agg["avg_sales_unit_price_usd"] = (
         sales_agg["total_sales_usd"] / sales_agg["total_sales_qty"]
     )
 
-    # --- 2) PURCHASE AGG (SADECE MALZEME BAZLI) ---
-    purchase_agg = (
-        purchase_df
-        .groupby("Malzeme", as_index=False)
-        .agg(
-            total_purchase_qty=("Sipariş Miktarı", "sum"),
-            total_purchase_cost_usd=("Kalem Toplam USD", "sum"),
-            purchase_unit=("Birim", "first"),
-            MalzemeGrup=("MalzemeGrup", "first"),
-        )
-    )
     purchase_agg["avg_purchase_unit_cost_usd"] = (
         purchase_agg["total_purchase_cost_usd"] / purchase_agg["total_purchase_qty"]
     )
@@ -2,102 +2,106 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from monitoring import instrument
+from .inputs import SOURCE_COLUMN, PurchaseInput, column, numeric, purchase_inputs, records, top_k
+from .rules import RuleSet, get_rules
+
+
+# Stokout sinyalinde taşınan malzeme alanları (simülasyon alanları varsa eklenir)
+STOCKOUT_SIGNAL_FIELDS = ("material", "material_group", "avg_lead_time_days", "total_order_value")
+STOCKOUT_SIMULATION_FIELDS = ("stockout_probability", "expected_shortage")
+# Tedarikçi risk skoru kaynağı: tüm geçmiş ya da son pencere (recent_risk_score)
+RISK_WINDOWS = ("all", "recent")
 
 
 class PurchaseAgent:
     """
     LLM bağımsız, kural tabanlı satınalma analisti.
-    Girdi: purchase_summary (PurchaseFeatureBuilder çıktısı)
+    Girdi: purchase_summary (PurchaseFeatureBuilder çıktısı; dict ya da PurchaseSummaryFrames)
     Çıktı: JSON uyumlu dict
+    Eşikler ve mesajlar agents.rules kural setinden gelir.
+    risk_window="recent": tedarikçi riski supplier_stats'taki recent_risk_score'dan
+    okunur (PurchaseFeatureBuilder(recent_months=N)); son pencerede siparişi olmayan
+    tedarikçide tüm geçmiş skoru kullanılır.
     """
 
-    def analyze(self, summary: Dict[str, Any]) -> Dict[str, Any]:
-        lead_stats = summary.get("lead_time_stats", {})
-        supplier_stats = summary.get("supplier_stats", [])
-        material_stats = summary.get("material_stats", [])
-        order_totals = summary.get("order_totals", [])
+    def __init__(self, rules: Optional[RuleSet] = None, risk_window: str = "all"):
+        if risk_window not in RISK_WINDOWS:
+            raise ValueError(f"Geçersiz risk penceresi: {risk_window} (mevcut: {list(RISK_WINDOWS)})")
+        self.rules = get_rules(rules)
+        self.risk_window = risk_window
+
+    @instrument("agents.purchase.analyze")
+    def analyze(self, summary: PurchaseInput) -> Dict[str, Any]:
+        inputs = purchase_inputs(summary)
+        lead_stats = inputs.lead_time_stats
+        supplier_stats = inputs.supplier_stats
+        material_stats = inputs.material_stats
+        order_totals = inputs.order_totals
 
         avg_lead = lead_stats.get("overall_avg_lead_time_days")
         lead_std = lead_stats.get("overall_std_lead_time_days")
 
-        # Lead time risk yorumu
-        if avg_lead is None:
-            lead_comment = "Lead time verisi yetersiz; teslimat performansı analiz edilemiyor."
-            lead_risk_score = 50.0
-        else:
-            if avg_lead <= 15:
-                lead_comment = f"Ortalama lead time yaklaşık {avg_lead:.1f} gün, oldukça makul."
-                lead_risk_score = 30.0
-            elif avg_lead <= 30:
-                lead_comment = f"Ortalama lead time {avg_lead:.1f} gün seviyesinde; kritik ürünler için güvenli stok gözden geçirilmeli."
-                lead_risk_score = 50.0
-            else:
-                lead_comment = f"Ortalama lead time {avg_lead:.1f} günü aşıyor; ciddi tedarik riski var."
-                lead_risk_score = 75.0
-
-        # Fiyat volatilitesi yorumu (global bakış)
-        vol_scores: List[float] = []
-        for mat in material_stats:
-            avg_p = mat.get("avg_unit_price")
-            std_p = mat.get("unit_price_std")
-            if avg_p and std_p:
-                cv = std_p / avg_p
-                vol_scores.append(cv)
-
-        if vol_scores:
-            avg_cv = sum(vol_scores) / len(vol_scores)
-            if avg_cv < 0.15:
-                price_comment = "Genel olarak birim fiyatlarda volatilite düşük."
-            elif avg_cv < 0.30:
-                price_comment = "Birim fiyat volatilitesi orta seviyede; kritik tedarikçilerle kontrat şartları gözden geçirilebilir."
-            else:
-                price_comment = "Birim fiyatlarda yüksek oynaklık var; sözleşme ve alternatif tedarikçi stratejisi gerekiyor."
+        # Lead time risk yorumu (bant eşikleri)
+        lead_level = self.rules.band("lead_time").classify(avg_lead)
+        lead_comment = lead_level["message"]
+        lead_risk_score = lead_level["score"]
+
+        # Fiyat volatilitesi yorumu (global bakış): malzeme CV'lerinin ortalaması
+        avg_p = numeric(material_stats, "avg_unit_price")
+        std_p = numeric(material_stats, "unit_price_std")
+        valid = np.isfinite(avg_p) & (avg_p != 0) & np.isfinite(std_p) & (std_p != 0)
+        price_band = self.rules.band("price_cv")
+        if valid.any():
+            price_comment = price_band.classify(float(np.mean(std_p[valid] / avg_p[valid])))["message"]
         else:
-            price_comment = "Fiyat volatilitesi için yeterli veri yok."
+            price_comment = price_band.classify(None)["message"]
+
+        recent_window = self.risk_window == "recent" and "recent_risk_score" in supplier_stats.columns
+        if recent_window:
+            all_time = numeric(supplier_stats, "risk_score")
+            recent = numeric(supplier_stats, "recent_risk_score")
+            supplier_stats = supplier_stats.assign(
+                all_time_risk_score=all_time,
+                risk_score=np.where(np.isnan(recent), all_time, recent),
+            )
 
         # Tedarikçi bazlı risk listesi (yüksek risk_score)
-        risky_suppliers = [
-            s for s in supplier_stats if s.get("risk_score", 0) >= 60
-        ]
-        risky_suppliers = sorted(
-            risky_suppliers,
-            key=lambda x: x.get("risk_score", 0),
-            reverse=True,
+        supplier_hits = self.rules.select("supplier", supplier_stats)
+        risky_rows = top_k(
+            numeric(supplier_stats, "risk_score", default=0.0),
+            rows=supplier_hits.get("risky_suppliers", []),
+        )
+        risky_suppliers = records(
+            supplier_stats,
+            risky_rows,
+            overrides=("risk_score", "all_time_risk_score") if recent_window else (),
         )
 
         # PO bazında anomali (en büyük 5 sipariş)
-        large_orders = sorted(
-            order_totals, key=lambda x: x.get("order_total", 0), reverse=True
-        )[:5]
-
-        # Stokout risk sinyali:
-        # Çok uzun lead time + yüksek toplam sipariş değerine sahip ürünler
-        stockout_signals: List[Dict[str, Any]] = []
-        for mat in material_stats:
-            if mat.get("avg_lead_time_days") and mat["avg_lead_time_days"] > 30:
-                stockout_signals.append(
-                    {
-                        "material": mat.get("material"),
-                        "material_group": mat.get("material_group"),
-                        "avg_lead_time_days": mat.get("avg_lead_time_days"),
-                        "total_order_value": mat.get("total_order_value"),
-                    }
-                )
-
-        actions: List[str] = []
-        if lead_risk_score >= 60:
-            actions.append(
-                "Uzun lead time'a sahip kritik malzemeler için alternatif tedarikçi arayışı başlatılmalı."
-            )
-        if risky_suppliers:
-            actions.append(
-                "Yüksek risk skoruna sahip tedarikçilerle sözleşme, fiyat ve teslimat şartları yeniden müzakere edilmeli."
-            )
-        if stockout_signals:
-            actions.append(
-                "Lead time'ı uzun olan malzemeler için güvenli stok seviyeleri netleştirilmeli."
-            )
+        large_orders = records(
+            order_totals, top_k(numeric(order_totals, "order_total", default=0.0), 5)
+        )
+
+        # Stokout risk sinyali: simülasyon olasılığı ya da uzun lead time
+        material_hits = self.rules.select("material", material_stats)
+        stockout_signals = _stockout_signals(
+            material_stats, material_hits.get("stockout_signals", [])
+        )
+
+        actions = self.rules.messages(
+            "purchase_actions",
+            {
+                "lead_time_risk_score": lead_risk_score,
+                "risky_supplier_count": len(risky_suppliers),
+                "stockout_signal_count": len(stockout_signals),
+            },
+        ).get("actions", [])
 
         return {
             "lead_time_comment": lead_comment,
@@ -108,3 +112,28 @@ class PurchaseAgent:
             "stockout_signals": stockout_signals,
             "actions": actions,
         }
+
+
+def _stockout_signals(material_stats: pd.DataFrame, rows) -> List[Dict[str, Any]]:
+    """
+    Seçilen malzeme satırlarından sinyal kayıtları; simülasyon alanları
+    sadece olasılığı dolu satırlarda yer alır.
+    """
+    selected = material_stats.iloc[np.asarray(rows, dtype=np.int64)]
+    if SOURCE_COLUMN in selected.columns:
+        # list-of-dict girdi: alanlar girdideki değerleriyle
+        signals = []
+        for mat in selected[SOURCE_COLUMN]:
+            signal = {name: mat.get(name) for name in STOCKOUT_SIGNAL_FIELDS}
+            if mat.get("stockout_probability") is not None:
+                signal.update({name: mat.get(name) for name in STOCKOUT_SIMULATION_FIELDS})
+            signals.append(signal)
+        return signals
+
+    fields = STOCKOUT_SIGNAL_FIELDS + STOCKOUT_SIMULATION_FIELDS
+    signals = records(pd.DataFrame({name: column(selected, name) for name in fields}))
+    for signal in signals:
+        if signal["stockout_probability"] is None:
+            for name in STOCKOUT_SIMULATION_FIELDS:
+                del signal[name]
+    return signals
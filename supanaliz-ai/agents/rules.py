@@ -0,0 +1,575 @@
+# supanaliz-ai/agents/rules.py
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import string
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Koşul derleyicisi: (frame, context) → bool dizisi (len(frame))
+Condition = Callable[[pd.DataFrame, Mapping[str, Any]], np.ndarray]
+
+ORDERING_OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+EQUALITY_OPS = ("==", "!=", "in", "not_in", "contains")
+NULL_OPS = ("is_null", "not_null")
+
+
+# ---------------------------------------------------
+# Varsayılan kural seti (SUPANALIZ_AGENT_RULES JSON'u ile ezilebilir)
+# ---------------------------------------------------
+# target: kuralın değerlendirildiği tablo
+#   material / supplier / seasonality / match → satır bazlı
+#   sales_actions / purchase_actions / decision_signals / decision_summary /
+#   decision_actions → tek satırlık bağlam
+# emit: kuralın beslediği çıktı listesi; message: str.format şablonu (satır / bağlam alanları)
+DEFAULT_RULE_CONFIG: Dict[str, Any] = {
+    "rules": [
+        # --- SalesAgent
+        {
+            "name": "peak_month",
+            "target": "seasonality",
+            "emit": "peak_months",
+            "condition": {"field": "normalized_index", "op": ">", "value": 1.10},
+        },
+        {
+            "name": "low_month",
+            "target": "seasonality",
+            "emit": "low_months",
+            "condition": {"field": "normalized_index", "op": "<", "value": 0.90},
+        },
+        {
+            "name": "sales_trend_up",
+            "target": "sales_actions",
+            "emit": "actions",
+            "severity": "info",
+            "condition": {"param": "direction", "op": "==", "value": "up"},
+            "message": "Yüksek performanslı ürünlerde kapasite ve tedarik güvence altına alın.",
+        },
+        {
+            "name": "sales_trend_down",
+            "target": "sales_actions",
+            "emit": "actions",
+            "severity": "warning",
+            "condition": {"param": "direction", "op": "==", "value": "down"},
+            "message": "Düşen ürünlerde kampanya, paketleme veya ürün karması revizyonu düşünülmeli.",
+        },
+        {
+            "name": "sales_high_risk",
+            "target": "sales_actions",
+            "emit": "actions",
+            "severity": "critical",
+            "condition": {"param": "risk_score", "op": ">", "value": 70},
+            "message": "Talep dalgalanmaları yüksek; güvenli stok politikası ve esnek üretim planı kurgulanmalı.",
+        },
+        # --- PurchaseAgent
+        {
+            "name": "risky_supplier",
+            "target": "supplier",
+            "emit": "risky_suppliers",
+            "severity": "warning",
+            "condition": {"field": "risk_score", "op": ">=", "value": 60},
+        },
+        {
+            # Simülasyon sonucu varsa olasılık eşiği, yoksa uzun lead time
+            "name": "stockout_signal",
+            "target": "material",
+            "emit": "stockout_signals",
+            "severity": "critical",
+            "condition": {
+                "any": [
+                    {"field": "stockout_probability", "op": ">=", "value": 0.5},
+                    {
+                        "all": [
+                            {"field": "stockout_probability", "op": "is_null"},
+                            {"field": "avg_lead_time_days", "op": ">", "value": 30},
+                        ]
+                    },
+                ]
+            },
+        },
+        {
+            "name": "purchase_lead_time_risk",
+            "target": "purchase_actions",
+            "emit": "actions",
+            "severity": "warning",
+            "condition": {"param": "lead_time_risk_score", "op": ">=", "value": 60},
+            "message": "Uzun lead time'a sahip kritik malzemeler için alternatif tedarikçi arayışı başlatılmalı.",
+        },
+        {
+            "name": "purchase_risky_suppliers",
+            "target": "purchase_actions",
+            "emit": "actions",
+            "severity": "warning",
+            "condition": {"param": "risky_supplier_count", "op": ">", "value": 0},
+            "message": "Yüksek risk skoruna sahip tedarikçilerle sözleşme, fiyat ve teslimat şartları yeniden müzakere edilmeli.",
+        },
+        {
+            "name": "purchase_stockout",
+            "target": "purchase_actions",
+            "emit": "actions",
+            "severity": "critical",
+            "condition": {"param": "stockout_signal_count", "op": ">", "value": 0},
+            "message": "Lead time'ı uzun olan malzemeler için güvenli stok seviyeleri netleştirilmeli.",
+        },
+        # --- DecisionAgent
+        {
+            "name": "sales_up_purchase_gap",
+            "target": "match",
+            "emit": "sales_up_purchase_risk",
+            "severity": "critical",
+            "condition": {
+                "all": [
+                    {"param": "direction", "op": "==", "value": "up"},
+                    {"field": "match_type", "op": "in", "value": ["direct", "group"]},
+                    {"field": "purchase_total", "op": "<", "value": {"field": "sales_total", "scale": 0.7}},
+                ]
+            },
+            "message": "Satış artarken satınalma hacmi geride; stokout riski.",
+        },
+        {
+            "name": "unmatched_sales",
+            "target": "match",
+            "emit": "critical_products",
+            "severity": "critical",
+            "condition": {
+                "all": [
+                    {"field": "match_type", "op": "==", "value": "none"},
+                    {"field": "sales_total", "op": ">", "value": 0},
+                ]
+            },
+            "message": "Satış var, satınalma datasında eşleşen malzeme yok (stokout riski).",
+        },
+        {
+            "name": "purchase_lagging_growth",
+            "target": "match",
+            "emit": "critical_products",
+            "severity": "critical",
+            "condition": {
+                "all": [
+                    {"param": "direction", "op": "==", "value": "up"},
+                    {"field": "match_type", "op": "in", "value": ["direct", "group"]},
+                    {"field": "purchase_total", "op": "<", "value": {"field": "sales_total", "scale": 0.7}},
+                ]
+            },
+            "message": "Satış hacmi satınalmadan hızlı büyüyor; kapasite ve stok riski.",
+        },
+        {
+            "name": "sales_down_price_pressure",
+            "target": "decision_signals",
+            "emit": "sales_down_price_risk",
+            "severity": "warning",
+            "condition": {
+                "all": [
+                    {"param": "direction", "op": "==", "value": "down"},
+                    {"param": "price_volatility_comment", "op": "contains", "value": "yüksek"},
+                ]
+            },
+            "message": "Satış trendi aşağı, satınalma tarafında fiyat volatilitesi yüksek; fiyat baskısı kaynaklı talep kaybı riski var.",
+        },
+        {
+            "name": "critical_product_count",
+            "target": "decision_summary",
+            "emit": "management_summary",
+            "condition": {"param": "critical_count", "op": ">", "value": 0},
+            "message": "{critical_count} adet kritik malzeme tespit edildi; stokout ve kapasite riskleri içeriyor.",
+        },
+        {
+            "name": "risky_supplier_count",
+            "target": "decision_summary",
+            "emit": "management_summary",
+            "condition": {"param": "risky_supplier_count", "op": ">", "value": 0},
+            "message": "{risky_supplier_count} tedarikçi yüksek risk skoruna sahip.",
+        },
+        {
+            "name": "plan_critical_products",
+            "target": "decision_actions",
+            "emit": "action_plan",
+            "severity": "critical",
+            "condition": {"param": "critical_count", "op": ">", "value": 0},
+            "message": "Kritik malzemeler için (stokout riski olanlar) satınalma planı ve güvenli stok seviyeleri ivedilikle gözden geçirilsin.",
+        },
+        {
+            "name": "plan_risky_suppliers",
+            "target": "decision_actions",
+            "emit": "action_plan",
+            "severity": "warning",
+            "condition": {"param": "risky_supplier_count", "op": ">", "value": 0},
+            "message": "Yüksek riskli tedarikçilerle teslimat ve fiyat koşulları yeniden müzakere edilsin; alternatif tedarikçi opsiyonları oluşturulsun.",
+        },
+        {
+            "name": "plan_weekly_review",
+            "target": "decision_actions",
+            "emit": "action_plan",
+            "condition": {},
+            "message": "Satış ve satınalma ajan çıktıları haftalık toplantılarda gözden geçirilerek üretim planı ve bütçe revizyonlarına veri sağlayacak şekilde kullanılmalı.",
+        },
+    ],
+    # Skaler eşik bantları: levels artan "upper" sırasında, sonuncusu üst sınırsız.
+    # right_closed: değer == upper ise alt banda düşer (<=); değilse (<).
+    "bands": {
+        "lead_time": {
+            "right_closed": True,
+            "missing": {
+                "score": 50.0,
+                "message": "Lead time verisi yetersiz; teslimat performansı analiz edilemiyor.",
+            },
+            "levels": [
+                {"upper": 15, "score": 30.0, "message": "Ortalama lead time yaklaşık {value:.1f} gün, oldukça makul."},
+                {"upper": 30, "score": 50.0, "message": "Ortalama lead time {value:.1f} gün seviyesinde; kritik ürünler için güvenli stok gözden geçirilmeli."},
+                {"score": 75.0, "message": "Ortalama lead time {value:.1f} günü aşıyor; ciddi tedarik riski var."},
+            ],
+        },
+        "price_cv": {
+            "right_closed": False,
+            "missing": {"message": "Fiyat volatilitesi için yeterli veri yok."},
+            "levels": [
+                {"upper": 0.15, "message": "Genel olarak birim fiyatlarda volatilite düşük."},
+                {"upper": 0.30, "message": "Birim fiyat volatilitesi orta seviyede; kritik tedarikçilerle kontrat şartları gözden geçirilebilir."},
+                {"message": "Birim fiyatlarda yüksek oynaklık var; sözleşme ve alternatif tedarikçi stratejisi gerekiyor."},
+            ],
+        },
+    },
+}
+
+
+# ---------------------------------------------------
+# Koşul derleme
+# ---------------------------------------------------
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    if name in frame.columns:
+        return frame[name]
+    # Eksik alan → tüm satırlarda boş (karşılaştırmalar False)
+    return pd.Series(np.nan, index=frame.index)
+
+
+def _operand(spec: Any, frame: pd.DataFrame, context: Mapping[str, Any]):
+    """
+    Sol / sağ taraf: {"field": kolon, "scale": k}, {"param": bağlam anahtarı} ya da sabit.
+    """
+    if isinstance(spec, dict) and "field" in spec:
+        values = _column(frame, spec["field"])
+        if "scale" in spec:
+            return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float) * float(spec["scale"])
+        return values
+    if isinstance(spec, dict) and "param" in spec:
+        return context.get(spec["param"])
+    return spec
+
+
+def _as_float(values) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    if values is None:
+        return np.asarray(np.nan)
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return np.asarray(np.nan)
+
+
+def _is_null(values) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        return values.isna().to_numpy()
+    return np.asarray(values is None or (isinstance(values, float) and np.isnan(values)))
+
+
+def _equality(op: str, left, right) -> np.ndarray:
+    if isinstance(left, pd.Series):
+        if op in ("in", "not_in"):
+            mask = left.isin(list(right)).to_numpy()
+        elif op == "contains":
+            mask = left.astype(object).map(
+                lambda v: isinstance(v, str) and str(right) in v.lower()
+            ).to_numpy(dtype=bool)
+        else:
+            mask = (left.astype(object) == right).to_numpy(dtype=bool)
+    else:
+        if op in ("in", "not_in"):
+            mask = np.asarray(left in list(right))
+        elif op == "contains":
+            mask = np.asarray(isinstance(left, str) and str(right) in left.lower())
+        else:
+            mask = np.asarray(left == right)
+    if op in ("!=", "not_in"):
+        mask = ~mask
+    return mask
+
+
+def compile_condition(spec: Optional[Mapping[str, Any]]) -> Condition:
+    """
+    Deklaratif koşul → vektörel fonksiyon. Gramer:
+        {"all": [...]} | {"any": [...]} | {"not": koşul} | {} (her zaman doğru)
+        {"field" | "param": ad, "op": op, "value": sabit | {"field": ad, "scale": k} | {"param": ad}}
+    op: > >= < <= == != in not_in contains is_null not_null
+    Boş (NaN / None) değerle sıralama karşılaştırması False döner.
+    """
+    spec = dict(spec or {})
+    if not spec:
+        return lambda frame, context: np.ones(len(frame), dtype=bool)
+
+    if "all" in spec or "any" in spec:
+        key = "all" if "all" in spec else "any"
+        parts = [compile_condition(s) for s in spec[key]]
+        reduce = np.logical_and if key == "all" else np.logical_or
+        start = key == "all"
+
+        def combined(frame, context):
+            mask = np.full(len(frame), start, dtype=bool)
+            for part in parts:
+                mask = reduce(mask, part(frame, context))
+            return mask
+
+        return combined
+
+    if "not" in spec:
+        inner = compile_condition(spec["not"])
+        return lambda frame, context: ~inner(frame, context)
+
+    op = spec.get("op")
+    if op not in ORDERING_OPS and op not in EQUALITY_OPS and op not in NULL_OPS:
+        raise ValueError(f"Bilinmeyen kural operatörü: {op}")
+    if "field" not in spec and "param" not in spec:
+        raise ValueError(f"Koşulda 'field' ya da 'param' gerekli: {spec}")
+    subject = {"field": spec["field"]} if "field" in spec else {"param": spec["param"]}
+    value = spec.get("value")
+
+    def leaf(frame, context):
+        left = _operand(subject, frame, context)
+        if op in NULL_OPS:
+            mask = _is_null(left)
+            if op == "not_null":
+                mask = ~mask
+        elif op in ORDERING_OPS:
+            right = _operand(value, frame, context)
+            with np.errstate(invalid="ignore"):
+                mask = ORDERING_OPS[op](_as_float(left), _as_float(right))
+        else:
+            mask = _equality(op, left, _operand(value, frame, context))
+        return np.broadcast_to(mask, (len(frame),))
+
+    return leaf
+
+
+# ---------------------------------------------------
+# Kural / bant / kural seti
+# ---------------------------------------------------
+class _FormatRow(dict):
+    def __missing__(self, key):
+        return ""
+
+
+@dataclass
+class Rule:
+    name: str
+    target: str
+    condition: Dict[str, Any] = field(default_factory=dict)
+    emit: Optional[str] = None
+    severity: str = "info"
+    message: str = ""
+    enabled: bool = True
+
+    def __post_init__(self):
+        self._compiled = compile_condition(self.condition)
+
+    def mask(self, frame: pd.DataFrame, context: Mapping[str, Any]) -> np.ndarray:
+        return np.asarray(self._compiled(frame, context), dtype=bool)
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        return self.message.format_map(_FormatRow(values))
+
+    def render_rows(self, columns: Mapping[str, np.ndarray], rows: Sequence[int]) -> List[str]:
+        """
+        Seçilen satırlar için mesajlar; kolonlar satır nesnesi üretmeden okunur.
+        Alan içermeyen şablonda mesaj tek sefer üretilir.
+        """
+        fields = {f for _, f, _, _ in string.Formatter().parse(self.message) if f}
+        if not fields:
+            return [self.render({})] * len(rows)
+        rows = np.asarray(rows, dtype=np.int64)
+        picked = {name: columns[name][rows].tolist() for name in fields if name in columns}
+        return [
+            self.render({name: values[i] for name, values in picked.items()})
+            for i in range(len(rows))
+        ]
+
+    def to_config(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "target": self.target,
+            "emit": self.emit,
+            "severity": self.severity,
+            "condition": self.condition,
+            "message": self.message,
+            "enabled": self.enabled,
+        }
+
+
+@dataclass
+class Band:
+    """
+    Skaler değer → seviye (score / message). Seviyeler np.searchsorted ile seçilir.
+    """
+    name: str
+    levels: List[Dict[str, Any]]
+    missing: Dict[str, Any] = field(default_factory=dict)
+    right_closed: bool = True
+
+    def __post_init__(self):
+        self._uppers = np.asarray([float(lv["upper"]) for lv in self.levels[:-1]], dtype=float)
+
+    def levels_for(self, values: Sequence[float]) -> np.ndarray:
+        side = "left" if self.right_closed else "right"
+        return np.searchsorted(self._uppers, np.asarray(values, dtype=float), side=side)
+
+    def classify(self, value: Optional[float]) -> Dict[str, Any]:
+        if value is None:
+            level = dict(self.missing)
+        else:
+            level = dict(self.levels[int(self.levels_for([value])[0])])
+        level.pop("upper", None)
+        level["message"] = str(level.get("message", "")).format_map(_FormatRow({"value": value}))
+        return level
+
+    def to_config(self) -> Dict[str, Any]:
+        return {"right_closed": self.right_closed, "missing": self.missing, "levels": self.levels}
+
+
+class RuleSet:
+    """
+    Agent kurallarının derlenmiş hali. evaluate(): bir hedefin tüm kuralları tek
+    kolonel geçişte çalışır, {emit: [(kural, satır indeksleri)]} döner.
+    """
+
+    def __init__(self, rules: Sequence[Rule], bands: Dict[str, Band]):
+        self.rules = [r for r in rules if r.enabled]
+        self.bands = bands
+        self._by_target: Dict[str, List[Rule]] = {}
+        for rule in self.rules:
+            self._by_target.setdefault(rule.target, []).append(rule)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "RuleSet":
+        rules = [Rule(**spec) for spec in config.get("rules", [])]
+        bands = {name: Band(name=name, **spec) for name, spec in config.get("bands", {}).items()}
+        return cls(rules, bands)
+
+    def to_config(self) -> Dict[str, Any]:
+        return {
+            "rules": [r.to_config() for r in self.rules],
+            "bands": {name: b.to_config() for name, b in self.bands.items()},
+        }
+
+    def band(self, name: str) -> Band:
+        if name not in self.bands:
+            raise KeyError(f"Kural setinde bant yok: {name}")
+        return self.bands[name]
+
+    def rules_for(self, target: str) -> List[Rule]:
+        return self._by_target.get(target, [])
+
+    def evaluate(
+        self,
+        target: str,
+        frame: pd.DataFrame,
+        context: Optional[Mapping[str, Any]] = None,
+    ) -> Dict[str, List[tuple]]:
+        """
+        emit → [(Rule, satır indeksleri)] (kural config sırasıyla).
+        """
+        context = context or {}
+        hits: Dict[str, List[tuple]] = {}
+        for rule in self.rules_for(target):
+            rows = np.flatnonzero(rule.mask(frame, context))
+            hits.setdefault(rule.emit or rule.name, []).append((rule, rows))
+        return hits
+
+    def select(
+        self,
+        target: str,
+        frame: pd.DataFrame,
+        context: Optional[Mapping[str, Any]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        emit → kurallardan en az birine uyan satır indeksleri (girdi sırasında).
+        """
+        out: Dict[str, np.ndarray] = {}
+        for emit, pairs in self.evaluate(target, frame, context).items():
+            out[emit] = np.unique(np.concatenate([r for _, r in pairs]))
+        return out
+
+    def messages(self, target: str, context: Mapping[str, Any]) -> Dict[str, List[str]]:
+        """
+        Bağlam (tek satır) kuralları: emit → tetiklenen mesajlar (config sırasıyla).
+        """
+        frame = pd.DataFrame(index=[0])
+        out: Dict[str, List[str]] = {}
+        for emit, pairs in self.evaluate(target, frame, context).items():
+            out[emit] = [rule.render(context) for rule, rows in pairs if len(rows)]
+        return out
+
+
+# ---------------------------------------------------
+# Yükleme
+# ---------------------------------------------------
+def merge_rule_config(base: Mapping[str, Any], override: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Kurallar isimle, bantlar anahtarla ezilir; yeni isimler sona eklenir.
+    """
+    merged = copy.deepcopy(dict(base))
+    rules = {r["name"]: r for r in merged.get("rules", [])}
+    order = [r["name"] for r in merged.get("rules", [])]
+    for spec in override.get("rules", []):
+        if "name" not in spec:
+            raise ValueError(f"Kural tanımında 'name' zorunlu: {spec}")
+        if spec["name"] in rules:
+            rules[spec["name"]] = {**rules[spec["name"]], **spec}
+        else:
+            rules[spec["name"]] = dict(spec)
+            order.append(spec["name"])
+    merged["rules"] = [rules[name] for name in order]
+
+    bands = merged.setdefault("bands", {})
+    for name, spec in override.get("bands", {}).items():
+        bands[name] = {**bands.get(name, {}), **spec}
+    return merged
+
+
+def load_rules(path: Optional[str] = None) -> RuleSet:
+    """
+    Varsayılan kurallar + opsiyonel JSON override dosyası.
+    """
+    config = DEFAULT_RULE_CONFIG
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config = merge_rule_config(config, json.load(f))
+    return RuleSet.from_config(config)
+
+
+_cache: Dict[Optional[str], RuleSet] = {}
+_lock = threading.Lock()
+
+
+def get_rules(rules: Optional[RuleSet] = None) -> RuleSet:
+    """
+    rules: RuleSet ya da None (SUPANALIZ_AGENT_RULES JSON yolu, yoksa varsayılanlar).
+    """
+    if isinstance(rules, RuleSet):
+        return rules
+    path = os.environ.get("SUPANALIZ_AGENT_RULES") or None
+    with _lock:
+        if path not in _cache:
+            _cache[path] = load_rules(path)
+        return _cache[path]
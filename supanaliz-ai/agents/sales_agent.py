@@ -3,16 +3,26 @@
 from __future__ import annotations
 
 import statistics
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from monitoring import instrument
+from .inputs import SalesInput, numeric, records, sales_inputs, top_k
+from .rules import RuleSet, get_rules
 
 
 class SalesAgent:
     """
     LLM bağımsız, kural tabanlı satış analisti.
-    Girdi: sales_summary (SalesFeatureBuilder çıktısı)
+    Girdi: sales_summary (SalesFeatureBuilder çıktısı; dict ya da SalesSummaryFrames)
     Çıktı: JSON uyumlu dict
+    Eşikler ve aksiyon mesajları agents.rules kural setinden gelir.
     """
 
+    def __init__(self, rules: Optional[RuleSet] = None):
+        self.rules = get_rules(rules)
+
     @staticmethod
     def _month_name_tr(month: int) -> str:
         names = {
@@ -31,11 +41,12 @@ class SalesAgent:
         }
         return names.get(month, str(month))
 
-    def analyze(self, summary: Dict[str, Any]) -> Dict[str, Any]:
-        trend = summary.get("trend", {})
-        seasonality = summary.get("seasonality", [])
-        material_stats = summary.get("material_stats", [])
-        monthly_series = summary.get("monthly_series", [])
+    @instrument("agents.sales.analyze")
+    def analyze(self, summary: SalesInput) -> Dict[str, Any]:
+        inputs = sales_inputs(summary)
+        trend = inputs.trend
+        seasonality = inputs.seasonality
+        material_stats = inputs.material_stats
 
         direction = trend.get("direction", "flat")
         pct_change = trend.get("pct_change", 0.0)
@@ -49,36 +60,40 @@ class SalesAgent:
             trend_comment = "Satış trendi genel olarak yatay seyrediyor."
 
         # Mevsimsellik yorumu
-        peak_months = [
-            s for s in seasonality if s.get("normalized_index", 1.0) > 1.10
-        ]
-        low_months = [
-            s for s in seasonality if s.get("normalized_index", 1.0) < 0.90
-        ]
-
-        if peak_months:
+        season_hits = self.rules.select("seasonality", seasonality)
+        months = numeric(seasonality, "month")
+        peak_months = months[season_hits.get("peak_months", [])]
+        low_months = months[season_hits.get("low_months", [])]
+
+        if len(peak_months):
             peak_str = ", ".join(
-                self._month_name_tr(p["month"]) for p in peak_months
+                self._month_name_tr(int(m)) for m in peak_months
             )
             season_comment = f"Talep özellikle şu aylarda yükseliyor: {peak_str}."
         else:
             season_comment = "Belirgin bir mevsimsellik zirvesi tespit edilmedi."
 
-        if low_months:
+        if len(low_months):
             low_str = ", ".join(
-                self._month_name_tr(p["month"]) for p in low_months
+                self._month_name_tr(int(m)) for m in low_months
             )
             season_comment += f" Düşük talep dönemleri: {low_str}."
 
         # Ürün bazlı performans
-        sorted_materials = sorted(
-            material_stats, key=lambda x: x.get("total_sales", 0.0), reverse=True
-        )
-        top_materials = sorted_materials[:5]
-        low_materials = sorted_materials[-5:] if len(sorted_materials) >= 5 else []
+        order = top_k(numeric(material_stats, "total_sales", default=0.0))
+        top_materials = records(material_stats, order[:5])
+        low_materials = records(material_stats, order[-5:]) if len(order) >= 5 else []
+
+        # ABC/XYZ sınıf dağılımı (material_stats'ta varsa)
+        abc_xyz_counts: Dict[str, int] = {}
+        if "abc_xyz" in material_stats.columns:
+            counts = material_stats["abc_xyz"].dropna().value_counts().sort_index()
+            abc_xyz_counts = {str(k): int(v) for k, v in counts.items()}
 
         # Basit risk puanı (0-100)
-        risk_score = self._compute_risk_score(direction, monthly_series)
+        risk_score = self._compute_risk_score(
+            direction, numeric(inputs.monthly_series, "total_sales")
+        )
 
         # 3-6 aylık öngörü yorumu
         if direction == "up":
@@ -94,19 +109,9 @@ class SalesAgent:
                 "Trend yatay; mevcut kapasite ve stok seviyesi çoğunlukla yeterli görünüyor."
             )
 
-        actions: List[str] = []
-        if direction == "up":
-            actions.append(
-                "Yüksek performanslı ürünlerde kapasite ve tedarik güvence altına alın."
-            )
-        if direction == "down":
-            actions.append(
-                "Düşen ürünlerde kampanya, paketleme veya ürün karması revizyonu düşünülmeli."
-            )
-        if risk_score > 70:
-            actions.append(
-                "Talep dalgalanmaları yüksek; güvenli stok politikası ve esnek üretim planı kurgulanmalı."
-            )
+        actions: List[str] = self.rules.messages(
+            "sales_actions", {"direction": direction, "risk_score": risk_score}
+        ).get("actions", [])
 
         return {
             "trend_comment": trend_comment,
@@ -116,20 +121,19 @@ class SalesAgent:
             "forecast_comment_3_6m": forecast_comment,
             "risk_score": float(risk_score),
             "actions": actions,
+            "abc_xyz_counts": abc_xyz_counts,
         }
 
-    def _compute_risk_score(
-        self, direction: str, monthly_series: List[Dict[str, Any]]
-    ) -> float:
+    def _compute_risk_score(self, direction: str, monthly_sales: np.ndarray) -> float:
         """
         Basit risk metriği:
         - Trend aşağı → risk +
         - Aylık satış volatilitesi yüksek → risk +
         """
-        if not monthly_series:
+        if not len(monthly_sales):
             return 50.0
 
-        values = [m["total_sales"] for m in monthly_series]
+        values = monthly_sales.tolist()
         if len(values) < 2:
             base = 40.0
         else:
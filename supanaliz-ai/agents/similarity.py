@@ -0,0 +1,206 @@
+# supanaliz-ai/agents/similarity.py
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.neighbors import NearestNeighbors
+
+from monitoring import instrument, stage
+
+
+# Özellik vektörü blokları (her blok kendi içinde L2 normlu, ağırlıkla çarpılır):
+# - code: malzeme kodu karakter n-gram'ları (hash'lenmiş)
+# - group: grup kodu n-gram'ları (satışta MalKodGrup, satınalmada MalzemeGrup[:-1])
+# - unit: birim one-hot (fit edilen katalogdaki birimler)
+# - price: log10(birim fiyat USD); satış fiyatı ile satınalma maliyeti aynı eksende
+CODE_FEATURES = 64
+GROUP_FEATURES = 16
+DEFAULT_WEIGHTS = {"code": 1.0, "group": 1.0, "unit": 0.5, "price": 0.5}
+
+CANDIDATE_COLUMNS = [
+    "Malzeme",
+    "MalKodGrup",
+    "sales_unit",
+    "rank",
+    "candidate_material",
+    "candidate_group",
+    "candidate_unit",
+    "distance",
+    "score",
+]
+
+
+def sales_catalog(matching_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Eşleştirme tablosunun satış tarafı: Malzeme, group, unit, unit_price_usd.
+    """
+    rows = matching_df[matching_df["total_sales_qty"].notna()]
+    return pd.DataFrame(
+        {
+            "Malzeme": rows["Malzeme"].to_numpy(),
+            "group": rows["MalKodGrup"].to_numpy(),
+            "unit": rows["sales_unit"].to_numpy(),
+            "unit_price_usd": (rows["total_sales_usd"] / rows["total_sales_qty"]).to_numpy(),
+            "match_status": rows["match_status"].to_numpy(),
+        }
+    )
+
+
+def purchase_catalog(matching_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Eşleştirme tablosunun satınalma tarafı; group anahtarı satışla aynı seviyede
+    (MalzemeGrup[:-1]), orijinal grup display_group'ta tutulur.
+    """
+    rows = matching_df[matching_df["total_purchase_qty"].notna()]
+    groups = rows["MalzemeGrup"].astype(object)
+    return pd.DataFrame(
+        {
+            "Malzeme": rows["Malzeme"].to_numpy(),
+            "group": groups.where(groups.isna(), groups.astype(str).str[:-1]).to_numpy(),
+            "display_group": groups.to_numpy(),
+            "unit": rows["purchase_unit"].to_numpy(),
+            "unit_price_usd": (
+                rows["total_purchase_cost_usd"] / rows["total_purchase_qty"]
+            ).to_numpy(),
+        }
+    )
+
+
+def _text(values: pd.Series) -> list:
+    return ["" if pd.isna(v) else str(v) for v in values]
+
+
+class SimilarMaterialIndex:
+    """
+    Satınalma malzemeleri üzerinde benzerlik indeksi (sklearn NearestNeighbors, ball tree).
+    Direkt eşleşmesi olmayan satış malzemeleri için kod / grup / birim / fiyat seviyesine
+    göre en yakın k satınalma malzemesini tek batch sorguda döner.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        code_ngrams: tuple = (2, 3),
+        leaf_size: int = 40,
+    ):
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen ağırlık blokları: {sorted(unknown)}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.leaf_size = leaf_size
+        self._code = HashingVectorizer(
+            analyzer="char", ngram_range=code_ngrams, n_features=CODE_FEATURES,
+            alternate_sign=False, lowercase=False,
+        )
+        self._group = HashingVectorizer(
+            analyzer="char", ngram_range=(1, 4), n_features=GROUP_FEATURES,
+            alternate_sign=False, lowercase=False,
+        )
+        self.catalog: Optional[pd.DataFrame] = None
+        self.units: Optional[pd.Index] = None
+        self._price_fill = 0.0
+        self._nn: Optional[NearestNeighbors] = None
+
+    def _vectors(self, catalog: pd.DataFrame) -> np.ndarray:
+        w = self.weights
+        code = self._code.transform(_text(catalog["Malzeme"])).toarray()
+        group = self._group.transform(_text(catalog["group"])).toarray()
+
+        unit = np.zeros((len(catalog), len(self.units)))
+        pos = self.units.get_indexer(pd.Index(_text(catalog["unit"]), dtype=object))
+        hit = pos >= 0
+        unit[np.flatnonzero(hit), pos[hit]] = 1.0
+
+        price = pd.to_numeric(catalog["unit_price_usd"], errors="coerce").to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_price = np.log10(price)
+        log_price = np.where(np.isfinite(log_price), log_price, self._price_fill)
+
+        return np.hstack(
+            [
+                w["code"] * code,
+                w["group"] * group,
+                w["unit"] * unit,
+                w["price"] * log_price[:, None],
+            ]
+        )
+
+    @instrument("agents.similarity.fit")
+    def fit(self, catalog: pd.DataFrame) -> "SimilarMaterialIndex":
+        """
+        catalog: Malzeme, group, unit, unit_price_usd (+ opsiyonel display_group).
+        """
+        if catalog.empty:
+            raise ValueError("Benzerlik indeksi için satınalma kataloğu boş.")
+
+        self.catalog = catalog.reset_index(drop=True)
+        self.units = pd.Index(sorted(set(_text(self.catalog["unit"])) - {""}), dtype=object)
+        price = pd.to_numeric(self.catalog["unit_price_usd"], errors="coerce")
+        log_price = np.log10(price[price > 0])
+        # Fiyatı bilinmeyen malzeme katalog medyanına konur (fiyat bloğu nötr)
+        self._price_fill = float(log_price.median()) if len(log_price) else 0.0
+
+        self._nn = NearestNeighbors(algorithm="ball_tree", leaf_size=self.leaf_size)
+        self._nn.fit(self._vectors(self.catalog))
+        return self
+
+    @classmethod
+    def from_matching(cls, matching_df: pd.DataFrame, **kwargs) -> "SimilarMaterialIndex":
+        """
+        build_matching_table çıktısının satınalma tarafından indeks.
+        """
+        return cls(**kwargs).fit(purchase_catalog(matching_df))
+
+    @instrument("agents.similarity.query")
+    def query(self, catalog: pd.DataFrame, k: int = 5) -> pd.DataFrame:
+        """
+        catalog satırları için en yakın k satınalma malzemesi (uzun format, rank 1..k).
+        score = 1 / (1 + distance) ∈ (0, 1].
+        """
+        if self._nn is None:
+            raise ValueError("İndeks henüz fit edilmedi.")
+        if k < 1:
+            raise ValueError("k en az 1 olmalı.")
+        if catalog.empty:
+            return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+        k = min(k, len(self.catalog))
+        distance, idx = self._nn.kneighbors(self._vectors(catalog), n_neighbors=k)
+
+        src = np.repeat(np.arange(len(catalog)), k)
+        hit = idx.ravel()
+        groups = self.catalog.get("display_group", self.catalog["group"])
+        return pd.DataFrame(
+            {
+                "Malzeme": catalog["Malzeme"].to_numpy()[src],
+                "MalKodGrup": catalog["group"].to_numpy()[src],
+                "sales_unit": catalog["unit"].to_numpy()[src],
+                "rank": np.tile(np.arange(1, k + 1), len(catalog)),
+                "candidate_material": self.catalog["Malzeme"].to_numpy()[hit],
+                "candidate_group": groups.to_numpy()[hit],
+                "candidate_unit": self.catalog["unit"].to_numpy()[hit],
+                "distance": distance.ravel(),
+                "score": 1.0 / (1.0 + distance.ravel()),
+            }
+        )
+
+
+def similar_material_candidates(
+    matching_df: pd.DataFrame,
+    k: int = 5,
+    index: Optional[SimilarMaterialIndex] = None,
+) -> pd.DataFrame:
+    """
+    match_status == "sales_only" olan her satış malzemesi için top-k satınalma adayı.
+    """
+    with stage("agents.similarity.candidates", rows_in=len(matching_df)):
+        catalog = sales_catalog(matching_df)
+        unmatched = catalog[catalog["match_status"] == "sales_only"]
+        if unmatched.empty:
+            return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+        index = index or SimilarMaterialIndex.from_matching(matching_df)
+        return index.query(unmatched, k=k)
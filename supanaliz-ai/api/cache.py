@@ -0,0 +1,151 @@
+# supanaliz-ai/api/cache.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Type
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def canonical_hash(payload: Any) -> str:
+    """
+    İstek gövdesinin kanonik (anahtar sıralı, boşluksuz) JSON'unun SHA-256'sı.
+    Aynı içerik → aynı anahtar; dict anahtar sırası sonucu etkilemez.
+    """
+    raw = json.dumps(
+        payload,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class ResultCache:
+    """
+    TTL + boyut sınırlı LRU sonuç cache'i.
+    - Anahtar: canonical_hash(endpoint + istek)
+    - Değer: serileştirilmiş JSON gövdesi ve güçlü ETag
+    Agent'lar girdilerinin saf fonksiyonu olduğu için cache'lenen gövde
+    aynı istekte birebir yeniden kullanılabilir.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, body: bytes) -> CachedResult:
+        entry = CachedResult(
+            body=body,
+            etag='"' + hashlib.sha256(body).hexdigest() + '"',
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [t.strip() for t in if_none_match.split(",")]
+
+
+def render_json(content: Any, response_model: Optional[Type[BaseModel]] = None) -> str:
+    """
+    FastAPI serileştirmesinin aynısı: response_model doğrulaması + jsonable_encoder +
+    JSONResponse.render ayarları (allow_nan=False: NaN sızarsa hata, geçersiz JSON değil).
+    """
+    if response_model is not None:
+        content = response_model.model_validate(content).model_dump(mode="json", by_alias=True)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    )
+
+
+def cached_json_response(
+    cache: ResultCache,
+    request: Request,
+    endpoint: str,
+    payload: Any,
+    compute: Callable[[], Any],
+    response_model: Optional[Type[BaseModel]] = None,
+) -> Response:
+    """
+    Agent endpointleri için ortak akış:
+    1) (endpoint, payload) → anahtar, cache'te varsa hesaplama atlanır
+    2) yoksa compute() çalışır, sonuç JSON'a bir kez serileştirilip saklanır
+    3) If-None-Match ETag ile eşleşirse gövdesiz 304 döner
+    response_model: route'un response_model'i; sonuç FastAPI'deki gibi model ile
+    doğrulanıp serileştirilir (gövde cache'siz route çıktısıyla byte-byte aynı).
+    """
+    key = canonical_hash({"endpoint": endpoint, "payload": payload})
+
+    entry = cache.get(key)
+    if entry is None:
+        body = render_json(compute(), response_model).encode("utf-8")
+        entry = cache.put(key, body)
+
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"private, max-age={int(cache.ttl_seconds)}",
+    }
+
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=entry.body, media_type="application/json", headers=headers
+    )
@@ -0,0 +1,136 @@
+# supanaliz-ai/api/formats.py
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from features.summaries import frame_to_records
+from store.arrow import arrow_safe
+
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Accept başlığında görülebilecek eş anlamlı tipler → kanonik format
+_MEDIA_ALIASES = {
+    JSON_MEDIA_TYPE: "json",
+    "application/*": "json",
+    "*/*": "json",
+    ARROW_STREAM_MEDIA_TYPE: "arrow",
+    PARQUET_MEDIA_TYPE: "parquet",
+    "application/x-parquet": "parquet",
+    "application/parquet": "parquet",
+}
+
+
+def _parse_accept(header: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    'Accept' başlığını (media_type, q) listesine ayırır, q'ya göre sıralar.
+    Aynı q değerinde başlıktaki sıra korunur.
+    """
+    if not header:
+        return [("*/*", 1.0)]
+
+    items: List[Tuple[str, float]] = []
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        items.append((media.lower(), q))
+
+    return sorted(items, key=lambda x: x[1], reverse=True)
+
+
+def negotiate_format(request: Request) -> str:
+    """
+    Accept başlığına göre "json" | "arrow" | "parquet" seçer.
+    Başlık yoksa veya */* ise JSON (varsayılan).
+    Desteklenen hiçbir tip istenmemişse 406 döner.
+    """
+    for media, q in _parse_accept(request.headers.get("accept")):
+        if q <= 0:
+            continue
+        fmt = _MEDIA_ALIASES.get(media)
+        if fmt:
+            return fmt
+
+    raise HTTPException(
+        status_code=406,
+        detail=(
+            "Desteklenen formatlar: "
+            f"{JSON_MEDIA_TYPE}, {ARROW_STREAM_MEDIA_TYPE}, {PARQUET_MEDIA_TYPE}"
+        ),
+    )
+
+
+def dataframe_to_arrow(df: pd.DataFrame):
+    """
+    DataFrame → pyarrow.Table.
+    Numerik kolonlar pandas bufferları üzerinden kopyasız aktarılır.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError as exc:  # pragma: no cover - opsiyonel bağımlılık
+        raise HTTPException(
+            status_code=406,
+            detail="Arrow / Parquet çıktısı için 'pyarrow' kurulu olmalı.",
+        ) from exc
+
+    return pa.Table.from_pandas(arrow_safe(df), preserve_index=False)
+
+
+def arrow_stream_bytes(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    table = dataframe_to_arrow(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def parquet_bytes(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = dataframe_to_arrow(df)
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def table_response(request: Request, df: pd.DataFrame) -> Response:
+    """
+    Tablo sonuçları için ortak cevap üreticisi.
+    JSON varsayılan; Accept başlığı ile Arrow IPC stream veya Parquet istenebilir.
+    """
+    fmt = negotiate_format(request)
+    headers = {"Vary": "Accept"}
+
+    if fmt == "arrow":
+        return Response(
+            content=arrow_stream_bytes(df),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers=headers,
+        )
+    if fmt == "parquet":
+        return Response(
+            content=parquet_bytes(df),
+            media_type=PARQUET_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    return JSONResponse(content=frame_to_records(df), headers=headers)
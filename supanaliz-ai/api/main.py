@@ -2,15 +2,56 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from parser import parse_sales_excel, parse_purchase_excel
-from features import SalesFeatureBuilder, PurchaseFeatureBuilder
-from agents import SalesAgent, PurchaseAgent, DecisionAgent
+from parser.sales_parser import SALES_SHEET_NAME
+from parser.purchase_parser import PURCHASE_SHEET_NAME
+from features import (
+    SalesFeatureBuilder,
+    PurchaseFeatureBuilder,
+    build_sales_features,
+    build_purchase_features,
+)
+from features.profit_features import build_profit_features
+from features.scenarios import Scenario, ScenarioEngine
+from features.stockout_sim import StockoutSimulator
+from features.segmented import SEGMENT_KEYS, analyze_segments
+from features.clustering import SEGMENT_TABLES, segment_materials
+from features.abc_xyz import ABC_PERIODS, ABC_THRESHOLDS, XYZ_THRESHOLDS, abc_xyz_matrix, classify_abc_xyz
+from features.price_anomalies import ANOMALY_THRESHOLD, MIN_GROUP_LINES, price_anomaly_report
+from features.supplier_scorecard import (
+    SCORECARD_WINDOW,
+    TREND_MONTHS,
+    recent_supplier_risk,
+    supplier_scorecard,
+)
+from features.summaries import json_safe, frame_to_records
+from agents import SalesAgent, PurchaseAgent, DecisionAgent, get_rules
+from agents.matching_engine import build_matching_table
+from agents.similarity import similar_material_candidates
+from agents.purchase_agent import RISK_WINDOWS
+from api.formats import table_response
+from api.cache import ResultCache, cached_json_response
+from store import (
+    TableStore,
+    SnapshotStore,
+    MappedFeatureStore,
+    run_query,
+    build_result_tables,
+    write_feature_store,
+)
+from monitoring import stage, collect_stages, render_prometheus
+from monitoring.prometheus import PROMETHEUS_CONTENT_TYPE
+from services import EventBus, PipelineWatcher, format_sse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("supanaliz-api")
@@ -29,9 +70,27 @@ class SalesParseRequest(BaseModel):
 
 class PurchaseParseRequest(BaseModel):
     path: str = Field(..., description="Satınalma Excel dosya yolu")
+    fx_path: str = Field(
+        default="data/fx_rates.xlsx", description="Kur (USD/TRY) Excel dosya yolu"
+    )
     sheet_name: Optional[str] = Field(
         default=None, description="Opsiyonel sheet adı"
     )
+    recent_months: Optional[int] = Field(
+        default=None, ge=1, description="supplier_stats'a son N aylık skor kartı metrikleri eklenir"
+    )
+
+
+class FeatureTablesRequest(BaseModel):
+    sales_path: Optional[str] = Field(
+        default=None, description="Satış Excel dosya yolu"
+    )
+    purchase_path: Optional[str] = Field(
+        default=None, description="Satınalma Excel dosya yolu"
+    )
+    fx_path: str = Field(
+        default="data/fx_rates.xlsx", description="Kur (USD/TRY) Excel dosya yolu"
+    )
 
 
 class SalesSummaryModel(BaseModel):
@@ -61,6 +120,7 @@ class SalesAgentOutputModel(BaseModel):
     forecast_comment_3_6m: str
     risk_score: float
     actions: List[str]
+    abc_xyz_counts: Dict[str, int] = {}
 
 
 class PurchaseAgentOutputModel(BaseModel):
@@ -80,6 +140,41 @@ class DecisionRequest(BaseModel):
     purchase_agent_output: PurchaseAgentOutputModel
 
 
+class DecisionGridRequest(BaseModel):
+    sales_summary: SalesSummaryModel
+    purchase_summary: PurchaseSummaryModel
+    purchase_sales_ratios: List[float] = Field(default=[0.7], min_length=1)
+    supplier_risk_cutoffs: List[float] = Field(default=[60.0], min_length=1)
+    supplier_limits: List[int] = Field(default=[5], min_length=1)
+    direction: Optional[str] = Field(
+        default=None, description="up / down / flat; boşsa satış özetindeki trend"
+    )
+
+
+class QueryFilterModel(BaseModel):
+    column: str
+    op: str = Field(
+        default="==",
+        description="==, !=, <, <=, >, >=, between, in, not_in, isna, notna",
+    )
+    value: Optional[Any] = None
+
+
+class QuerySortModel(BaseModel):
+    column: str
+    ascending: bool = True
+
+
+class QueryRequest(BaseModel):
+    table: str = Field(..., description="Resident tablo adı (örn: product_profit)")
+    filters: List[QueryFilterModel] = []
+    sort: List[QuerySortModel] = []
+    limit: Optional[int] = Field(default=None, ge=0)
+    columns: Optional[List[str]] = None
+    group_by: Optional[List[str]] = None
+    aggregations: Dict[str, Union[str, List[str]]] = {}
+
+
 class DecisionOutputModel(BaseModel):
     matches: List[Dict[str, Any]]
     sales_up_purchase_risk: List[Dict[str, Any]]
@@ -90,56 +185,801 @@ class DecisionOutputModel(BaseModel):
     action_plan: List[str]
 
 
+class ScenarioModel(BaseModel):
+    name: str
+    fx_shock: float = Field(default=0.0, gt=-1.0, description="TRY değer değişimi (-0.2 = %20 kayıp)")
+    fx_from: Optional[str] = Field(default=None, description="YYYY-MM; şokun başladığı sipariş ayı")
+    pass_through: float = Field(default=0.0, description="Kur hareketinin TL fiyatlara yansıma oranı")
+    cost_shock: float = 0.0
+    sales_shock: float = 0.0
+    groups: Optional[List[str]] = None
+
+
+class ScenarioRequest(FeatureTablesRequest):
+    scenarios: List[ScenarioModel] = Field(..., min_length=1)
+    quantiles: List[float] = [0.05, 0.5, 0.95]
+
+
+class StockoutSimulationRequest(FeatureTablesRequest):
+    weeks: int = Field(default=12, ge=1, le=104, description="Simülasyon ufku (hafta)")
+    paths: int = Field(default=1000, ge=1, le=100_000, description="Malzeme başına Monte Carlo path sayısı")
+    seed: int = 42
+    min_lead_obs: int = Field(default=3, ge=1, description="Malzemenin kendi lead time dağılımı için minimum gözlem")
+    top: Optional[int] = Field(default=None, ge=1, description="Sadece en riskli N malzeme")
+
+
+class SegmentedDecisionRequest(FeatureTablesRequest):
+    by: str = Field(default="MalKodGrup", description=f"Segment anahtarı: {', '.join(SEGMENT_KEYS)}")
+    segments: Optional[List[str]] = Field(default=None, description="Sadece bu segmentler")
+    workers: Optional[int] = Field(default=None, ge=1, description="Process sayısı (varsayılan: SUPANALIZ_FEATURE_WORKERS, yoksa serial)")
+
+
+class SimilarMaterialRequest(FeatureTablesRequest):
+    k: int = Field(default=5, ge=1, le=50, description="Satış malzemesi başına aday sayısı")
+    min_score: float = Field(default=0.0, ge=0.0, le=1.0, description="Minimum benzerlik skoru")
+
+
+class MaterialClusterRequest(FeatureTablesRequest):
+    n_clusters: int = Field(default=8, ge=1, le=100, description="Küme sayısı (sadece fit'te)")
+    refit: bool = Field(default=False, description="Kayıtlı model olsa da yeniden fit et")
+    seed: int = 42
+
+
+class AbcXyzRequest(FeatureTablesRequest):
+    period: str = Field(default="all", description=f"Dönem: {', '.join(ABC_PERIODS)}")
+    abc_thresholds: List[float] = Field(default=list(ABC_THRESHOLDS), description="Kümülatif değer payı sınırları (A, B)")
+    xyz_thresholds: List[float] = Field(default=list(XYZ_THRESHOLDS), description="Aylık talep CV sınırları (X, Y)")
+
+
+class PriceAnomalyRequest(FeatureTablesRequest):
+    threshold: float = Field(default=ANOMALY_THRESHOLD, gt=0, description="Robust z eşiği")
+    window: Optional[int] = Field(default=None, ge=3, description="Sipariş tarihine göre rolling pencere (satır); boş: tüm geçmiş")
+    min_lines: int = Field(default=MIN_GROUP_LINES, ge=1, description="Malzeme × birim grubunda minimum satır")
+
+
+class SupplierScorecardRequest(FeatureTablesRequest):
+    window: int = Field(default=SCORECARD_WINDOW, ge=1, description="Kayan pencere (ay)")
+    trend_months: int = Field(default=TREND_MONTHS, ge=3, description="Risk trendi için bakılan ay sayısı")
+    exclude_price_anomalies: bool = Field(default=False, description="Fiyat anomalisi satırlarını çıkar")
+    recent_only: bool = Field(default=False, description="Sadece son pencere özeti (küp dönmez)")
+
+
+class SnapshotRequest(BaseModel):
+    label: Optional[str] = Field(default=None, description="Snapshot etiketi (örn: 2024-W18)")
+    decision_output: Optional[DecisionOutputModel] = Field(
+        default=None, description="Opsiyonel DecisionAgent çıktısı; listeleri de saklanır"
+    )
+
+
+# Resident sonuç tabloları ve değişiklik olayları (watcher + SSE)
+table_store = TableStore()
+event_bus = EventBus()
+# Çalıştırma sonuçlarının versiyonlu snapshot'ları (haftalık / dönemsel diff için)
+snapshot_store = SnapshotStore(os.environ.get("SUPANALIZ_SNAPSHOT_DIR", "data/snapshots"))
+segment_state_dir = os.environ.get("SUPANALIZ_SEGMENT_DIR", "data/segments")
+# Çok worker'lı uvicorn: tablolar memory-mapped Arrow dosyalarından paylaşılır
+_feature_store_dir = os.environ.get("SUPANALIZ_FEATURE_STORE_DIR")
+feature_store = MappedFeatureStore(_feature_store_dir) if _feature_store_dir else None
+
+
+def _publish_feature_store() -> None:
+    tables = feature_store.result_tables()
+    version = table_store.publish(tables)
+    event_bus.publish(
+        "tables_updated",
+        {"version": version, "tables": sorted(tables), "feature_store": feature_store.version},
+    )
+
+
+async def _poll_feature_store(interval: float) -> None:
+    # Başka bir worker / CLI yeni versiyon yazdıysa map edip publish eder
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if feature_store.available() and feature_store.refresh():
+                _publish_feature_store()
+                logger.info("Feature store versiyonu yüklendi: %s", feature_store.version)
+        except Exception:  # pragma: no cover - poll döngüsü düşmemeli
+            logger.exception("Feature store yenilenemedi.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    SUPANALIZ_WATCH=1 ise data/ exportlarını izleyen watcher başlatılır;
+    değişen dosyaya bağlı stage'ler yeniden hesaplanıp store'a yazılır
+    (SUPANALIZ_INCREMENTAL_DIR tanımlıysa sadece değişen malzeme / tedarikçiler).
+    SUPANALIZ_FEATURE_STORE_DIR tanımlıysa tablolar memory-mapped feature store'dan
+    açılır (parse / feature hesabı yok) ve yeni versiyonlar periyodik olarak alınır.
+    """
+    poller = None
+    if feature_store is not None:
+        if feature_store.available():
+            feature_store.refresh()
+            _publish_feature_store()
+            logger.info("Feature store map edildi: %s", feature_store.version)
+        poller = asyncio.create_task(
+            _poll_feature_store(float(os.environ.get("SUPANALIZ_FEATURE_STORE_POLL", "5")))
+        )
+
+    watcher = None
+    if os.environ.get("SUPANALIZ_WATCH", "0") == "1":
+        watcher = PipelineWatcher(
+            sales_path=os.environ.get(
+                "SUPANALIZ_SALES_PATH", "data/AllTimeSatisPivotLast.xls"
+            ),
+            purchase_path=os.environ.get(
+                "SUPANALIZ_PURCHASE_PATH", "data/AllTimeSatinAlmaPivotLast.xls"
+            ),
+            fx_path=os.environ.get("SUPANALIZ_FX_PATH", "data/fx_rates.xlsx"),
+            store=table_store,
+            events=event_bus,
+            interval_seconds=float(os.environ.get("SUPANALIZ_WATCH_INTERVAL", "10")),
+        )
+        watcher.start()
+        logger.info("Data watcher başlatıldı.")
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.stop(timeout=5.0)
+        if poller is not None:
+            poller.cancel()
+
+
 app = FastAPI(
     title="SUPANALİZ AI – Offline Decision Lab API",
     version="0.1.0",
     description="Satış + Satınalma + DecisionAgent için offline FastAPI backend.",
+    lifespan=lifespan,
 )
 
 
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@app.middleware("http")
+async def stage_timing_middleware(request: Request, call_next):
+    """
+    Her isteği bir stage olarak ölçer; istek içinde çalışan parser /
+    feature / agent stage'lerini Server-Timing başlığında döner.
+    """
+    with collect_stages() as trace:
+        with stage("http") as rec:
+            response = await call_next(request)
+            # Eşleşmeyen istekler (404, tarayıcılar) tek isimde toplanır; ham URL
+            # stage adı / metrik etiketi olursa kardinalite sınırsız büyür
+            route = request.scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            rec.name = f"http {request.method} {path}"
+
+    response.headers["Server-Timing"] = ", ".join(
+        f"{r.name.replace(' ', '_')};dur={r.wall_s * 1000:.2f}"
+        for r in trace.records
+    )
+    response.headers["X-Process-Time-Ms"] = f"{rec.wall_s * 1000:.2f}"
+    return response
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(content=render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # ==============
 # Endpointler
 # ==============
 
 @app.post("/sales/parse", response_model=SalesSummaryModel)
 def sales_parse(req: SalesParseRequest):
-    df, warnings = parse_sales_excel(req.path, sheet_name=req.sheet_name)
+    parsed = parse_sales_excel(
+        req.path, sheet_name=req.sheet_name or SALES_SHEET_NAME
+    )
     builder = SalesFeatureBuilder()
-    summary = builder.build_features(df)
-    summary["warnings"] = warnings
+    summary = builder.build_features(parsed["data"])
+    summary["meta"] = json_safe(parsed["meta"])
     return summary
 
 
 @app.post("/purchase/parse", response_model=PurchaseSummaryModel)
 def purchase_parse(req: PurchaseParseRequest):
-    df, warnings = parse_purchase_excel(req.path, sheet_name=req.sheet_name)
-    builder = PurchaseFeatureBuilder()
-    summary = builder.build_features(df)
-    summary["warnings"] = warnings
+    parsed = parse_purchase_excel(
+        req.path, req.fx_path, sheet_name=req.sheet_name or PURCHASE_SHEET_NAME
+    )
+    builder = PurchaseFeatureBuilder(recent_months=req.recent_months)
+    summary = builder.build_features(parsed["data"])
+    summary["meta"] = json_safe(parsed["meta"])
     return summary
 
 
+# ==============
+# Tablo endpointleri (JSON varsayılan, Arrow IPC / Parquet Accept ile)
+# ==============
+
+SALES_TABLES = (
+    "monthly_sales", "trend", "seasonality", "top_performers", "risky_decliners", "abc_xyz",
+)
+PURCHASE_TABLES = ("material_features", "supplier_features", "price_trend")
+PROFIT_TABLES = (
+    "product_profit", "stokout_candidates", "top_profitable", "worst_profitable",
+)
+
+
+def _check_table(table: str, allowed: tuple) -> None:
+    if table not in allowed:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Bilinmeyen tablo: {table}. Geçerli tablolar: {list(allowed)}",
+        )
+
+
+def _require(value: Optional[str], name: str) -> str:
+    if not value:
+        raise HTTPException(status_code=422, detail=f"'{name}' zorunlu.")
+    return value
+
+
+@app.post("/features/sales/{table}")
+def sales_feature_table(table: str, req: FeatureTablesRequest, request: Request):
+    _check_table(table, SALES_TABLES)
+    sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+    features = build_sales_features(sales_df)
+    return table_response(request, features[table])
+
+
+@app.post("/features/purchase/{table}")
+def purchase_feature_table(table: str, req: FeatureTablesRequest, request: Request):
+    _check_table(table, PURCHASE_TABLES)
+    purchase_df = parse_purchase_excel(
+        _require(req.purchase_path, "purchase_path"), req.fx_path
+    )["data"]
+    features = build_purchase_features(purchase_df)
+    return table_response(request, features[table])
+
+
+@app.post("/features/profit/{table}")
+def profit_feature_table(table: str, req: FeatureTablesRequest, request: Request):
+    _check_table(table, PROFIT_TABLES)
+    sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+    purchase_df = parse_purchase_excel(
+        _require(req.purchase_path, "purchase_path"), req.fx_path
+    )["data"]
+    features = build_profit_features(sales_df, purchase_df)
+    return table_response(request, features[table])
+
+
+# Agent'lar girdilerinin saf fonksiyonu; aynı istek → aynı cevap.
+# Dashboard'ların sık polling'i cache + ETag/304 ile karşılanır.
+agent_cache = ResultCache(maxsize=256, ttl_seconds=300.0)
+
+
 @app.post("/agent/sales", response_model=SalesAgentOutputModel)
-def sales_agent(summary: SalesSummaryModel):
-    agent = SalesAgent()
-    output = agent.analyze(summary.dict())
-    return output
+def sales_agent(summary: SalesSummaryModel, request: Request):
+    payload = summary.dict()
+    return cached_json_response(
+        agent_cache,
+        request,
+        "agent/sales",
+        payload,
+        lambda: SalesAgent().analyze(payload),
+        SalesAgentOutputModel,
+    )
 
 
 @app.post("/agent/purchase", response_model=PurchaseAgentOutputModel)
-def purchase_agent(summary: PurchaseSummaryModel):
-    agent = PurchaseAgent()
-    output = agent.analyze(summary.dict())
-    return output
+def purchase_agent(summary: PurchaseSummaryModel, request: Request, risk_window: str = "all"):
+    """
+    risk_window=recent: tedarikçi riski supplier_stats.recent_risk_score'dan okunur
+    (/purchase/parse recent_months ile üretilen özet).
+    """
+    if risk_window not in RISK_WINDOWS:
+        raise HTTPException(
+            status_code=400, detail=f"Geçersiz risk penceresi: {risk_window} (mevcut: {list(RISK_WINDOWS)})"
+        )
+    payload = summary.dict()
+    return cached_json_response(
+        agent_cache,
+        request,
+        f"agent/purchase?risk_window={risk_window}",
+        payload,
+        lambda: PurchaseAgent(risk_window=risk_window).analyze(payload),
+        PurchaseAgentOutputModel,
+    )
 
 
 @app.post("/agent/decision", response_model=DecisionOutputModel)
-def decision_agent(req: DecisionRequest):
-    agent = DecisionAgent()
-    output = agent.analyze(
-        sales_summary=req.sales_summary.dict(),
-        purchase_summary=req.purchase_summary.dict(),
-        sales_agent_output=req.sales_agent_output.dict(),
-        purchase_agent_output=req.purchase_agent_output.dict(),
-    )
-    return output
+def decision_agent(req: DecisionRequest, request: Request):
+    payload = req.dict()
+    return cached_json_response(
+        agent_cache,
+        request,
+        "agent/decision",
+        payload,
+        lambda: DecisionAgent().analyze(
+            sales_summary=payload["sales_summary"],
+            purchase_summary=payload["purchase_summary"],
+            sales_agent_output=payload["sales_agent_output"],
+            purchase_agent_output=payload["purchase_agent_output"],
+        ),
+        DecisionOutputModel,
+    )
+
+
+@app.post("/agent/decision/grid")
+def decision_grid(req: DecisionGridRequest, request: Request):
+    """
+    DecisionAgent eşiklerinin (satınalma/satış oranı, tedarikçi risk eşiği,
+    tedarikçi limiti) tüm kombinasyonları için kritik ürün / riskli tedarikçi /
+    öncelik listesi sayıları. Eşleştirme bir kez yapılır.
+    """
+    payload = req.dict()
+
+    def compute() -> Dict[str, Any]:
+        grid = DecisionAgent().threshold_grid(
+            payload["sales_summary"],
+            payload["purchase_summary"],
+            purchase_sales_ratios=payload["purchase_sales_ratios"],
+            supplier_risk_cutoffs=payload["supplier_risk_cutoffs"],
+            supplier_limits=payload["supplier_limits"],
+            direction=payload["direction"],
+        )
+        return {"meta": {"settings": len(grid)}, "settings": frame_to_records(grid)}
+
+    try:
+        return cached_json_response(agent_cache, request, "agent/decision/grid", payload, compute)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/agent/rules")
+def agent_rules():
+    """
+    Agent'ların kullandığı aktif kural seti (varsayılanlar + SUPANALIZ_AGENT_RULES).
+    """
+    return get_rules().to_config()
+
+
+# ==============
+# Resident tablolar + sorgu endpointi
+# ==============
+
+@app.post("/store/load")
+def store_load(req: FeatureTablesRequest):
+    sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+    purchase_df = parse_purchase_excel(
+        _require(req.purchase_path, "purchase_path"), req.fx_path
+    )["data"]
+    tables = build_result_tables(sales_df, purchase_df)
+
+    if feature_store is not None:
+        # Diğer worker'lar poll ile aynı dosyaları map eder; bu worker da mmap'li
+        # kopyayı publish eder ki bellek paylaşılsın
+        write_feature_store(
+            {"sales_parsed": sales_df, "purchase_parsed": purchase_df, **tables},
+            _feature_store_dir,
+        )
+        feature_store.refresh()
+        tables = feature_store.result_tables()
+
+    version = table_store.publish(tables)
+    event_bus.publish(
+        "tables_updated", {"version": version, "tables": sorted(tables)}
+    )
+    return table_store.describe()
+
+
+@app.get("/store/tables")
+def store_tables():
+    return table_store.describe()
+
+
+@app.get("/store/feature-store")
+def feature_store_info():
+    if feature_store is None:
+        raise HTTPException(status_code=404, detail="SUPANALIZ_FEATURE_STORE_DIR tanımlı değil.")
+    return feature_store.describe()
+
+
+@app.post("/query")
+def query_table(req: QueryRequest, request: Request):
+    try:
+        table = table_store.get(req.table)
+        result = run_query(table, req.dict())
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return table_response(request, result)
+
+
+# ==============
+# What-if senaryoları (kur / maliyet / fiyat şokları)
+# ==============
+
+@app.post("/scenarios/profit")
+def scenario_profit(req: ScenarioRequest):
+    """
+    Senaryoları product_profit maliyet bazları üzerinde tek seferde hesaplar.
+    Feature store map edilmişse parse edilmiş veri oradan alınır; değilse Excel yolları zorunlu.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        purchase_df = feature_store.table("purchase_parsed")
+        engine = ScenarioEngine.from_profit(feature_store.table("product_profit"), purchase_df)
+    else:
+        sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+        engine = ScenarioEngine.from_frames(sales_df, purchase_df)
+
+    try:
+        result = engine.simulate([Scenario(**sc.dict()) for sc in req.scenarios])
+        distribution = result.distribution(req.quantiles)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {
+        "meta": json_safe(result.meta),
+        "summary": frame_to_records(result.summary()),
+        "materials": frame_to_records(distribution),
+    }
+
+
+# ==============
+# Monte Carlo stokout simülasyonu
+# ==============
+
+@app.post("/simulations/stockout")
+def stockout_simulation(req: StockoutSimulationRequest):
+    """
+    Malzeme başına N haftalık stokout olasılığı ve beklenen eksik miktar.
+    Feature store map edilmişse monthly_sales / purchase_parsed oradan alınır.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        simulator = StockoutSimulator.from_tables(
+            feature_store.table("monthly_sales"),
+            feature_store.table("purchase_parsed"),
+            min_lead_obs=req.min_lead_obs,
+        )
+    else:
+        sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+        simulator = StockoutSimulator.from_frames(sales_df, purchase_df, min_lead_obs=req.min_lead_obs)
+
+    result = simulator.simulate(weeks=req.weeks, paths=req.paths, seed=req.seed)
+    result = result.sort_values(
+        ["stockout_probability", "expected_shortage"], ascending=False, kind="stable"
+    )
+    if req.top is not None:
+        result = result.head(req.top)
+
+    return {
+        "meta": {
+            "materials": len(simulator.materials),
+            "weeks": req.weeks,
+            "paths": req.paths,
+            "seed": req.seed,
+        },
+        "materials": frame_to_records(result),
+    }
+
+
+# ==============
+# ABC / XYZ sınıflandırması
+# ==============
+
+@app.post("/features/abc_xyz")
+def abc_xyz_classes(req: AbcXyzRequest):
+    """
+    Malzeme × dönem ABC (değer payı) / XYZ (talep değişkenliği) sınıfları ve 3×3 özet.
+    Feature store map edilmişse monthly_sales oradan alınır.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        monthly = feature_store.table("monthly_sales")
+    else:
+        sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+        monthly = build_sales_features(sales_df)["monthly_sales"]
+
+    try:
+        classes = classify_abc_xyz(
+            monthly,
+            period=req.period,
+            abc_thresholds=req.abc_thresholds,
+            xyz_thresholds=req.xyz_thresholds,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {
+        "meta": {"period": req.period, "materials": int(classes["Malzeme"].nunique())},
+        "matrix": frame_to_records(abc_xyz_matrix(classes)),
+        "classes": frame_to_records(classes),
+    }
+
+
+# ==============
+# Satınalma fiyat anomalileri
+# ==============
+
+@app.post("/purchase/price_anomalies")
+def purchase_price_anomalies(req: PriceAnomalyRequest):
+    """
+    Birim Maliyet USD'si malzeme × birim medyanından robust z ile sapan satınalma
+    satırları ve tedarikçi bazlı özet. Feature store map edilmişse purchase_parsed oradan alınır.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        purchase_df = feature_store.table("purchase_parsed")
+    else:
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+
+    try:
+        report = price_anomaly_report(
+            purchase_df, threshold=req.threshold, window=req.window, min_lines=req.min_lines
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {
+        "meta": json_safe(report["meta"]),
+        "suppliers": frame_to_records(report["suppliers"]),
+        "lines": frame_to_records(report["lines"]),
+    }
+
+
+# ==============
+# Tedarikçi aylık skor kartı
+# ==============
+
+@app.post("/purchase/supplier_scorecard")
+def purchase_supplier_scorecard(req: SupplierScorecardRequest):
+    """
+    Tedarikçi × ay skor kartı (lead time, uzun lead / teslimsiz oranı, harcama, fiyat
+    sapması; kayan pencere risk skoru ve trendi) + son pencere özeti.
+    Feature store map edilmişse purchase_parsed oradan alınır.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        purchase_df = feature_store.table("purchase_parsed")
+    else:
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+
+    try:
+        cube = supplier_scorecard(
+            purchase_df,
+            window=req.window,
+            trend_months=req.trend_months,
+            exclude_price_anomalies=req.exclude_price_anomalies,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    recent = recent_supplier_risk(cube).sort_values(
+        "recent_risk_score", ascending=False, kind="stable", ignore_index=True
+    )
+    result = {
+        "meta": {
+            "window": req.window,
+            "trend_months": req.trend_months,
+            "suppliers": len(recent),
+            "latest_month": str(cube["YılAy"].max()) if len(cube) else None,
+            "worsening": int((recent["risk_trend"] == "worsening").sum()),
+        },
+        "recent": frame_to_records(recent),
+    }
+    if not req.recent_only:
+        result["scorecard"] = frame_to_records(cube)
+    return result
+
+
+# ==============
+# Eşleşmeyen satış malzemeleri için benzer satınalma adayları
+# ==============
+
+@app.post("/matching/similar")
+def similar_materials(req: SimilarMaterialRequest):
+    """
+    match_status == "sales_only" malzemeler için en yakın k satınalma malzemesi.
+    Feature store map edilmişse eşleştirme tablosu oradan alınır.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        matching_df = feature_store.table("matching")
+    else:
+        sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+        matching_df = build_matching_table(sales_df, purchase_df)
+
+    try:
+        candidates = similar_material_candidates(matching_df, k=req.k)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    candidates = candidates[candidates["score"] >= req.min_score]
+
+    return {
+        "meta": {
+            "unmatched_materials": int(candidates["Malzeme"].nunique()),
+            "k": req.k,
+        },
+        "candidates": frame_to_records(candidates),
+    }
+
+
+# ==============
+# Grup bazlı karar analizi
+# ==============
+
+@app.post("/segments/decision")
+def segmented_decision(req: SegmentedDecisionRequest):
+    """
+    Sales / Purchase / Decision agent zincirini her MalKodGrup / MalzemeGrup için ayrı çalıştırır.
+    Feature store map edilmişse parse edilmiş veri oradan alınır; değilse Excel yolları zorunlu.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        sales_df = feature_store.table("sales_parsed")
+        purchase_df = feature_store.table("purchase_parsed")
+    else:
+        sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+
+    try:
+        report = analyze_segments(
+            sales_df, purchase_df, by=req.by, segments=req.segments, workers=req.workers
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {
+        "meta": report["meta"],
+        "summary": frame_to_records(report["summary"]),
+        "segments": json_safe(report["segments"]),
+    }
+
+
+# ==============
+# Davranış bazlı malzeme segmentasyonu (MiniBatchKMeans)
+# ==============
+
+@app.post("/clusters/materials")
+def material_clusters(req: MaterialClusterRequest):
+    """
+    Kayıtlı segmentasyon modeli varsa sadece yeni malzemeleri atar, yoksa (ya da refit)
+    modeli fit edip SUPANALIZ_SEGMENT_DIR'e kaydeder.
+    """
+    if feature_store is not None and feature_store.version is not None:
+        tables = {name: feature_store.table(name) for name in SEGMENT_TABLES}
+    else:
+        sales_df = parse_sales_excel(_require(req.sales_path, "sales_path"))["data"]
+        purchase_df = parse_purchase_excel(
+            _require(req.purchase_path, "purchase_path"), req.fx_path
+        )["data"]
+        tables = build_result_tables(sales_df, purchase_df)
+
+    try:
+        result = segment_materials(
+            tables,
+            n_clusters=req.n_clusters,
+            state_dir=segment_state_dir,
+            refit=req.refit,
+            random_state=req.seed,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {
+        "meta": result["meta"],
+        "centroids": frame_to_records(result["centroids"]),
+        "assignments": frame_to_records(result["assignments"]),
+    }
+
+
+# ==============
+# Snapshot'lar + dönemler arası diff
+# ==============
+
+@app.post("/store/snapshots")
+def create_snapshot(req: SnapshotRequest):
+    names = table_store.names()
+    if not names:
+        raise HTTPException(status_code=409, detail="Store boş; önce /store/load çalıştırılmalı.")
+
+    tables: Dict[str, Any] = {name: table_store.get(name).df for name in names}
+    if req.decision_output is not None:
+        decision = req.decision_output.dict()
+        tables["decision_critical_products"] = decision["critical_products"]
+        tables["decision_priority_list"] = decision["priority_list"]
+
+    snapshot_id = snapshot_store.save(
+        tables, label=req.label, meta={"store_version": table_store.version}
+    )
+    return snapshot_store.manifest(snapshot_id)
+
+
+@app.get("/store/snapshots")
+def list_snapshots():
+    return snapshot_store.list()
+
+
+def _diff_payload(result: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    return {
+        key: frame_to_records(value.head(limit)) if hasattr(value, "head") else json_safe(value)
+        for key, value in result.items()
+    }
+
+
+@app.get("/store/snapshots/diff")
+def snapshot_diff(
+    table: str,
+    old: str = "previous",
+    new: str = "latest",
+    columns: Optional[str] = None,
+    limit: int = 1000,
+):
+    """
+    İki snapshot arasında tablo diff'i. columns: virgülle ayrılmış kolon listesi
+    (verilmezse ortak tüm kolonlar). Satır listeleri `limit` ile kırpılır, summary tamdır.
+    """
+    cols = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        result = snapshot_store.diff(old, new, table, columns=cols)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _diff_payload(result, limit)
+
+
+@app.get("/store/snapshots/highlights")
+def snapshot_highlights(
+    old: str = "previous",
+    new: str = "latest",
+    risk_jump: float = 10.0,
+    limit: int = 100,
+):
+    try:
+        result = snapshot_store.highlights(old, new, risk_jump=risk_jump)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    return _diff_payload(result, limit)
+
+
+@app.get("/events")
+async def events(request: Request):
+    """
+    Server-Sent Events: resident tablolar değiştiğinde "tables_updated"
+    olayı gelir; dashboard'lar polling yerine bu olayla yenilenir.
+    """
+    queue = event_bus.subscribe()
+
+    async def stream():
+        try:
+            # Bağlanan istemci mevcut versiyonu hemen öğrenir
+            yield format_sse(
+                {
+                    "id": 0,
+                    "event": "hello",
+                    "data": {"version": table_store.version, "tables": table_store.names()},
+                }
+            )
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
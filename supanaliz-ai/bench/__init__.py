@@ -0,0 +1,21 @@
+# supanaliz-ai/bench/__init__.py
+
+from .synthetic import (
+    SyntheticConfig,
+    generate_fx_rates,
+    iter_sales_chunks,
+    iter_purchase_chunks,
+    generate_dataset,
+    parsed_dataset,
+    write_dataset,
+)
+
+__all__ = [
+    "SyntheticConfig",
+    "generate_fx_rates",
+    "iter_sales_chunks",
+    "iter_purchase_chunks",
+    "generate_dataset",
+    "parsed_dataset",
+    "write_dataset",
+]
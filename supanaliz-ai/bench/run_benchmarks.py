@@ -0,0 +1,320 @@
+# supanaliz-ai/bench/run_benchmarks.py
+#
+# Kullanım (supanaliz-ai/ dizininden):
+#   python -m bench.run_benchmarks run --rows 1000000 --materials 20000 --memory
+#   python -m bench.run_benchmarks compare bench/results/A.json bench/results/B.json
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compute import get_backend
+from monitoring import stage, collect_stages
+from parser.excel_loader import load_excel
+from parser.fx_parser import load_fx_rates
+from parser.sales_parser import clean_sales_frame, SALES_SHEET_NAME
+from parser.purchase_parser import clean_purchase_frame, PURCHASE_SHEET_NAME
+from features import sales_features as sf
+from features import purchase_features as pf
+from features.profit_features import build_profit_features
+from features.summaries import SalesFeatureBuilder, PurchaseFeatureBuilder
+from features.parallel import (
+    build_sales_features_parallel,
+    build_purchase_features_parallel,
+    build_profit_features_parallel,
+)
+from agents.matching_engine import build_matching_table
+from agents import SalesAgent, PurchaseAgent, DecisionAgent
+
+from .synthetic import SyntheticConfig, EXCEL_MAX_ROWS, generate_dataset, write_dataset
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# ---------------------------------------------------
+# Benchmark adımları: (isim, fonksiyon(ctx) → sonuç, ctx'e yazılacak anahtar)
+# ---------------------------------------------------
+def _excel_cases() -> List[Tuple[str, Callable[[Dict[str, Any]], Any], str]]:
+    return [
+        ("load_excel.sales", lambda c: load_excel(c["paths"]["sales"], SALES_SHEET_NAME), ""),
+        ("load_excel.purchase", lambda c: load_excel(c["paths"]["purchase"], PURCHASE_SHEET_NAME), ""),
+    ]
+
+
+def _pipeline_cases() -> List[Tuple[str, Callable[[Dict[str, Any]], Any], str]]:
+    return [
+        ("load_fx_rates", lambda c: load_fx_rates(c["paths"]["fx"]), "fx_daily"),
+        ("clean_sales_frame", lambda c: clean_sales_frame(c["raw"]["sales"]), "sales_df"),
+        (
+            "clean_purchase_frame",
+            lambda c: clean_purchase_frame(c["raw"]["purchase"], c["fx_daily"]),
+            "purchase_df",
+        ),
+        ("compute_monthly_sales", lambda c: sf.compute_monthly_sales(c["sales_df"]), ""),
+        ("compute_sales_trend", lambda c: sf.compute_sales_trend(c["sales_df"]), ""),
+        ("compute_seasonality", lambda c: sf.compute_seasonality(c["sales_df"]), ""),
+        ("compute_top_performers", lambda c: sf.compute_top_performers(c["sales_df"]), ""),
+        ("compute_risky_decliners", lambda c: sf.compute_risky_decliners(c["sales_df"]), ""),
+        ("compute_material_features", lambda c: pf.compute_material_features(c["purchase_df"]), ""),
+        ("compute_supplier_features", lambda c: pf.compute_supplier_features(c["purchase_df"]), ""),
+        ("compute_price_trend", lambda c: pf.compute_price_trend(c["purchase_df"]), ""),
+        ("build_matching_table", lambda c: build_matching_table(c["sales_df"], c["purchase_df"]), ""),
+        ("build_profit_features", lambda c: build_profit_features(c["sales_df"], c["purchase_df"]), ""),
+        ("build_sales_features", lambda c: sf.build_sales_features(c["sales_df"]), ""),
+        ("build_purchase_features", lambda c: pf.build_purchase_features(c["purchase_df"]), ""),
+        ("parallel.sales", lambda c: build_sales_features_parallel(c["sales_df"]), ""),
+        ("parallel.purchase", lambda c: build_purchase_features_parallel(c["purchase_df"]), ""),
+        (
+            "parallel.profit",
+            lambda c: build_profit_features_parallel(c["sales_df"], c["purchase_df"]),
+            "",
+        ),
+        ("sales_summary", lambda c: SalesFeatureBuilder().build_features(c["sales_df"]), "sales_summary"),
+        (
+            "purchase_summary",
+            lambda c: PurchaseFeatureBuilder().build_features(c["purchase_df"]),
+            "purchase_summary",
+        ),
+        ("SalesAgent.analyze", lambda c: SalesAgent().analyze(c["sales_summary"]), "sales_out"),
+        ("PurchaseAgent.analyze", lambda c: PurchaseAgent().analyze(c["purchase_summary"]), "purchase_out"),
+        (
+            "DecisionAgent.analyze",
+            lambda c: DecisionAgent().analyze(
+                c["sales_summary"], c["purchase_summary"], c["sales_out"], c["purchase_out"]
+            ),
+            "",
+        ),
+        # Kolonel agent girdileri (dict dönüşümü olmadan)
+        ("sales_frames", lambda c: SalesFeatureBuilder().build_frames(c["sales_df"]), "sales_frames"),
+        (
+            "purchase_frames",
+            lambda c: PurchaseFeatureBuilder().build_frames(c["purchase_df"]),
+            "purchase_frames",
+        ),
+        ("SalesAgent.analyze[frames]", lambda c: SalesAgent().analyze(c["sales_frames"]), ""),
+        ("PurchaseAgent.analyze[frames]", lambda c: PurchaseAgent().analyze(c["purchase_frames"]), ""),
+        (
+            "DecisionAgent.analyze[frames]",
+            lambda c: DecisionAgent().analyze(
+                c["sales_frames"], c["purchase_frames"], c["sales_out"], c["purchase_out"]
+            ),
+            "",
+        ),
+    ]
+
+
+def _row_count(obj: Any) -> Any:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, dict) and isinstance(obj.get("product_profit"), pd.DataFrame):
+        return len(obj["product_profit"])
+    return None
+
+
+def _git_info() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.check_output(
+                ["git", *args], cwd=Path(__file__).resolve().parent, stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def run_benchmarks(
+    cfg: SyntheticConfig,
+    repeat: int = 3,
+    memory: bool = False,
+    excel: bool = False,
+    only: List[str] = None,
+) -> Dict[str, Any]:
+    """
+    Her adımı `repeat` kez çalıştırır; wall/cpu süreleri için min ve median,
+    peak bellek için max (memory=True ise tracemalloc ile) raporlanır.
+    """
+    tmp = tempfile.TemporaryDirectory(prefix="supanaliz-bench-")
+    ctx: Dict[str, Any] = {}
+
+    t0 = time.perf_counter()
+    ctx["raw"] = generate_dataset(cfg)
+    generate_s = time.perf_counter() - t0
+
+    fx_path = Path(tmp.name) / "fx_rates.xlsx"
+    ctx["raw"]["fx"].to_excel(fx_path, index=False)
+    ctx["paths"] = {"fx": str(fx_path)}
+
+    cases = list(_pipeline_cases())
+    if excel:
+        if max(cfg.sales_rows, cfg.purchase_rows) > EXCEL_MAX_ROWS:
+            print("Excel limiti aşıldı; load_excel adımları atlanıyor.", file=sys.stderr)
+        else:
+            ctx["paths"] = write_dataset(cfg, tmp.name, fmt="xlsx")
+            cases = _excel_cases() + cases
+
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    results: Dict[str, Any] = {}
+    try:
+        for name, fn, key in cases:
+            selected = not only or any(o in name for o in only)
+            runs = []
+            out = None
+            for _ in range(repeat if selected else 1):
+                with collect_stages() as trace:
+                    with stage(f"bench.{name}") as rec:
+                        out = fn(ctx)
+                        rec.rows_out = _row_count(out)
+                runs.append(trace.records[-1])
+            if key:
+                ctx[key] = out
+            if not selected:
+                continue
+
+            walls = [r.wall_s for r in runs]
+            cpus = [r.cpu_s for r in runs]
+            peaks = [r.peak_mem_bytes for r in runs if r.peak_mem_bytes is not None]
+            results[name] = {
+                "wall_s_min": min(walls),
+                "wall_s_median": statistics.median(walls),
+                "cpu_s_median": statistics.median(cpus),
+                "peak_mem_bytes": max(peaks) if peaks else None,
+                "rows_out": runs[-1].rows_out,
+                "repeat": len(runs),
+            }
+            print(
+                f"{name:<28} {results[name]['wall_s_median']:>9.4f}s"
+                + (f"  peak {results[name]['peak_mem_bytes'] / 2**20:>9.1f} MiB" if peaks else ""),
+                flush=True,
+            )
+    finally:
+        if memory:
+            tracemalloc.stop()
+        tmp.cleanup()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_info(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "generate_s": generate_s,
+            "memory_traced": memory,
+            "compute_backend": get_backend().name,
+        },
+        "config": cfg.as_dict(),
+        "results": results,
+    }
+
+
+def save_results(report: Dict[str, Any], out_dir: Path = RESULTS_DIR) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sha = (report["meta"]["git"].get("commit") or "nogit")[:10]
+    stamp = report["meta"]["timestamp"].replace(":", "").replace("-", "")
+    rows = report["config"]["sales_rows"]
+    path = out_dir / f"{stamp}_{sha}_{rows}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def compare_reports(old_path: str, new_path: str) -> str:
+    old = json.loads(Path(old_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+
+    lines = [
+        f"old: {old['meta']['git'].get('commit', '')[:10]} {old['meta']['git'].get('subject', '')}",
+        f"new: {new['meta']['git'].get('commit', '')[:10]} {new['meta']['git'].get('subject', '')}",
+    ]
+    if old["config"] != new["config"]:
+        lines.append("UYARI: config farklı, karşılaştırma yanıltıcı olabilir.")
+    lines.append(f"{'stage':<28} {'old (s)':>10} {'new (s)':>10} {'speedup':>8}")
+
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        o = old["results"].get(name, {}).get("wall_s_median")
+        n = new["results"].get(name, {}).get("wall_s_median")
+        speed = f"{o / n:>7.2f}x" if o and n else "       -"
+        lines.append(
+            f"{name:<28} {o if o is not None else float('nan'):>10.4f} "
+            f"{n if n is not None else float('nan'):>10.4f} {speed}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description="SUPANALİZ stage benchmarkları")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="Sentetik veriyle benchmark çalıştır")
+    run.add_argument("--rows", type=int, default=100_000, help="Satış satırı")
+    run.add_argument("--purchase-rows", type=int, default=None, help="Varsayılan rows / 2")
+    run.add_argument("--materials", type=int, default=5_000)
+    run.add_argument("--groups", type=int, default=50)
+    run.add_argument("--suppliers", type=int, default=200)
+    run.add_argument("--units", type=int, default=4)
+    run.add_argument("--start", default="2024-01-01")
+    run.add_argument("--end", default="2025-11-17")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--memory", action="store_true", help="tracemalloc ile peak bellek")
+    run.add_argument("--excel", action="store_true", help="load_excel adımlarını da ölç")
+    run.add_argument("--only", nargs="*", help="Sadece ismi bunları içeren adımlar")
+    run.add_argument("--backend", help="Compute backend (pandas | duckdb)")
+    run.add_argument("--out-dir", default=str(RESULTS_DIR))
+
+    cmp_ = sub.add_parser("compare", help="İki sonuç dosyasını karşılaştır")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "compare":
+        print(compare_reports(args.old, args.new))
+        return
+
+    if args.backend:
+        os.environ["SUPANALIZ_COMPUTE_BACKEND"] = args.backend
+
+    cfg = SyntheticConfig(
+        sales_rows=args.rows,
+        purchase_rows=args.purchase_rows or max(1, args.rows // 2),
+        materials=args.materials,
+        groups=args.groups,
+        suppliers=args.suppliers,
+        units=args.units,
+        start_date=args.start,
+        end_date=args.end,
+        seed=args.seed,
+    )
+    report = run_benchmarks(
+        cfg, repeat=args.repeat, memory=args.memory, excel=args.excel, only=args.only
+    )
+    path = save_results(report, Path(args.out_dir))
+    print(f"\nSonuçlar: {path}")
+
+
+if __name__ == "__main__":
+    main()
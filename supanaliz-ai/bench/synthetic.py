@@ -0,0 +1,314 @@
+# supanaliz-ai/bench/synthetic.py
+
+from __future__ import annotations
+
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Excel sheet başına maksimum satır (başlık hariç)
+EXCEL_MAX_ROWS = 1_048_575
+
+UNIT_CODES = ("AD", "KG", "MT", "LT", "PK", "M2", "TK", "KT")
+
+# Teslim edilmemiş satırlar ERP exportunda 1975 tarihiyle gelir
+NO_DELIVERY_DATE = pd.Timestamp("1975-01-01")
+
+
+@dataclass
+class SyntheticConfig:
+    """
+    Sentetik ERP verisi parametreleri. Aynı config + seed → birebir aynı veri.
+    """
+    sales_rows: int = 100_000
+    purchase_rows: int = 50_000
+    materials: int = 5_000
+    groups: int = 50
+    suppliers: int = 200
+    units: int = 4
+    start_date: str = "2024-01-01"
+    end_date: str = "2025-11-17"
+    purchase_coverage: float = 0.8  # satınalması da olan satış malzemesi oranı
+    purchase_only_ratio: float = 0.05  # sadece satınalmada görülen malzeme oranı
+    unit_mismatch_ratio: float = 0.05  # satış/satınalma birimi farklı malzeme oranı
+    no_delivery_ratio: float = 0.08
+    dates_as_text: bool = True  # ERP exportu gibi "gg.aa.yyyy" string tarih
+    seed: int = 42
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _Catalogue:
+    """
+    Malzeme / grup / tedarikçi / birim / fiyat master verisi.
+    Satır üretiminden bağımsız, tek seferde ve deterministik oluşturulur.
+    """
+
+    def __init__(self, cfg: SyntheticConfig):
+        rng = np.random.default_rng([cfg.seed, 0])
+
+        n_purchase_only = int(cfg.materials * cfg.purchase_only_ratio)
+        n_total = cfg.materials + n_purchase_only
+
+        self.material_codes = np.array(
+            [f"MLZ{i:07d}" for i in range(n_total)], dtype=object
+        )
+        self.group_codes = np.array(
+            [f"{100 + i:03d}{chr(65 + i % 26)}" for i in range(cfg.groups)],
+            dtype=object,
+        )
+        # Satınalma tarafında grup kodu bir karakter uzun (MalzemeGrup[:-1] == MalKodGrup)
+        self.purchase_group_codes = np.array(
+            [g + "0" for g in self.group_codes], dtype=object
+        )
+        self.material_group = rng.integers(0, cfg.groups, n_total)
+
+        units = np.array(UNIT_CODES[: max(1, min(cfg.units, len(UNIT_CODES)))], dtype=object)
+        unit_idx = rng.integers(0, len(units), n_total)
+        mismatch = rng.random(n_total) < cfg.unit_mismatch_ratio
+        purchase_unit_idx = unit_idx.copy()
+        purchase_unit_idx[mismatch] = (unit_idx[mismatch] + 1) % len(units)
+        self.sales_unit = units[unit_idx]
+        self.purchase_unit = units[purchase_unit_idx]
+
+        # Maliyet (USD) lognormal, satış fiyatı maliyet * (1 + marj)
+        self.unit_cost_usd = rng.lognormal(mean=2.0, sigma=1.2, size=n_total)
+        self.margin = rng.normal(0.25, 0.20, n_total)
+        self.unit_price_usd = self.unit_cost_usd * (1.0 + self.margin)
+
+        # Talep ağırlığı (Zipf benzeri) → az sayıda çok satan malzeme
+        weights = 1.0 / np.arange(1, cfg.materials + 1) ** 0.9
+        self.sales_weights = rng.permutation(weights / weights.sum())
+
+        purchase_mask = rng.random(cfg.materials) < cfg.purchase_coverage
+        self.purchase_materials = np.concatenate(
+            [np.flatnonzero(purchase_mask), np.arange(cfg.materials, n_total)]
+        )
+
+        self.supplier_ids = np.arange(100000, 100000 + cfg.suppliers)
+        self.supplier_names = np.array(
+            [f"Tedarikçi {i:04d} A.Ş." for i in range(cfg.suppliers)], dtype=object
+        )
+        # Her malzemenin 1-3 tedarikçisi; tedarikçi başına ortalama lead time
+        self.material_supplier = rng.integers(0, cfg.suppliers, (n_total, 3))
+        self.supplier_lead_mean = rng.gamma(shape=3.0, scale=7.0, size=cfg.suppliers)
+
+
+def generate_fx_rates(cfg: SyntheticConfig) -> pd.DataFrame:
+    """
+    fx_rates.xlsx şeklinde günlük USD/TRY serisi (geometrik random walk, yukarı drift).
+    """
+    rng = np.random.default_rng([cfg.seed, 1])
+    dates = pd.date_range(cfg.start_date, cfg.end_date, freq="D")
+    drift = np.log(1.4) / max(1, len(dates))  # dönem boyunca ~%40 değer kaybı
+    steps = rng.normal(drift, 0.004, len(dates))
+    rate = 29.5 * np.exp(np.cumsum(steps))
+
+    return pd.DataFrame(
+        {
+            "Tarih": dates,
+            "P. Br.": "USD",
+            "Efektif Satış Kuru": np.round(rate, 4),
+            "Hedef Para Birimi": "TL",
+        }
+    )
+
+
+def _random_dates(rng, n: int, start: pd.Timestamp, days: int) -> np.ndarray:
+    # Hafif yıllık mevsimsellik: gün seçimi sinüs ağırlıklı
+    day_idx = np.arange(days)
+    w = 1.0 + 0.3 * np.sin(2 * np.pi * day_idx / 365.25)
+    w /= w.sum()
+    offsets = rng.choice(days, size=n, p=w)
+    return (start + pd.to_timedelta(offsets, unit="D")).to_numpy()
+
+
+def _format_dates(values: np.ndarray, as_text: bool):
+    if not as_text:
+        return values
+    return pd.DatetimeIndex(values).strftime("%d.%m.%Y").to_numpy(dtype=object)
+
+
+def _chunk_bounds(total: int, chunk_rows: int) -> Iterator[tuple]:
+    for i, lo in enumerate(range(0, total, chunk_rows)):
+        yield i, lo, min(total, lo + chunk_rows)
+
+
+def iter_sales_chunks(
+    cfg: SyntheticConfig,
+    chunk_rows: int = 1_000_000,
+    catalogue: Optional[_Catalogue] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    IASSALHEADLIST şeklinde ham satış satırları, parça parça.
+    Her parça kendi seed'iyle (seed, parça no) üretilir; çıktı seed + chunk_rows ile
+    deterministiktir, farklı chunk_rows farklı veri üretir.
+    """
+    cat = catalogue or _Catalogue(cfg)
+    start = pd.Timestamp(cfg.start_date)
+    days = (pd.Timestamp(cfg.end_date) - start).days + 1
+
+    for i, lo, hi in _chunk_bounds(cfg.sales_rows, chunk_rows):
+        rng = np.random.default_rng([cfg.seed, 2, i])
+        n = hi - lo
+        mat = rng.choice(cfg.materials, size=n, p=cat.sales_weights)
+        qty = np.maximum(1, rng.poisson(lam=20, size=n)).astype(float)
+        price = cat.unit_price_usd[mat] * rng.normal(1.0, 0.05, n)
+        dates = _random_dates(rng, n, start, days)
+
+        yield pd.DataFrame(
+            {
+                "Başlangıç Tarihi": _format_dates(dates, cfg.dates_as_text),
+                "Malzeme": cat.material_codes[mat],
+                "MalKodGrup": cat.group_codes[cat.material_group[mat]],
+                "Miktar": qty,
+                "Miktar Br.": cat.sales_unit[mat],
+                "Genel Toplam (USD)": np.round(qty * price, 2),
+            }
+        )
+
+
+def iter_purchase_chunks(
+    cfg: SyntheticConfig,
+    chunk_rows: int = 1_000_000,
+    catalogue: Optional[_Catalogue] = None,
+    fx: Optional[pd.DataFrame] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    IASPURHEADLISTTREE şeklinde ham satınalma satırları, parça parça.
+    Fiyat TL cinsinden, sipariş günündeki kurla üretilir.
+    """
+    cat = catalogue or _Catalogue(cfg)
+    fx = fx if fx is not None else generate_fx_rates(cfg)
+    fx_rate = fx["Efektif Satış Kuru"].to_numpy()
+    start = pd.Timestamp(cfg.start_date)
+    days = (pd.Timestamp(cfg.end_date) - start).days + 1
+
+    for i, lo, hi in _chunk_bounds(cfg.purchase_rows, chunk_rows):
+        rng = np.random.default_rng([cfg.seed, 3, i])
+        n = hi - lo
+        mat = cat.purchase_materials[rng.integers(0, len(cat.purchase_materials), n)]
+        sup = cat.material_supplier[mat, rng.integers(0, 3, n)]
+
+        order_dates = _random_dates(rng, n, start, days)
+        day_idx = (order_dates - start.to_datetime64()).astype("timedelta64[D]").astype(int)
+
+        lead = rng.gamma(shape=2.0, scale=cat.supplier_lead_mean[sup] / 2.0).round()
+        delivery = order_dates + lead.astype("timedelta64[D]")
+        no_delivery = rng.random(n) < cfg.no_delivery_ratio
+        delivery[no_delivery] = NO_DELIVERY_DATE.to_datetime64()
+
+        qty = np.maximum(1, rng.poisson(lam=60, size=n)).astype(float)
+        fiyat_tl = cat.unit_cost_usd[mat] * fx_rate[day_idx] * rng.normal(1.0, 0.08, n)
+
+        yield pd.DataFrame(
+            {
+                "Sipariş Tarihi": _format_dates(order_dates, cfg.dates_as_text),
+                "Teslim Tarihi": _format_dates(delivery, cfg.dates_as_text),
+                "Malzeme": cat.material_codes[mat],
+                "MalzemeGrup": cat.purchase_group_codes[cat.material_group[mat]],
+                "Birim": cat.purchase_unit[mat],
+                "Sipariş Miktarı": qty,
+                "Fiyat": np.round(fiyat_tl, 4),
+                "Tedarikçi Num.": cat.supplier_ids[sup],
+                "İsim": cat.supplier_names[sup],
+            }
+        )
+
+
+def generate_dataset(cfg: SyntheticConfig, chunk_rows: int = 1_000_000) -> Dict[str, pd.DataFrame]:
+    """
+    Ham (parse edilmemiş) sales / purchase / fx tablolarını bellekte üretir.
+    """
+    cat = _Catalogue(cfg)
+    fx = generate_fx_rates(cfg)
+    sales = pd.concat(list(iter_sales_chunks(cfg, chunk_rows, cat)), ignore_index=True)
+    purchase = pd.concat(
+        list(iter_purchase_chunks(cfg, chunk_rows, cat, fx)), ignore_index=True
+    )
+    return {"sales": sales, "purchase": purchase, "fx": fx}
+
+
+def parsed_dataset(
+    cfg: SyntheticConfig, chunk_rows: int = 1_000_000
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Sentetik veri → parser temizliğinden geçmiş (satış, satınalma) frame'leri, dosyaya
+    yazmadan. Eşdeğerlik kontrol scriptleri bunu kullanır.
+    """
+    from parser.sales_parser import clean_sales_frame
+    from parser.purchase_parser import clean_purchase_frame
+
+    raw = generate_dataset(cfg, chunk_rows)
+    fx = raw["fx"].set_index("Tarih")["Efektif Satış Kuru"]
+    return clean_sales_frame(raw["sales"]), clean_purchase_frame(raw["purchase"], fx)
+
+
+def write_dataset(
+    cfg: SyntheticConfig,
+    out_dir: str,
+    fmt: str = "auto",
+    chunk_rows: int = 1_000_000,
+) -> Dict[str, str]:
+    """
+    Veri setini diske yazar.
+    - fmt="xlsx": parser'ların okuduğu sheet isimleriyle Excel (≤ 1.048.575 satır)
+    - fmt="parquet": parça parça yazılır, bellek parça boyutuyla sınırlı
+    - fmt="auto": Excel limitine sığıyorsa xlsx, değilse parquet
+    fx her zaman fx_rates.xlsx olarak yazılır (load_fx_rates ile okunabilir).
+    """
+    from parser.sales_parser import SALES_SHEET_NAME
+    from parser.purchase_parser import PURCHASE_SHEET_NAME
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "auto":
+        fits = max(cfg.sales_rows, cfg.purchase_rows) <= EXCEL_MAX_ROWS
+        fmt = "xlsx" if fits else "parquet"
+
+    cat = _Catalogue(cfg)
+    fx = generate_fx_rates(cfg)
+    fx_path = out / "fx_rates.xlsx"
+    fx.to_excel(fx_path, index=False)
+
+    paths = {"fx": str(fx_path)}
+
+    if fmt == "xlsx":
+        if max(cfg.sales_rows, cfg.purchase_rows) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheet limiti aşıldı ({EXCEL_MAX_ROWS} satır).")
+        sales = pd.concat(list(iter_sales_chunks(cfg, chunk_rows, cat)), ignore_index=True)
+        purchase = pd.concat(
+            list(iter_purchase_chunks(cfg, chunk_rows, cat, fx)), ignore_index=True
+        )
+        paths["sales"] = str(out / "sales.xlsx")
+        paths["purchase"] = str(out / "purchase.xlsx")
+        sales.to_excel(paths["sales"], sheet_name=SALES_SHEET_NAME, index=False)
+        purchase.to_excel(paths["purchase"], sheet_name=PURCHASE_SHEET_NAME, index=False)
+    elif fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for name, chunks in (
+            ("sales", iter_sales_chunks(cfg, chunk_rows, cat)),
+            ("purchase", iter_purchase_chunks(cfg, chunk_rows, cat, fx)),
+        ):
+            path = out / f"{name}.parquet"
+            writer = None
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            if writer is not None:
+                writer.close()
+            paths[name] = str(path)
+    else:
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+
+    return paths
@@ -0,0 +1,28 @@
+# supanaliz-ai/compute/__init__.py
+
+from .base import ComputeBackend, Source, read_source, source_columns
+from .pandas_backend import PandasBackend
+from .duckdb_backend import DuckDBBackend
+from .registry import get_backend, register_backend, available_backends
+from .partials import (
+    MaterialPartials,
+    accumulate,
+    iter_parquet_chunks,
+    partials_from_parquet,
+)
+
+__all__ = [
+    "ComputeBackend",
+    "Source",
+    "read_source",
+    "source_columns",
+    "PandasBackend",
+    "DuckDBBackend",
+    "get_backend",
+    "register_backend",
+    "available_backends",
+    "MaterialPartials",
+    "accumulate",
+    "iter_parquet_chunks",
+    "partials_from_parquet",
+]
@@ -0,0 +1,83 @@
+# supanaliz-ai/compute/base.py
+
+from __future__ import annotations
+
+import glob
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+
+# Backend girdisi: parse edilmiş DataFrame ya da parser çıktısının yazıldığı
+# Parquet dosya(lar)ı (yol, glob veya yol listesi)
+Source = Union[pd.DataFrame, str, os.PathLike, Sequence[str]]
+
+
+def source_paths(source: Source) -> List[str]:
+    """
+    Parquet kaynağını sıralı dosya listesine açar (glob desteklenir).
+    Satır sırası = bu listedeki dosya sırası + dosya içi sıra.
+    """
+    items = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+    paths: List[str] = []
+    for item in items:
+        item = os.fspath(item)
+        matches = sorted(glob.glob(item)) if glob.has_magic(item) else [item]
+        if not matches:
+            raise FileNotFoundError(f"Parquet kaynağı bulunamadı: {item}")
+        paths.extend(matches)
+    return paths
+
+
+def read_source(source: Source, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if isinstance(source, pd.DataFrame):
+        return source
+    frames = [pd.read_parquet(p, columns=columns) for p in source_paths(source)]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def source_dtypes(source: Source) -> pd.Series:
+    """
+    Kaynağın pandas dtype'ları (Parquet için şemadan, veri okunmadan).
+    """
+    if isinstance(source, pd.DataFrame):
+        return source.dtypes
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(source_paths(source)[0]).empty_table().to_pandas().dtypes
+
+
+def source_columns(source: Source) -> List[str]:
+    return list(source_dtypes(source).index)
+
+
+class ComputeBackend(ABC):
+    """
+    Feature / matching fonksiyonlarının satır seviyesindeki ağır aggregation'ları.
+    Türev metrikler (oran, skor, merge) pandas tarafında ortak kalır; tüm backend'ler
+    aynı kolonları, aynı sırayı ve aynı dtype'ları döner.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def monthly_sales(self, sales: Source) -> pd.DataFrame:
+        """
+        Malzeme + MalKodGrup + YılAy bazında total_qty, total_sales_usd, avg_unit_price_usd.
+        """
+
+    @abstractmethod
+    def supplier_aggregates(self, purchase: Source, supplier_cols: List[str]) -> pd.DataFrame:
+        """
+        Tedarikçi bazında satır / miktar / maliyet / lead time aggregation'ları.
+        """
+
+    @abstractmethod
+    def matching_aggregates(
+        self, sales: Source, purchase: Source
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        build_matching_table için malzeme bazlı satış ve satınalma toplamları.
+        """
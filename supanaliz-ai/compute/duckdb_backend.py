@@ -0,0 +1,232 @@
+# supanaliz-ai/compute/duckdb_backend.py
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .base import ComputeBackend, Source, source_paths
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _lit(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+_FLOAT_TYPES = ("DOUBLE", "FLOAT", "REAL")
+_INT_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT")
+
+
+class DuckDBBackend(ComputeBackend):
+    """
+    Gömülü DuckDB (in-process) backend:
+    - Parquet girdiler doğrudan taranır, veri pandas'a yüklenmez
+    - memory_limit aşılınca temp_directory'ye spill eder (out-of-core)
+    - aggregation'lar çok thread'li çalışır
+    pandas backend ile aynı sonucu vermesi için toplamlar fsum (Kahan) ile alınır,
+    "first" satır sırasına göre, sıralama group key'lere göre (NULL sonda) yapılır.
+
+    Ayarlar: SUPANALIZ_DUCKDB_THREADS, SUPANALIZ_DUCKDB_MEMORY_LIMIT (örn. "8GB"),
+    SUPANALIZ_DUCKDB_TEMP_DIR.
+    """
+
+    name = "duckdb"
+
+    def __init__(
+        self,
+        threads: Optional[int] = None,
+        memory_limit: Optional[str] = None,
+        temp_directory: Optional[str] = None,
+    ):
+        env_threads = os.environ.get("SUPANALIZ_DUCKDB_THREADS")
+        self.threads = threads or (int(env_threads) if env_threads else None)
+        self.memory_limit = memory_limit or os.environ.get("SUPANALIZ_DUCKDB_MEMORY_LIMIT")
+        self.temp_directory = temp_directory or os.environ.get("SUPANALIZ_DUCKDB_TEMP_DIR")
+
+    # ---------------------------------------------------
+    # Bağlantı / kaynaklar
+    # ---------------------------------------------------
+    def _connect(self):
+        import duckdb
+
+        con = duckdb.connect(":memory:")
+        if self.threads:
+            con.execute(f"SET threads = {int(self.threads)}")
+        if self.memory_limit:
+            con.execute(f"SET memory_limit = {_lit(self.memory_limit)}")
+        if self.temp_directory:
+            con.execute(f"SET temp_directory = {_lit(self.temp_directory)}")
+        return con
+
+    @staticmethod
+    def _register(con, name: str, source: Source, row_order: bool = False) -> Tuple[Dict[str, str], str]:
+        """
+        Kaynağı view olarak bağlar. Dönüş: (kolon → DuckDB tipi, satır sırası ifadesi).
+        """
+        if isinstance(source, pd.DataFrame):
+            df = source.assign(_rn=np.arange(len(source))) if row_order else source
+            con.register(name, df)
+            order = "_rn"
+        else:
+            paths = ", ".join(_lit(p) for p in source_paths(source))
+            con.execute(
+                f"CREATE VIEW {name} AS SELECT * FROM read_parquet([{paths}], "
+                f"filename = true, file_row_number = true)"
+            )
+            order = "{'f': filename, 'r': file_row_number}"
+
+        types = {row[0]: row[1] for row in con.execute(f"DESCRIBE {name}").fetchall()}
+        return types, order
+
+    @staticmethod
+    def _num(col: str, types: Dict[str, str]) -> str:
+        # Parquet'te NaN olarak saklanmış değerler pandas'taki gibi yok sayılır
+        if types[col] in _FLOAT_TYPES:
+            return f"CASE WHEN isnan({_q(col)}) THEN NULL ELSE {_q(col)} END"
+        return _q(col)
+
+    @staticmethod
+    def _sum(expr: str, col: str, types: Dict[str, str]) -> str:
+        if types[col] in _INT_TYPES:
+            return f"CAST(coalesce(sum({expr}), 0) AS BIGINT)"
+        return f"coalesce(fsum({expr}), 0.0)"
+
+    @staticmethod
+    def _mean(expr: str) -> str:
+        return f"fsum({expr}) / nullif(count({expr}), 0)"
+
+    @staticmethod
+    def _median(expr: str) -> str:
+        # pandas: çift sayıda elemanda (alt + üst orta) / 2
+        return f"(quantile_disc({expr}, 0.5) - quantile_disc(-({expr}), 0.5)) / 2"
+
+    @staticmethod
+    def _fetch(con, sql: str) -> pd.DataFrame:
+        # Arrow üzerinden: VARCHAR → pandas str dtype (pandas groupby key'leriyle aynı)
+        return con.execute(sql).fetch_arrow_table().to_pandas()
+
+    @staticmethod
+    def _order_by(cols: List[str]) -> str:
+        return ", ".join(f"{_q(c)} ASC NULLS LAST" for c in cols)
+
+    # ---------------------------------------------------
+    # Aggregation'lar
+    # ---------------------------------------------------
+    def monthly_sales(self, sales: Source) -> pd.DataFrame:
+        con = self._connect()
+        try:
+            types, _ = self._register(con, "sales", sales)
+            qty = self._num("Miktar", types)
+            usd = self._num("Genel Toplam (USD)", types)
+            keys = ["Malzeme", "MalKodGrup", "YılAy"]
+
+            sql = f"""
+                WITH base AS (
+                    SELECT
+                        "Malzeme",
+                        "MalKodGrup",
+                        date_trunc('month', "Başlangıç Tarihi") AS "YılAy",
+                        {qty} AS qty,
+                        {usd} AS usd,
+                        CASE WHEN isfinite(({usd}) / ({qty})) THEN ({usd}) / ({qty}) END AS unit_price
+                    FROM sales
+                )
+                SELECT
+                    "Malzeme", "MalKodGrup", "YılAy",
+                    {self._sum("qty", "Miktar", types)} AS total_qty,
+                    {self._sum("usd", "Genel Toplam (USD)", types)} AS total_sales_usd,
+                    {self._mean("unit_price")} AS avg_unit_price_usd
+                FROM base
+                GROUP BY ALL
+                ORDER BY {self._order_by(keys)}
+            """
+            out = self._fetch(con, sql)
+        finally:
+            con.close()
+
+        out["YılAy"] = pd.to_datetime(out["YılAy"]).dt.to_period("M")
+        return out
+
+    def supplier_aggregates(self, purchase: Source, supplier_cols: List[str]) -> pd.DataFrame:
+        con = self._connect()
+        try:
+            types, _ = self._register(con, "purchase", purchase)
+            qty = self._num("Sipariş Miktarı", types)
+            cost = self._num("Kalem Toplam USD", types)
+            unit_cost = self._num("Birim Maliyet USD", types)
+            lead = self._num("Lead Time (days)", types)
+            keys = ", ".join(_q(c) for c in supplier_cols)
+
+            sql = f"""
+                SELECT
+                    {keys},
+                    count(*) AS line_count,
+                    {self._sum(qty, "Sipariş Miktarı", types)} AS total_qty,
+                    {self._sum(cost, "Kalem Toplam USD", types)} AS total_cost_usd,
+                    {self._mean(unit_cost)} AS avg_unit_cost_usd,
+                    {self._mean(lead)} AS avg_lead_time_days,
+                    {self._median(lead)} AS median_lead_time,
+                    max({lead}) AS max_lead_time,
+                    CAST(count_if({lead} >= 30) AS BIGINT) AS long_lead_count,
+                    CAST(count(*) - count({lead}) AS BIGINT) AS no_delivery_count
+                FROM purchase
+                GROUP BY {keys}
+                ORDER BY {self._order_by(supplier_cols)}
+            """
+            out = self._fetch(con, sql)
+        finally:
+            con.close()
+
+        return out
+
+    def matching_aggregates(
+        self, sales: Source, purchase: Source
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        con = self._connect()
+        try:
+            s_types, s_order = self._register(con, "sales", sales, row_order=True)
+            p_types, p_order = self._register(con, "purchase", purchase, row_order=True)
+
+            def first(col: str, order: str) -> str:
+                # pandas groupby "first": satır sırasındaki ilk NULL olmayan değer
+                return f"min_by({_q(col)}, {order}) FILTER (WHERE {_q(col)} IS NOT NULL)"
+
+            sales_sql = f"""
+                SELECT
+                    "Malzeme",
+                    {self._sum(self._num("Miktar", s_types), "Miktar", s_types)} AS total_sales_qty,
+                    {self._sum(self._num("Genel Toplam (USD)", s_types), "Genel Toplam (USD)", s_types)}
+                        AS total_sales_usd,
+                    {first("Miktar Br.", s_order)} AS sales_unit,
+                    {first("MalKodGrup", s_order)} AS "MalKodGrup"
+                FROM sales
+                WHERE "Malzeme" IS NOT NULL
+                GROUP BY "Malzeme"
+                ORDER BY "Malzeme"
+            """
+            purchase_sql = f"""
+                SELECT
+                    "Malzeme",
+                    {self._sum(self._num("Sipariş Miktarı", p_types), "Sipariş Miktarı", p_types)}
+                        AS total_purchase_qty,
+                    {self._sum(self._num("Kalem Toplam USD", p_types), "Kalem Toplam USD", p_types)}
+                        AS total_purchase_cost_usd,
+                    {first("Birim", p_order)} AS purchase_unit,
+                    {first("MalzemeGrup", p_order)} AS "MalzemeGrup"
+                FROM purchase
+                WHERE "Malzeme" IS NOT NULL
+                GROUP BY "Malzeme"
+                ORDER BY "Malzeme"
+            """
+            sales_agg = self._fetch(con, sales_sql)
+            purchase_agg = self._fetch(con, purchase_sql)
+        finally:
+            con.close()
+
+        return sales_agg, purchase_agg
@@ -0,0 +1,83 @@
+# supanaliz-ai/compute/pandas_backend.py
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import pandas as pd
+
+from .base import ComputeBackend, Source, read_source
+
+
+class PandasBackend(ComputeBackend):
+    """
+    Varsayılan in-memory backend (mevcut pandas groupby kodu).
+    """
+
+    name = "pandas"
+
+    def monthly_sales(self, sales: Source) -> pd.DataFrame:
+        from features.sales_features import _prepare_sales_base
+
+        df = _prepare_sales_base(read_source(sales))
+
+        monthly = (
+            df.groupby(["Malzeme", "MalKodGrup", "YılAy"], dropna=False)
+            .agg(
+                total_qty=("Miktar", "sum"),
+                total_sales_usd=("Genel Toplam (USD)", "sum"),
+                avg_unit_price_usd=("unit_price_usd", "mean"),
+            )
+            .reset_index()
+        )
+
+        return monthly
+
+    def supplier_aggregates(self, purchase: Source, supplier_cols: List[str]) -> pd.DataFrame:
+        from features.purchase_features import _prepare_purchase_base
+
+        df = _prepare_purchase_base(read_source(purchase))
+
+        grouped = df.groupby(supplier_cols, dropna=False)
+
+        return grouped.agg(
+            line_count=("Sipariş Miktarı", "size"),
+            total_qty=("Sipariş Miktarı", "sum"),
+            total_cost_usd=("Kalem Toplam USD", "sum"),
+            avg_unit_cost_usd=("Birim Maliyet USD", "mean"),
+            avg_lead_time_days=("Lead Time (days)", "mean"),
+            median_lead_time=("Lead Time (days)", "median"),
+            max_lead_time=("Lead Time (days)", "max"),
+            long_lead_count=("Lead Time (days)", lambda x: (x >= 30).sum()),
+            no_delivery_count=("Lead Time (days)", lambda x: x.isna().sum()),
+        ).reset_index()
+
+    def matching_aggregates(
+        self, sales: Source, purchase: Source
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        sales_df = read_source(sales)
+        purchase_df = read_source(purchase)
+
+        sales_agg = (
+            sales_df
+            .groupby("Malzeme", as_index=False)
+            .agg(
+                total_sales_qty=("Miktar", "sum"),
+                total_sales_usd=("Genel Toplam (USD)", "sum"),
+                sales_unit=("Miktar Br.", "first"),
+                MalKodGrup=("MalKodGrup", "first"),
+            )
+        )
+
+        purchase_agg = (
+            purchase_df
+            .groupby("Malzeme", as_index=False)
+            .agg(
+                total_purchase_qty=("Sipariş Miktarı", "sum"),
+                total_purchase_cost_usd=("Kalem Toplam USD", "sum"),
+                purchase_unit=("Birim", "first"),
+                MalzemeGrup=("MalzemeGrup", "first"),
+            )
+        )
+
+        return sales_agg, purchase_agg
@@ -0,0 +1,288 @@
+# supanaliz-ai/compute/partials.py
+
+from __future__ import annotations
+
+import itertools
+from functools import reduce
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .base import Source, source_paths
+
+
+# Partial tablolarda kullanılan kaynak kolonlar
+FIELDS: Dict[str, Dict[str, str]] = {
+    "sales": {
+        "material": "Malzeme",
+        "qty": "Miktar",
+        "value": "Genel Toplam (USD)",
+        "unit": "Miktar Br.",
+        "group": "MalKodGrup",
+        "date": "Başlangıç Tarihi",
+    },
+    "purchase": {
+        "material": "Malzeme",
+        "qty": "Sipariş Miktarı",
+        "value": "Kalem Toplam USD",
+        "unit": "Birim",
+        "group": "MalzemeGrup",
+        "date": "Sipariş Tarihi",
+    },
+}
+
+# build_matching_table'ın ara tablolarındaki isimler
+MATCHING_COLUMNS: Dict[str, Dict[str, str]] = {
+    "sales": {
+        "qty_sum": "total_sales_qty",
+        "value_sum": "total_sales_usd",
+        "unit_first": "sales_unit",
+        "group_first": "MalKodGrup",
+    },
+    "purchase": {
+        "qty_sum": "total_purchase_qty",
+        "value_sum": "total_purchase_cost_usd",
+        "unit_first": "purchase_unit",
+        "group_first": "MalzemeGrup",
+    },
+}
+
+# Satır sıra anahtarı: seq * ROW_SPAN + parça içi pozisyon
+ROW_SPAN = 1 << 40
+NO_KEY = np.iinfo(np.int64).max
+
+_SUM_COLUMNS = ["line_count", "qty_sum", "value_sum", "price_n"]
+
+
+class MaterialPartials:
+    """
+    Malzeme bazlı, birleştirilebilir (associative + commutative) kısmi aggregation:
+    - line_count, qty_sum, value_sum
+    - ilk görülen birim / grup (satır sıra anahtarı en küçük olan, NULL olmayan değer)
+    - date_min / date_max
+    - birim fiyat için (n, mean, M2) momentleri → varyans (Chan birleştirme formülü;
+      ham kareler toplamına göre sayısal olarak kararlı)
+
+    Parça (chunk / dosya / yıl) başına from_frame ile üretilir, `+` / merge_all ile
+    birleştirilir. Bellek kullanımı malzeme sayısıyla sınırlıdır, satır sayısıyla değil.
+
+    seq: parçanın global sıradaki yeri. "İlk görülen" değerler (seq, satır) sırasına göre
+    seçilir; parçalar hangi sırayla birleştirilirse birleştirilsin sonuç aynıdır.
+    """
+
+    def __init__(self, kind: str, table: pd.DataFrame):
+        if kind not in FIELDS:
+            raise KeyError(f"Bilinmeyen partial türü: {kind}")
+        self.kind = kind
+        self.table = table
+
+    # ---------------------------------------------------
+    # Üretim
+    # ---------------------------------------------------
+    @classmethod
+    def empty(cls, kind: str) -> "MaterialPartials":
+        table = pd.DataFrame(
+            {
+                "line_count": pd.Series(dtype="int64"),
+                "qty_sum": pd.Series(dtype="float64"),
+                "value_sum": pd.Series(dtype="float64"),
+                "date_min": pd.Series(dtype="datetime64[us]"),
+                "date_max": pd.Series(dtype="datetime64[us]"),
+                "price_n": pd.Series(dtype="int64"),
+                "price_mean": pd.Series(dtype="float64"),
+                "price_m2": pd.Series(dtype="float64"),
+                "unit_key": pd.Series(dtype="int64"),
+                "unit_first": pd.Series(dtype="str"),
+                "group_key": pd.Series(dtype="int64"),
+                "group_first": pd.Series(dtype="str"),
+            },
+            index=pd.Index([], name="Malzeme", dtype="str"),
+        )
+        return cls(kind, table)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, kind: str, seq: int = 0) -> "MaterialPartials":
+        """
+        Parse edilmiş bir parça (sales / purchase) için partial tablo.
+        """
+        fields = FIELDS.get(kind)
+        if fields is None:
+            raise KeyError(f"Bilinmeyen partial türü: {kind}")
+        missing = [c for c in fields.values() if c not in df.columns]
+        if missing:
+            raise KeyError(f"Partial aggregation için eksik kolon(lar): {missing}")
+
+        base = pd.DataFrame(
+            {
+                "Malzeme": df[fields["material"]].to_numpy(),
+                "qty": df[fields["qty"]].to_numpy(),
+                "value": df[fields["value"]].to_numpy(),
+                "unit": df[fields["unit"]].array,
+                "group": df[fields["group"]].array,
+                "date": df[fields["date"]].to_numpy(),
+                "key": seq * ROW_SPAN + np.arange(len(df), dtype=np.int64),
+            }
+        )
+        # Malzemesi boş satırlar eşleştirmede de yok sayılır (groupby dropna)
+        base = base[base["Malzeme"].notna()]
+        if base.empty:
+            return cls.empty(kind)
+
+        price = base["value"] / base["qty"]
+        base["price"] = price.where(np.isfinite(price))
+
+        g = base.groupby("Malzeme", sort=True)
+        table = g.agg(
+            line_count=("key", "size"),
+            qty_sum=("qty", "sum"),
+            value_sum=("value", "sum"),
+            date_min=("date", "min"),
+            date_max=("date", "max"),
+            price_n=("price", "count"),
+            price_mean=("price", "mean"),
+        )
+        table["price_m2"] = (g["price"].var(ddof=0) * table["price_n"]).fillna(0.0)
+
+        # base satır sırasında → groupby first = en küçük anahtarlı NULL olmayan değer
+        for col in ("unit", "group"):
+            sub = base.loc[base[col].notna(), ["Malzeme", "key", col]]
+            firsts = sub.groupby("Malzeme", sort=True)[["key", col]].first()
+            table[f"{col}_key"] = firsts["key"].reindex(table.index, fill_value=NO_KEY)
+            table[f"{col}_first"] = firsts[col].reindex(table.index)
+
+        return cls(kind, table)
+
+    # ---------------------------------------------------
+    # Birleştirme
+    # ---------------------------------------------------
+    @staticmethod
+    def merge_all(parts: Iterable["MaterialPartials"]) -> "MaterialPartials":
+        parts = list(parts)
+        if not parts:
+            raise ValueError("Birleştirilecek partial yok.")
+        kinds = {p.kind for p in parts}
+        if len(kinds) > 1:
+            raise ValueError(f"Farklı türde partial'lar birleştirilemez: {sorted(kinds)}")
+        kind = parts[0].kind
+
+        tables = [p.table for p in parts if len(p.table)]
+        if not tables:
+            return MaterialPartials.empty(kind)
+        if len(tables) == 1:
+            return MaterialPartials(kind, tables[0])
+
+        t = pd.concat(tables)
+        g = t.groupby(level=0, sort=True)
+
+        out = g[_SUM_COLUMNS].sum()
+        out["date_min"] = g["date_min"].min()
+        out["date_max"] = g["date_max"].max()
+
+        # Momentler: mean = Σ nᵢ·meanᵢ / N ; M2 = Σ M2ᵢ + Σ nᵢ·(meanᵢ - mean)²
+        n_i = t["price_n"].to_numpy(dtype=float)
+        mean_i = t["price_mean"].fillna(0.0).to_numpy()
+        weighted = pd.Series(n_i * mean_i, index=t.index).groupby(level=0, sort=True).sum()
+        total_n = out["price_n"].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(total_n > 0, weighted.to_numpy() / total_n, np.nan)
+        out["price_mean"] = mean
+
+        mean_per_row = pd.Series(mean, index=out.index).reindex(t.index).to_numpy()
+        dev = np.where(n_i > 0, n_i * (mean_i - mean_per_row) ** 2, 0.0)
+        out["price_m2"] = (
+            pd.Series(t["price_m2"].to_numpy() + dev, index=t.index)
+            .groupby(level=0, sort=True)
+            .sum()
+        )
+
+        flat = t.reset_index()
+        for col in ("unit", "group"):
+            pos = flat.groupby("Malzeme", sort=True)[f"{col}_key"].idxmin()
+            picked = flat.loc[pos.to_numpy(), ["Malzeme", f"{col}_key", f"{col}_first"]]
+            picked = picked.set_index("Malzeme")
+            out[f"{col}_key"] = picked[f"{col}_key"]
+            out[f"{col}_first"] = picked[f"{col}_first"]
+
+        return MaterialPartials(kind, out)
+
+    def merge(self, other: "MaterialPartials") -> "MaterialPartials":
+        return MaterialPartials.merge_all([self, other])
+
+    __add__ = merge
+
+    # ---------------------------------------------------
+    # Çıktılar
+    # ---------------------------------------------------
+    def to_matching_aggregates(self) -> pd.DataFrame:
+        """
+        build_matching_table'ın ComputeBackend.matching_aggregates ile aldığı tabloyla
+        aynı şema (Malzeme sıralı).
+        """
+        names = MATCHING_COLUMNS[self.kind]
+        out = self.table[list(names)].rename(columns=names)
+        return out.rename_axis("Malzeme").reset_index()
+
+    def material_stats(self) -> pd.DataFrame:
+        """
+        Malzeme bazlı ek istatistikler: ilk / son tarih, birim fiyat ort. ve std (ddof=1).
+        """
+        t = self.table
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = t["price_m2"] / (t["price_n"] - 1)
+        return pd.DataFrame(
+            {
+                "line_count": t["line_count"],
+                "first_date": t["date_min"],
+                "last_date": t["date_max"],
+                "unit_price_mean": t["price_mean"],
+                "unit_price_std": np.sqrt(var.where(t["price_n"] > 1)),
+            }
+        ).reset_index()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __repr__(self) -> str:
+        return f"MaterialPartials(kind={self.kind!r}, materials={len(self.table)})"
+
+
+def accumulate(
+    chunks: Iterable[pd.DataFrame], kind: str, start_seq: int = 0
+) -> MaterialPartials:
+    """
+    Parçaları sırayla partial'a çevirip birleştirir; aynı anda bellekte
+    tek parça + malzeme sayısı kadar partial satırı tutulur.
+    """
+    partials = (
+        MaterialPartials.from_frame(chunk, kind, seq=seq)
+        for seq, chunk in zip(itertools.count(start_seq), chunks)
+    )
+    return reduce(MaterialPartials.merge, partials, MaterialPartials.empty(kind))
+
+
+def iter_parquet_chunks(
+    source: Source,
+    columns: Optional[List[str]] = None,
+    batch_rows: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Parquet dosya(lar)ını record batch'ler halinde okur (dosya sırası → satır sırası).
+    """
+    import pyarrow.parquet as pq
+
+    for path in source_paths(source):
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+
+
+def partials_from_parquet(
+    source: Source, kind: str, batch_rows: int = 1_000_000, start_seq: int = 0
+) -> MaterialPartials:
+    """
+    Parse edilmiş verinin Parquet dosya(lar)ından, sadece gereken kolonları okuyarak
+    partial üretir.
+    """
+    columns = list(dict.fromkeys(FIELDS[kind].values()))
+    return accumulate(iter_parquet_chunks(source, columns, batch_rows), kind, start_seq)
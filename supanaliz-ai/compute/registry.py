@@ -0,0 +1,48 @@
+# supanaliz-ai/compute/registry.py
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Union
+
+from .base import ComputeBackend
+from .pandas_backend import PandasBackend
+from .duckdb_backend import DuckDBBackend
+
+
+DEFAULT_BACKEND = "pandas"
+
+_factories: Dict[str, Callable[[], ComputeBackend]] = {
+    "pandas": PandasBackend,
+    "duckdb": DuckDBBackend,
+}
+_instances: Dict[str, ComputeBackend] = {}
+_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], ComputeBackend]) -> None:
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def available_backends() -> List[str]:
+    return sorted(_factories)
+
+
+def get_backend(backend: Union[str, ComputeBackend, None] = None) -> ComputeBackend:
+    """
+    backend: instance, isim ya da None (SUPANALIZ_COMPUTE_BACKEND, yoksa "pandas").
+    """
+    if isinstance(backend, ComputeBackend):
+        return backend
+
+    name: Optional[str] = backend or os.environ.get("SUPANALIZ_COMPUTE_BACKEND") or DEFAULT_BACKEND
+    name = name.lower()
+    with _lock:
+        if name not in _factories:
+            raise KeyError(f"Bilinmeyen compute backend: {name} (mevcut: {sorted(_factories)})")
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+        return _instances[name]
@@ -2,5 +2,52 @@
 
 from .sales_features import build_sales_features
 from .purchase_features import build_purchase_features
+from .summaries import (
+    SalesFeatureBuilder,
+    PurchaseFeatureBuilder,
+    SalesSummaryFrames,
+    PurchaseSummaryFrames,
+)
+from .parallel import (
+    build_sales_features_parallel,
+    build_purchase_features_parallel,
+    build_profit_features_parallel,
+)
+from .incremental import IncrementalFeatureStore
+from .scenarios import Scenario, ScenarioEngine
+from .stockout_sim import StockoutSimulator
+from .segmented import analyze_segments
+from .clustering import MaterialSegmenter, material_feature_matrix, segment_materials
+from .price_anomalies import (
+    detect_price_anomalies,
+    flag_price_anomalies,
+    drop_price_anomalies,
+    price_anomaly_report,
+)
+from .supplier_scorecard import supplier_scorecard, recent_supplier_risk
 
-__all__ = ["build_sales_features", "build_purchase_features"]
+__all__ = [
+    "build_sales_features",
+    "build_purchase_features",
+    "SalesFeatureBuilder",
+    "PurchaseFeatureBuilder",
+    "SalesSummaryFrames",
+    "PurchaseSummaryFrames",
+    "build_sales_features_parallel",
+    "build_purchase_features_parallel",
+    "build_profit_features_parallel",
+    "IncrementalFeatureStore",
+    "Scenario",
+    "ScenarioEngine",
+    "StockoutSimulator",
+    "analyze_segments",
+    "MaterialSegmenter",
+    "material_feature_matrix",
+    "segment_materials",
+    "detect_price_anomalies",
+    "flag_price_anomalies",
+    "drop_price_anomalies",
+    "price_anomaly_report",
+    "supplier_scorecard",
+    "recent_supplier_risk",
+]
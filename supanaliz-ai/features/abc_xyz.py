@@ -0,0 +1,155 @@
+# supanaliz-ai/features/abc_xyz.py
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from monitoring import instrument
+
+
+# ABC: dönem içi kümülatif satış değeri payı sınırları (malzemeden önceki pay < sınır)
+ABC_THRESHOLDS = (0.80, 0.95)
+# XYZ: aylık talep (miktar) değişim katsayısı sınırları (CV <= sınır)
+XYZ_THRESHOLDS = (0.50, 1.00)
+# Dönem → Period frekansı (None: tüm geçmiş tek dönem)
+ABC_PERIODS = {"all": None, "year": "Y", "quarter": "Q"}
+
+ABC_XYZ_COLUMNS = [
+    "period",
+    "Malzeme",
+    "MalKodGrup",
+    "value_usd",
+    "value_share",
+    "cum_value_share",
+    "abc_class",
+    "active_months",
+    "period_months",
+    "demand_mean",
+    "demand_cv",
+    "xyz_class",
+    "abc_xyz",
+]
+
+
+def _check_thresholds(name: str, thresholds: Sequence[float]) -> np.ndarray:
+    values = np.asarray(thresholds, dtype=float)
+    if values.shape != (2,) or not values[0] <= values[1]:
+        raise ValueError(f"{name} için artan sırada iki eşik gerekli: {list(thresholds)}")
+    return values
+
+
+@instrument("features.abc_xyz.classify")
+def classify_abc_xyz(
+    monthly_sales: pd.DataFrame,
+    period: str = "all",
+    abc_thresholds: Sequence[float] = ABC_THRESHOLDS,
+    xyz_thresholds: Sequence[float] = XYZ_THRESHOLDS,
+) -> pd.DataFrame:
+    """
+    compute_monthly_sales çıktısından malzeme × dönem ABC / XYZ sınıfları.
+    - ABC: dönem içinde (dönem, -değer) sıralaması + tek cumsum; dönem başlangıç
+      offset'leri çıkarılarak dönem içi kümülatif pay
+    - XYZ: aylık miktar matrisinin dönem bazlı toplam / kare toplamı (bincount);
+      satış olmayan aylar 0 talep sayılır, CV = std / ortalama (ortalama 0 → Z)
+    Sadece dönem içinde satışı olan malzemeler döner.
+    """
+    if period not in ABC_PERIODS:
+        raise ValueError(f"Geçersiz dönem: {period} (mevcut: {list(ABC_PERIODS)})")
+    abc = _check_thresholds("ABC", abc_thresholds)
+    xyz = _check_thresholds("XYZ", xyz_thresholds)
+    if monthly_sales.empty:
+        return pd.DataFrame(columns=ABC_XYZ_COLUMNS)
+
+    grouped = monthly_sales.groupby(["Malzeme", "MalKodGrup"], dropna=False, sort=True)
+    code = grouped.ngroup().to_numpy()
+    keys = grouped.size().index
+    n_keys = len(keys)
+
+    # Takvim: ilk aydan son aya kesintisiz; her ay bir döneme düşer
+    months = pd.PeriodIndex(monthly_sales["YılAy"], freq="M")
+    calendar = pd.period_range(months.min(), months.max(), freq="M")
+    month_pos = months.asi8 - calendar[0].ordinal
+    freq = ABC_PERIODS[period]
+    if freq is None:
+        labels = pd.Index(["all"])
+        period_of_month = np.zeros(len(calendar), dtype=np.int64)
+    else:
+        period_of_month, labels = pd.factorize(calendar.asfreq(freq), sort=True)
+        labels = labels.astype(str)
+    n_periods = len(labels)
+    period_months = np.bincount(period_of_month, minlength=n_periods)
+
+    # Malzeme × dönem düz indeksi üzerinde toplamlar
+    flat = code * n_periods + period_of_month[month_pos]
+    size = n_keys * n_periods
+    qty = monthly_sales["total_qty"].to_numpy(dtype=float, na_value=0.0)
+    value = monthly_sales["total_sales_usd"].to_numpy(dtype=float, na_value=0.0)
+    q_sum = np.bincount(flat, weights=qty, minlength=size)
+    q_sq = np.bincount(flat, weights=qty * qty, minlength=size)
+    v_sum = np.bincount(flat, weights=value, minlength=size)
+    active = np.bincount(flat, minlength=size)
+
+    cell = np.flatnonzero(active > 0)
+    key_of, pid = np.divmod(cell, n_periods)
+    v, n_months = v_sum[cell], period_months[pid]
+
+    # XYZ
+    mean = q_sum[cell] / n_months
+    var = np.maximum(q_sq[cell] / n_months - mean * mean, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean > 0, np.sqrt(var) / mean, np.nan)
+    xyz_class = np.select([cv <= xyz[0], cv <= xyz[1]], ["X", "Y"], "Z")
+
+    # ABC: tek sıralama (dönem artan, değer azalan; eşitlikte malzeme sırası) + cumsum
+    order = np.lexsort((key_of, -v, pid))
+    pid_s, v_s = pid[order], v[order]
+    cum = np.cumsum(v_s)
+    starts = np.searchsorted(pid_s, np.arange(n_periods))
+    offset = np.concatenate([[0.0], cum])[starts][pid_s]
+    total = np.bincount(pid_s, weights=v_s, minlength=n_periods)[pid_s]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(total > 0, v_s / total, np.nan)
+        cum_share = np.where(total > 0, (cum - offset) / total, np.nan)
+    before = cum_share - share
+    abc_class = np.select([before < abc[0], before < abc[1]], ["A", "B"], "C")
+
+    key_s = key_of[order]
+    out = pd.DataFrame(
+        {
+            "period": labels.to_numpy()[pid_s],
+            "Malzeme": keys.get_level_values(0).to_numpy()[key_s],
+            "MalKodGrup": keys.get_level_values(1).to_numpy()[key_s],
+            "value_usd": v_s,
+            "value_share": share,
+            "cum_value_share": cum_share,
+            "abc_class": abc_class,
+            "active_months": active[cell][order],
+            "period_months": n_months[order],
+            "demand_mean": mean[order],
+            "demand_cv": cv[order],
+            "xyz_class": xyz_class[order],
+        }
+    )
+    out["abc_xyz"] = out["abc_class"] + out["xyz_class"]
+    return out
+
+
+def abc_xyz_matrix(classes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dönem başına 3×3 ABC/XYZ tablosu: malzeme sayısı ve değer payı.
+    """
+    grid = pd.MultiIndex.from_product(
+        [classes["period"].unique(), list("ABC"), list("XYZ")],
+        names=["period", "abc_class", "xyz_class"],
+    )
+    matrix = (
+        classes.groupby(["period", "abc_class", "xyz_class"])
+        .agg(materials=("Malzeme", "size"), value_share=("value_share", "sum"))
+        .reindex(grid, fill_value=0)
+        .reset_index()
+    )
+    matrix["materials"] = matrix["materials"].astype(np.int64)
+    return matrix
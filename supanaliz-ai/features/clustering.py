@@ -0,0 +1,303 @@
+# supanaliz-ai/features/clustering.py
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from monitoring import instrument, stage
+
+
+# Malzeme davranış vektörü (ERP grup kodundan bağımsız):
+# - log_sales_usd: log1p(toplam satış USD)
+# - margin_pct: kâr marjı (%), [-100, 300] aralığına kırpılır
+# - trend_pct: aylık satış eğimi / ortalama aylık satış (%)
+# - seasonality_strength: mevsimsellik endeksinin aylar arası std'si
+# - cost_cv: birim maliyet değişim katsayısı
+# - lead_time_days: ortalama lead time
+SEGMENT_FEATURES = [
+    "log_sales_usd",
+    "margin_pct",
+    "trend_pct",
+    "seasonality_strength",
+    "cost_cv",
+    "lead_time_days",
+]
+# Feature store / build_result_tables tablo adları
+SEGMENT_TABLES = (
+    "matching",
+    "product_profit",
+    "monthly_sales",
+    "sales_trend",
+    "seasonality",
+    "material_features",
+)
+# Yeni malzeme atamasında tek seferde tutulan (malzeme × küme) mesafe elemanı
+ASSIGN_CHUNK_ELEMENTS = 4_000_000
+
+
+def material_feature_matrix(tables: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Satış / satınalma / kâr feature tablolarından malzeme başına tek satırlık
+    davranış matrisi (index: Malzeme, kolonlar: SEGMENT_FEATURES). Eksik değerler NaN.
+    """
+    missing = [name for name in SEGMENT_TABLES if name not in tables]
+    if missing:
+        raise KeyError(f"Segmentasyon için eksik tablolar: {missing}")
+
+    matching = tables["matching"]
+    materials = pd.Index(matching["Malzeme"].dropna().unique(), name="Malzeme")
+    out = pd.DataFrame(index=materials, columns=SEGMENT_FEATURES, dtype=float)
+
+    sales = matching.set_index("Malzeme")["total_sales_usd"]
+    out["log_sales_usd"] = np.log1p(sales.reindex(materials).clip(lower=0).fillna(0.0))
+
+    margin = tables["product_profit"].groupby("Malzeme")["profit_margin_pct"].mean()
+    out["margin_pct"] = margin.reindex(materials).clip(-100.0, 300.0)
+
+    monthly_mean = tables["monthly_sales"].groupby("Malzeme")["total_sales_usd"].mean()
+    slope = tables["sales_trend"].groupby("Malzeme")["sales_trend_slope"].mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trend = slope / monthly_mean.reindex(slope.index) * 100.0
+    out["trend_pct"] = trend.replace([np.inf, -np.inf], np.nan).reindex(materials)
+
+    season = tables["seasonality"].groupby("Malzeme")["seasonality_index"].std(ddof=0)
+    out["seasonality_strength"] = season.reindex(materials)
+
+    purchase = tables["material_features"].groupby("Malzeme")
+    out["cost_cv"] = purchase["cv_unit_cost"].mean().reindex(materials)
+    out["lead_time_days"] = purchase["avg_lead_time_days"].mean().reindex(materials)
+
+    return out
+
+
+class MaterialSegmenter:
+    """
+    Malzeme davranış matrisi üzerinde MiniBatchKMeans segmentasyonu.
+    - fit: medyan ile doldurma + standardizasyon + MiniBatchKMeans; küme numaraları
+      büyükten küçüğe sıralanır (0 = en kalabalık)
+    - update: sadece henüz atanmamış malzemeleri kayıtlı merkezlere atar (refit yok)
+    - save / load: merkezler, ölçekleme parametreleri ve atamalar diske yazılır;
+      atama için sklearn modeli gerekmez (en yakın merkez, NumPy)
+
+        seg = MaterialSegmenter(n_clusters=8).fit(material_feature_matrix(tables))
+        seg.save("data/segments")
+        MaterialSegmenter.load("data/segments").update(material_feature_matrix(new_tables))
+    """
+
+    def __init__(
+        self,
+        n_clusters: int = 8,
+        batch_size: int = 4096,
+        random_state: int = 42,
+        features: Sequence[str] = SEGMENT_FEATURES,
+    ):
+        if n_clusters < 1:
+            raise ValueError("Küme sayısı en az 1 olmalı.")
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.features = list(features)
+        self.center: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None  # ölçeklenmiş uzayda
+        self.assignments = pd.DataFrame(
+            {"Malzeme": pd.Series(dtype=object), "segment": pd.Series(dtype=np.int64),
+             "distance": pd.Series(dtype=float)}
+        )
+
+    def _scaled(self, matrix: pd.DataFrame) -> np.ndarray:
+        values = matrix[self.features].to_numpy(dtype=float)
+        values = np.where(np.isnan(values), self.center, values)
+        return (values - self.center) / self.scale
+
+    @instrument("features.clustering.fit")
+    def fit(self, matrix: pd.DataFrame) -> "MaterialSegmenter":
+        if len(matrix) < self.n_clusters:
+            raise ValueError(
+                f"Küme sayısı ({self.n_clusters}) malzeme sayısından ({len(matrix)}) büyük."
+            )
+
+        values = matrix[self.features].to_numpy(dtype=float)
+        with np.errstate(all="ignore"):
+            center = np.nanmedian(values, axis=0)
+        self.center = np.where(np.isnan(center), 0.0, center)
+        filled = np.where(np.isnan(values), self.center, values)
+        scale = filled.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+
+        X = (filled - self.center) / self.scale
+        model = MiniBatchKMeans(
+            n_clusters=self.n_clusters,
+            batch_size=self.batch_size,
+            random_state=self.random_state,
+            n_init=3,
+        ).fit(X)
+
+        # Küme numaraları boyuta göre (eşitlikte eski numaraya göre) sıralanır
+        sizes = np.bincount(model.labels_, minlength=self.n_clusters)
+        order = np.lexsort((np.arange(self.n_clusters), -sizes))
+        self.centroids = model.cluster_centers_[order]
+
+        self.assignments = self._assign(matrix.index, X)
+        return self
+
+    def _assign(self, materials: pd.Index, X: np.ndarray) -> pd.DataFrame:
+        segment = np.empty(len(X), dtype=np.int64)
+        distance = np.empty(len(X), dtype=float)
+        step = max(1, ASSIGN_CHUNK_ELEMENTS // max(len(self.centroids), 1))
+        for lo in range(0, len(X), step):
+            d = ((X[lo:lo + step, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+            segment[lo:lo + step] = d.argmin(axis=1)
+            distance[lo:lo + step] = np.sqrt(d.min(axis=1))
+        return pd.DataFrame(
+            {"Malzeme": np.asarray(materials, dtype=object), "segment": segment, "distance": distance}
+        )
+
+    def _require_fitted(self) -> None:
+        if self.centroids is None:
+            raise ValueError("Segmentasyon modeli henüz fit edilmedi.")
+
+    def predict(self, matrix: pd.DataFrame) -> pd.DataFrame:
+        """
+        Verilen malzemeleri kayıtlı merkezlere atar (atama tablosunu değiştirmez).
+        """
+        self._require_fitted()
+        return self._assign(matrix.index, self._scaled(matrix))
+
+    @instrument("features.clustering.update")
+    def update(self, matrix: pd.DataFrame) -> pd.DataFrame:
+        """
+        Atama tablosunda olmayan malzemeleri atar ve tabloya ekler; yeni satırları döner.
+        """
+        self._require_fitted()
+        # Kayıtlı state'te karışık tipli kodlar string'e çevrilmiş olabilir (arrow_safe)
+        known = self.assignments["Malzeme"].astype(str)
+        new = matrix[~matrix.index.astype(str).isin(known)]
+        assigned = self.predict(new)
+        if len(assigned):
+            self.assignments = pd.concat([self.assignments, assigned], ignore_index=True)
+        return assigned
+
+    def centroid_table(self) -> pd.DataFrame:
+        """
+        Küme merkezleri orijinal birimlerde + küme büyüklüğü.
+        """
+        self._require_fitted()
+        table = pd.DataFrame(self.centroids * self.scale + self.center, columns=self.features)
+        table.insert(0, "segment", np.arange(len(self.centroids)))
+        sizes = self.assignments["segment"].value_counts()
+        table["materials"] = sizes.reindex(table["segment"]).fillna(0).astype(np.int64).to_numpy()
+        return table
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save(self, state_dir: str) -> None:
+        """
+        State önce kardeş geçici klasöre yazılır, sonra os.replace ile yerine konur;
+        yarım kalan bir yazım mevcut state'i bozmaz.
+        """
+        from store.arrow import write_parquet
+
+        self._require_fitted()
+        path = Path(state_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tag = f"{os.getpid()}-{time.time_ns()}"
+        tmp = path.parent / f".tmp-{path.name}-{tag}"
+        tmp.mkdir()
+        try:
+            write_parquet(pd.DataFrame(self.centroids, columns=self.features), tmp / "centroids.parquet")
+            write_parquet(self.assignments, tmp / "assignments.parquet")
+            manifest: Dict[str, Any] = {
+                "features": self.features,
+                "n_clusters": self.n_clusters,
+                "batch_size": self.batch_size,
+                "random_state": self.random_state,
+                "center": self.center.tolist(),
+                "scale": self.scale.tolist(),
+            }
+            (tmp / "manifest.json").write_text(
+                json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+            if not path.exists():
+                os.replace(tmp, path)
+                return
+            # Dolu klasör üzerine rename yapılamaz: eskisi kenara alınır, hata olursa geri konur
+            old = path.parent / f".old-{path.name}-{tag}"
+            os.replace(path, old)
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                os.replace(old, path)
+                raise
+            shutil.rmtree(old, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, state_dir: str) -> "MaterialSegmenter":
+        path = Path(state_dir)
+        meta = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        seg = cls(
+            n_clusters=meta["n_clusters"],
+            batch_size=meta["batch_size"],
+            random_state=meta["random_state"],
+            features=meta["features"],
+        )
+        seg.center = np.asarray(meta["center"], dtype=float)
+        seg.scale = np.asarray(meta["scale"], dtype=float)
+        seg.centroids = pd.read_parquet(path / "centroids.parquet")[seg.features].to_numpy(dtype=float)
+        seg.assignments = pd.read_parquet(path / "assignments.parquet")
+        return seg
+
+    @staticmethod
+    def exists(state_dir: str) -> bool:
+        return (Path(state_dir) / "manifest.json").exists()
+
+
+def segment_materials(
+    tables: Mapping[str, pd.DataFrame],
+    n_clusters: int = 8,
+    state_dir: Optional[str] = None,
+    refit: bool = False,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """
+    state_dir'de kayıtlı model varsa (ve refit istenmediyse) sadece yeni malzemeler
+    atanır; yoksa model fit edilir. state_dir verilirse sonuç kaydedilir.
+    """
+    with stage("features.clustering.segment", rows_in=len(tables.get("matching", ()))):
+        matrix = material_feature_matrix(tables)
+        if state_dir and not refit and MaterialSegmenter.exists(state_dir):
+            segmenter = MaterialSegmenter.load(state_dir)
+            new: List[str] = segmenter.update(matrix)["Malzeme"].tolist()
+            mode = "update"
+        else:
+            segmenter = MaterialSegmenter(n_clusters=n_clusters, random_state=random_state).fit(matrix)
+            new = segmenter.assignments["Malzeme"].tolist()
+            mode = "fit"
+        if state_dir:
+            segmenter.save(state_dir)
+
+    return {
+        "meta": {
+            "mode": mode,
+            "n_clusters": segmenter.n_clusters,
+            "materials": len(segmenter.assignments),
+            "new_materials": len(new),
+        },
+        "segmenter": segmenter,
+        "centroids": segmenter.centroid_table(),
+        "assignments": segmenter.assignments,
+    }
@@ -0,0 +1,301 @@
+# features/incremental.py
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from monitoring import stage
+from .sales_features import compute_monthly_sales, compute_sales_trend, compute_seasonality
+from .purchase_features import (
+    compute_material_features,
+    compute_supplier_features,
+    compute_price_trend,
+)
+from .parallel import concat_partitions
+
+
+@dataclass(frozen=True)
+class IncrementalTable:
+    source: str  # "sales" | "purchase"
+    scope: str  # dirty set türü: "material" | "supplier"
+    compute: Callable[[pd.DataFrame], pd.DataFrame]
+    sort_by: Optional[List[str]]  # None → supplier key kolonları
+    drops_na_key: bool  # groupby(dropna=True) ile üretilen tablolar
+
+
+INCREMENTAL_TABLES: Dict[str, IncrementalTable] = {
+    "monthly_sales": IncrementalTable(
+        "sales", "material", compute_monthly_sales, ["Malzeme", "MalKodGrup", "YılAy"], False
+    ),
+    "sales_trend": IncrementalTable(
+        "sales", "material", compute_sales_trend, ["Malzeme", "MalKodGrup"], True
+    ),
+    "seasonality": IncrementalTable(
+        "sales", "material", compute_seasonality, ["Malzeme", "MalKodGrup", "Ay"], False
+    ),
+    "material_features": IncrementalTable(
+        "purchase", "material", compute_material_features, ["Malzeme", "MalzemeGrup", "Birim"], False
+    ),
+    "price_trend": IncrementalTable(
+        "purchase", "material", compute_price_trend, ["Malzeme", "MalzemeGrup"], True
+    ),
+    "supplier_features": IncrementalTable(
+        "purchase", "supplier", compute_supplier_features, None, False
+    ),
+}
+
+SOURCES = ("sales", "purchase")
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def supplier_key_columns(columns) -> List[str]:
+    # compute_supplier_features ile aynı seçim
+    return ["Tedarikçi Num.", "İsim"] if "Tedarikçi Num." in columns else ["MalzemeGrup"]
+
+
+def scope_columns(scope: str, columns) -> List[str]:
+    return ["Malzeme"] if scope == "material" else supplier_key_columns(columns)
+
+
+def group_signatures(df: pd.DataFrame, key_cols: List[str]) -> pd.DataFrame:
+    """
+    Her key için kaynak satır kümesinin imzası: satır sayısı + sıralı satır hash'lerinin
+    (wrap-around) toplamı. Bir malzemenin satırı eklenir / silinir / değişir ya da
+    satırların göreli sırası değişirse imza değişir (sonuçlar satır sırasına bağlı
+    float toplamlar içerdiğinden sıra da imzaya dahil).
+    """
+    if df.empty:
+        return pd.DataFrame(
+            {"rows": pd.Series(dtype="int64"), "signature": pd.Series(dtype="uint64")},
+            index=pd.MultiIndex.from_arrays([[]] * len(key_cols), names=key_cols),
+        )
+
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    grouped = df.groupby(key_cols, dropna=False, sort=True)
+    rank = grouped.cumcount().to_numpy(dtype=np.int64)
+    with np.errstate(over="ignore"):
+        mixed = (row_hash * _MIX) ^ pd.util.hash_array(rank)
+
+    codes = grouped.ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    with np.errstate(over="ignore"):
+        sums = np.add.reduceat(mixed[order], starts)
+
+    keys = df[key_cols].iloc[order[starts]]
+    return pd.DataFrame(
+        {"rows": np.diff(np.r_[starts, len(order)]), "signature": sums},
+        index=pd.MultiIndex.from_frame(keys),
+    )
+
+
+def dirty_keys(old: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.MultiIndex:
+    """
+    Eklenen, silinen ya da satır kümesi değişen key'ler.
+    """
+    if old is None or old.empty:
+        return new.index
+    joined = old.join(new, how="outer", lsuffix="_old", rsuffix="_new")
+    changed = (
+        joined["rows_old"].ne(joined["rows_new"])
+        | joined["signature_old"].ne(joined["signature_new"])
+        | joined["rows_old"].isna()
+        | joined["rows_new"].isna()
+    )
+    return joined.index[changed.to_numpy()]
+
+
+def _state_source(file: str) -> str:
+    # State dosyası → kaynak: "<tablo>", "<kaynak>_rows", "sig_<kaynak>_<kapsam>"
+    if file in INCREMENTAL_TABLES:
+        return INCREMENTAL_TABLES[file].source
+    return file[len("sig_"):].split("_", 1)[0] if file.startswith("sig_") else file.split("_", 1)[0]
+
+
+def _key_mask(df: pd.DataFrame, key_cols: List[str], keys: pd.Index) -> np.ndarray:
+    if len(key_cols) == 1:
+        return df[key_cols[0]].isin(keys.get_level_values(0)).to_numpy()
+    return pd.MultiIndex.from_frame(df[key_cols]).isin(keys)
+
+
+class IncrementalFeatureStore:
+    """
+    Per-malzeme / per-tedarikçi feature tablolarını, üretildikleri kaynak satırlar ve
+    key bazlı satır imzalarıyla birlikte diske yazar. Yeni çalıştırmada:
+    - imzası değişen (kirli) malzeme / tedarikçi key'leri bulunur
+    - sadece o key'lerin satırlarıyla compute_* fonksiyonları çalıştırılır
+    - sonuç satırları eski tablolara eklenip (silinen key'ler atılarak) group key
+      sırasına getirilir → tam hesapla birebir aynı tablo
+    Karışık tipli (int + str) key kolonları parquet'e string olarak yazılır; böyle bir
+    kaynağın tabloları ve imzaları yeniden açılışta yüklenmez (ilk update tam hesap).
+
+        store = IncrementalFeatureStore("data/feature_state")
+        store.update(sales_df=..., purchase_df=...)   # tam yeni export
+        store.append(purchase_delta=new_orders)        # sadece yeni satırlar
+    """
+
+    def __init__(self, state_dir: str):
+        self.state_dir = Path(state_dir)
+        self.tables: Dict[str, pd.DataFrame] = {}
+        self.sources: Dict[str, pd.DataFrame] = {}
+        self.signatures: Dict[str, pd.DataFrame] = {}
+        self._coerced: set = set()
+        self._load()
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def _path(self, name: str) -> Path:
+        return self.state_dir / f"{name}.parquet"
+
+    def _load(self) -> None:
+        manifest = self.state_dir / "manifest.json"
+        if not manifest.exists():
+            return
+        meta = json.loads(manifest.read_text(encoding="utf-8"))
+        # String'e çevrilmiş key'ler yeni export'un key'leriyle eşleşmez → bu kaynaklar tam hesap
+        coerced = meta.get("coerced", [])
+        stale = {_state_source(file) for file in coerced if not file.endswith("_rows")}
+        for name in meta.get("tables", []):
+            if INCREMENTAL_TABLES[name].source not in stale:
+                self.tables[name] = pd.read_parquet(self._path(name))
+        for src in meta.get("sources", []):
+            self.sources[src] = pd.read_parquet(self._path(f"{src}_rows"))
+        for name in meta.get("signatures", []):
+            if _state_source(f"sig_{name}") in stale:
+                continue
+            sig = pd.read_parquet(self._path(f"sig_{name}"))
+            keys = [c for c in sig.columns if c not in ("rows", "signature")]
+            self.signatures[name] = sig[["rows", "signature"]].set_axis(
+                pd.MultiIndex.from_frame(sig[keys])
+            )
+        self._coerced = {f for f in coerced if f.endswith("_rows") or _state_source(f) not in stale}
+
+    def _save(self, changed: List[str]) -> None:
+        from store.arrow import arrow_safe
+
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        for name in changed:
+            if name in INCREMENTAL_TABLES:
+                df, file = self.tables[name], name
+            elif name in SOURCES:
+                df, file = self.sources[name], f"{name}_rows"
+            else:
+                # Key'ler (MultiIndex) kolon olarak yazılır; arrow_safe onlara da uygulanır
+                df, file = self.signatures[name].reset_index(), f"sig_{name}"
+            safe = arrow_safe(df)
+            safe.to_parquet(self._path(file))
+            if safe is df:
+                self._coerced.discard(file)
+            else:
+                self._coerced.add(file)
+
+        manifest = {
+            "tables": sorted(self.tables),
+            "sources": sorted(self.sources),
+            "signatures": sorted(self.signatures),
+            "coerced": sorted(self._coerced),
+        }
+        (self.state_dir / "manifest.json").write_text(
+            json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+    # ---------------------------------------------------
+    # Recompute
+    # ---------------------------------------------------
+    def _recompute_table(
+        self, name: str, df: pd.DataFrame, key_cols: List[str], dirty: pd.MultiIndex
+    ) -> pd.DataFrame:
+        spec = INCREMENTAL_TABLES[name]
+        sort_by = spec.sort_by or key_cols
+        old = self.tables.get(name)
+
+        if old is None:
+            return spec.compute(df)
+
+        subset = df[_key_mask(df, key_cols, dirty)]
+        if spec.drops_na_key:
+            subset = subset[subset[key_cols].notna().all(axis=1)]
+
+        parts = [old[~_key_mask(old, key_cols, dirty)]]
+        if len(subset):
+            parts.append(spec.compute(subset))
+        return concat_partitions(parts, sort_by)
+
+    def update(
+        self,
+        sales_df: Optional[pd.DataFrame] = None,
+        purchase_df: Optional[pd.DataFrame] = None,
+    ) -> Dict[str, Any]:
+        """
+        Kaynakların güncel tam halini alır; kirli key'ler için tabloları yeniden hesaplar.
+        Dönüş: kaynak / kapsam başına kirli key sayısı ve güncellenen tablolar.
+        """
+        frames = {"sales": sales_df, "purchase": purchase_df}
+        report: Dict[str, Any] = {"dirty": {}, "tables": []}
+        changed: List[str] = []
+
+        for src, df in frames.items():
+            if df is None:
+                continue
+            df = df.reset_index(drop=True)
+
+            scopes = {spec.scope for spec in INCREMENTAL_TABLES.values() if spec.source == src}
+            for scope in sorted(scopes):
+                key_cols = scope_columns(scope, df.columns)
+                sig_name = f"{src}_{scope}"
+
+                with stage(f"features.incremental.{sig_name}.signatures", rows_in=len(df)):
+                    new_sig = group_signatures(df, key_cols)
+                    old_sig = self.signatures.get(sig_name)
+                    if old_sig is not None and list(old_sig.index.names) != key_cols:
+                        old_sig = None  # key tanımı değişti → tam hesap
+                        for name, spec in INCREMENTAL_TABLES.items():
+                            if spec.source == src and spec.scope == scope:
+                                self.tables.pop(name, None)
+                    dirty = dirty_keys(old_sig, new_sig)
+
+                report["dirty"][sig_name] = len(dirty)
+                self.signatures[sig_name] = new_sig
+                changed.append(sig_name)
+
+                for name, spec in INCREMENTAL_TABLES.items():
+                    if spec.source != src or spec.scope != scope:
+                        continue
+                    if name in self.tables and len(dirty) == 0:
+                        continue
+                    with stage(f"features.incremental.{name}", rows_in=len(df)):
+                        self.tables[name] = self._recompute_table(name, df, key_cols, dirty)
+                    changed.append(name)
+                    report["tables"].append(name)
+
+            self.sources[src] = df
+            changed.append(src)
+
+        self._save(changed)
+        return report
+
+    def append(
+        self,
+        sales_delta: Optional[pd.DataFrame] = None,
+        purchase_delta: Optional[pd.DataFrame] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sadece yeni gelen satırlar: saklanan kaynak satırlarının sonuna eklenir.
+        """
+        frames = {}
+        for src, delta in (("sales", sales_delta), ("purchase", purchase_delta)):
+            if delta is None:
+                continue
+            base = self.sources.get(src)
+            frames[src] = delta if base is None else pd.concat([base, delta], ignore_index=True)
+        return self.update(sales_df=frames.get("sales"), purchase_df=frames.get("purchase"))
+
+    def result_tables(self) -> Dict[str, pd.DataFrame]:
+        return dict(self.tables)
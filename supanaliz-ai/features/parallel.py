@@ -0,0 +1,324 @@
+# features/parallel.py
+
+from __future__ import annotations
+
+import itertools
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from agents.matching_engine import build_matching_table
+from monitoring import stage
+from .sales_features import (
+    compute_monthly_sales,
+    compute_sales_trend,
+    compute_seasonality,
+    compute_material_totals,
+    rank_top_performers,
+    rank_risky_decliners,
+)
+from .purchase_features import (
+    compute_material_features,
+    compute_supplier_features,
+    compute_price_trend,
+)
+from .profit_features import compute_profitability, assemble_profit_features
+from .abc_xyz import classify_abc_xyz
+
+
+# Tüm per-malzeme hesapların bağımsız olduğu varsayımıyla:
+# - parse edilmiş frame'ler Malzeme hash'ine göre parçalanır (aynı malzeme → aynı parça,
+#   satış ve satınalma tarafında da aynı parça)
+# - her parça process pool'da serial fonksiyonlarla hesaplanır
+# - sonuçlar birleştirilip group key'lere göre stabil sıralanır → serial çıktıyla birebir aynı
+#
+# Linux'ta tek thread'li süreçte worker'lar fork ile açılır; parse edilmiş frame'ler
+# module-global üzerinden copy-on-write paylaşılır, worker'a sadece satır index'leri gider.
+# Thread'li çağıranlarda (API threadpool, PipelineWatcher) ve fork olmayan platformlarda
+# pool forkserver/spawn ile açılır, parçalar pickle ile gönderilir.
+
+SALES_KEYS = {
+    "monthly_sales": ["Malzeme", "MalKodGrup", "YılAy"],
+    "trend": ["Malzeme", "MalKodGrup"],
+    "seasonality": ["Malzeme", "MalKodGrup", "Ay"],
+    "totals": ["Malzeme", "MalKodGrup"],
+}
+PURCHASE_KEYS = {
+    "material_features": ["Malzeme", "MalzemeGrup", "Birim"],
+    "price_trend": ["Malzeme", "MalzemeGrup"],
+}
+PROFIT_KEYS = {
+    "matching_table": ["Malzeme"],
+    "profit": ["Malzeme"],
+}
+
+_SHARED: Dict[int, Dict[str, pd.DataFrame]] = {}
+_SHARED_LOCK = threading.Lock()
+_TOKENS = itertools.count(1)
+
+
+def configured_workers() -> Optional[int]:
+    """
+    SUPANALIZ_FEATURE_WORKERS ortam değişkeni (tanımlı değilse None → serial mod).
+    """
+    env = os.environ.get("SUPANALIZ_FEATURE_WORKERS")
+    return max(1, int(env)) if env else None
+
+
+def default_workers() -> int:
+    return configured_workers() or os.cpu_count() or 1
+
+
+def partition_rows(materials: pd.Series, n_parts: int) -> Dict[int, np.ndarray]:
+    """
+    Malzeme koduna göre hash partition: parça no → satır pozisyonları (orijinal sırada).
+    Hash sadece koda bağlı olduğundan farklı frame'lerde aynı malzeme aynı parçaya düşer.
+    Malzemesi boş satırlar ilk malzemenin parçasına eklenir.
+    """
+    codes, uniques = pd.factorize(materials, sort=False)
+    if len(uniques) == 0:
+        return {0: np.arange(len(materials))} if len(materials) else {}
+
+    labels = np.asarray(pd.Index(uniques).astype(str), dtype=object)
+    part_of_code = (pd.util.hash_array(labels) % np.uint64(n_parts)).astype(np.int64)
+    part_of_row = np.where(codes >= 0, part_of_code[np.maximum(codes, 0)], part_of_code[0])
+
+    order = np.argsort(part_of_row, kind="stable")
+    bounds = np.searchsorted(part_of_row[order], np.arange(n_parts + 1))
+    return {
+        p: order[bounds[p]:bounds[p + 1]]
+        for p in range(n_parts)
+        if bounds[p + 1] > bounds[p]
+    }
+
+
+def concat_partitions(frames: Sequence[pd.DataFrame], sort_by: List[str]) -> pd.DataFrame:
+    """
+    Parça çıktılarını birleştirir ve serial groupby sırasına getirir.
+    Bir parçada tamamen boş kalan kolon dtype çıkarımını kaybeder (örn. str → object);
+    bu kolonlar dolu parçaların dtype'ına hizalanır.
+    """
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame()
+
+    ref: Dict[str, Any] = {}
+    for f in frames:
+        for col in f.columns:
+            if col not in ref and f[col].notna().any():
+                ref[col] = f[col].dtype
+
+    aligned = []
+    for f in frames:
+        casts = {
+            col: ref[col]
+            for col in f.columns
+            if col in ref and f[col].dtype != ref[col] and f[col].isna().all()
+        }
+        aligned.append(f.astype(casts) if casts else f)
+
+    out = pd.concat(aligned, ignore_index=True)
+    return out.sort_values(sort_by, kind="mergesort", ignore_index=True)
+
+
+# ---------------------------------------------------
+# Worker tarafı
+# ---------------------------------------------------
+def shared_frame(token: int, name: str, rows: Optional[np.ndarray], frame: Optional[pd.DataFrame]):
+    """
+    Worker içinde: pickle fallback'te gelen frame ya da fork ile paylaşılan frame'in satırları.
+    """
+    if frame is not None:
+        return frame
+    df = _SHARED[token][name]
+    return df if rows is None else df.take(rows)
+
+
+def _sales_part(token, rows, frame=None) -> Dict[str, pd.DataFrame]:
+    df = shared_frame(token, "sales", rows, frame)
+    return {
+        "monthly_sales": compute_monthly_sales(df),
+        "trend": compute_sales_trend(df),
+        "seasonality": compute_seasonality(df),
+        "totals": compute_material_totals(df),
+    }
+
+
+def _purchase_part(token, rows, frame=None) -> Dict[str, pd.DataFrame]:
+    df = shared_frame(token, "purchase", rows, frame)
+    return {
+        "material_features": compute_material_features(df),
+        "price_trend": compute_price_trend(df),
+    }
+
+
+def _supplier_all(token, rows, frame=None) -> Dict[str, pd.DataFrame]:
+    # Tedarikçi bazlı tablo malzemeye göre parçalanamaz; tek task olarak çalışır
+    return {"supplier_features": compute_supplier_features(shared_frame(token, "purchase", rows, frame))}
+
+
+def _profit_part(token, rows, frame=None) -> Dict[str, pd.DataFrame]:
+    sales_rows, purchase_rows = rows
+    sales, purchase = frame if frame is not None else (None, None)
+    sales = shared_frame(token, "sales", sales_rows, sales)
+    purchase = shared_frame(token, "purchase", purchase_rows, purchase)
+    matching = build_matching_table(sales, purchase)
+    return {"matching_table": matching, "profit": compute_profitability(matching)}
+
+
+# ---------------------------------------------------
+# Pool
+# ---------------------------------------------------
+def _pool_context():
+    """
+    fork sadece tek thread'li süreçte güvenli: başka bir thread'in tuttuğu kilitler
+    (ResultCache, TableStore, _SHARED_LOCK, pandas/BLAS) çocuğa kilitli kopyalanır.
+    Diğer durumlarda temiz bir süreçten açılan forkserver (yoksa spawn) kullanılır;
+    bu yolda worker'lar ana modülü yeniden import eder, script'lerde
+    `if __name__ == "__main__":` koruması gerekir (uvicorn CLI'da zaten var).
+    """
+    methods = mp.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return mp.get_context("fork")
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def run_tasks(
+    frames: Dict[str, pd.DataFrame],
+    tasks: List[tuple],
+    workers: int,
+) -> List[Dict[str, pd.DataFrame]]:
+    """
+    tasks: (fonksiyon, satırlar, pickle fallback'te gönderilecek frame üretici)
+    fonksiyon(token, satırlar[, frame]) worker'da shared_frame ile girdisine erişir.
+    """
+    ctx = _pool_context() if workers > 1 and len(tasks) > 1 else None
+    if ctx is not None and ctx.get_start_method() != "fork":
+        with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=ctx) as ex:
+            futures = [ex.submit(fn, 0, rows, make()) for fn, rows, make in tasks]
+            return [f.result() for f in futures]
+
+    token = next(_TOKENS)
+    with _SHARED_LOCK:
+        _SHARED[token] = frames
+    try:
+        if ctx is None:
+            return [fn(token, rows) for fn, rows, _ in tasks]
+
+        # Worker'lar executor'a ilk submit'te fork edilir → _SHARED[token]'ı görür
+        with ProcessPoolExecutor(min(workers, len(tasks)), mp_context=ctx) as ex:
+            futures = [ex.submit(fn, token, rows) for fn, rows, _ in tasks]
+            return [f.result() for f in futures]
+    finally:
+        with _SHARED_LOCK:
+            _SHARED.pop(token, None)
+
+
+def _take(df: pd.DataFrame, rows: Optional[np.ndarray]) -> Callable[[], pd.DataFrame]:
+    return lambda: df if rows is None else df.take(rows)
+
+
+def _resolve(workers: Optional[int], partitions: Optional[int]) -> tuple:
+    workers = default_workers() if workers is None else max(1, workers)
+    # Zipf dağılımlı malzeme yükünü dengelemek için worker başına birkaç parça
+    partitions = partitions or workers * 4
+    return workers, partitions
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+def build_sales_features_parallel(
+    sales_df: pd.DataFrame,
+    workers: Optional[int] = None,
+    partitions: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    build_sales_features ile birebir aynı çıktıyı malzeme parçaları üzerinde paralel üretir.
+    """
+    workers, partitions = _resolve(workers, partitions)
+
+    with stage("features.parallel.sales", rows_in=len(sales_df)):
+        parts = partition_rows(sales_df["Malzeme"], partitions)
+        tasks = [(_sales_part, rows, _take(sales_df, rows)) for rows in parts.values()]
+        results = run_tasks({"sales": sales_df}, tasks, workers)
+
+        out = {
+            name: concat_partitions([r[name] for r in results], keys)
+            for name, keys in SALES_KEYS.items()
+        }
+
+    return {
+        "monthly_sales": out["monthly_sales"],
+        "trend": out["trend"],
+        "seasonality": out["seasonality"],
+        "top_performers": rank_top_performers(out["totals"]),
+        "risky_decliners": rank_risky_decliners(out["trend"]),
+        # ABC payları katalog geneli; birleştirilmiş aylık tablodan hesaplanır
+        "abc_xyz": classify_abc_xyz(out["monthly_sales"]),
+    }
+
+
+def build_purchase_features_parallel(
+    purchase_df: pd.DataFrame,
+    workers: Optional[int] = None,
+    partitions: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    build_purchase_features ile birebir aynı çıktı; tedarikçi tablosu ayrı bir task.
+    """
+    workers, partitions = _resolve(workers, partitions)
+
+    with stage("features.parallel.purchase", rows_in=len(purchase_df)):
+        parts = partition_rows(purchase_df["Malzeme"], partitions)
+        tasks = [(_supplier_all, None, _take(purchase_df, None))]
+        tasks += [(_purchase_part, rows, _take(purchase_df, rows)) for rows in parts.values()]
+        results = run_tasks({"purchase": purchase_df}, tasks, workers)
+
+        supplier = results[0]["supplier_features"]
+        out = {
+            name: concat_partitions([r[name] for r in results[1:]], keys)
+            for name, keys in PURCHASE_KEYS.items()
+        }
+
+    return {
+        "material_features": out["material_features"],
+        "supplier_features": supplier,
+        "price_trend": out["price_trend"],
+    }
+
+
+def build_profit_features_parallel(
+    sales_df: pd.DataFrame,
+    purchase_df: pd.DataFrame,
+    workers: Optional[int] = None,
+    partitions: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    build_profit_features ile birebir aynı çıktı. İki taraf aynı hash ile parçalandığı için
+    bir malzemenin satış ve satınalma satırları aynı parçada eşleşir.
+    """
+    workers, partitions = _resolve(workers, partitions)
+
+    with stage("features.parallel.profit", rows_in=len(sales_df) + len(purchase_df)):
+        sales_parts = partition_rows(sales_df["Malzeme"], partitions)
+        purchase_parts = partition_rows(purchase_df["Malzeme"], partitions)
+
+        empty = np.empty(0, dtype=np.int64)
+        tasks = []
+        for p in sorted(set(sales_parts) | set(purchase_parts)):
+            rows = (sales_parts.get(p, empty), purchase_parts.get(p, empty))
+            make = (lambda r=rows: (sales_df.take(r[0]), purchase_df.take(r[1])))
+            tasks.append((_profit_part, rows, make))
+
+        results = run_tasks({"sales": sales_df, "purchase": purchase_df}, tasks, workers)
+
+        matching_df = concat_partitions([r["matching_table"] for r in results], PROFIT_KEYS["matching_table"])
+        profit_df = concat_partitions([r["profit"] for r in results], PROFIT_KEYS["profit"])
+
+    return assemble_profit_features(matching_df, profit_df)
@@ -0,0 +1,185 @@
+# supanaliz-ai/features/price_anomalies.py
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from monitoring import instrument, stage
+
+
+# Robust z (Iglewicz-Hoaglin): 0.6745 · (x - medyan) / MAD; |z| > eşik → anomali.
+# Fiyat log10 ölçeğinde değerlendirilir: birim / veri girişi hataları çarpımsaldır (×1000 vb.)
+ANOMALY_THRESHOLD = 3.5
+MAD_Z_FACTOR = 0.6745
+# MAD tabanı (log10, ~%12): küçük gruplarda MAD çok küçük kalır ve olağan fiyat
+# oynaklığı anomali sayılırdı; taban ile ~2 kat ve üzeri sapmalar yakalanır
+MAD_FLOOR = 0.05
+# Grupta (malzeme × birim) en az bu kadar geçerli satır yoksa satır değerlendirilmez
+MIN_GROUP_LINES = 5
+PRICE_GROUP_KEYS = ("Malzeme", "Birim")
+
+ANOMALY_COLUMNS = [
+    "price_median_usd",
+    "price_robust_z",
+    "price_anomaly",
+    "price_anomaly_direction",
+]
+
+
+def _group_codes(df: pd.DataFrame, keys: Sequence[str]) -> np.ndarray:
+    return df.groupby(list(keys), dropna=False, sort=False).ngroup().to_numpy()
+
+
+def _rolling_median(values: pd.Series, codes: np.ndarray, order: np.ndarray, window: int) -> np.ndarray:
+    """
+    Grup içi, sipariş tarihine göre ortalanmış rolling medyan (Hampel penceresi).
+    """
+    sorted_values = pd.Series(values.to_numpy()[order])
+    med = (
+        sorted_values.groupby(codes[order], sort=False)
+        .rolling(window, center=True, min_periods=1)
+        .median()
+        .reset_index(level=0, drop=True)
+        .sort_index()
+        .to_numpy()
+    )
+    out = np.empty(len(values))
+    out[order] = med
+    return out
+
+
+@instrument("features.price_anomalies.detect")
+def detect_price_anomalies(
+    purchase_df: pd.DataFrame,
+    threshold: float = ANOMALY_THRESHOLD,
+    window: Optional[int] = None,
+    min_lines: int = MIN_GROUP_LINES,
+    group_keys: Sequence[str] = PRICE_GROUP_KEYS,
+) -> pd.DataFrame:
+    """
+    Satınalma satırı başına Birim Maliyet USD anomali bayrağı (index purchase_df ile aynı).
+    - window None: grup (Malzeme × Birim) medyan / MAD'i, groupby transform ile
+    - window N: grup içinde sipariş tarihine göre ortalanmış N satırlık rolling medyan /
+      MAD (fiyat seviyesi zamanla değişen malzemeler için)
+    Sıfır / negatif / boş fiyat "invalid" olarak işaretlenir.
+    Kolonlar: price_median_usd, price_robust_z, price_anomaly, price_anomaly_direction
+    """
+    if threshold <= 0:
+        raise ValueError("Anomali eşiği pozitif olmalı.")
+    if window is not None and window < 3:
+        raise ValueError("Rolling pencere en az 3 satır olmalı.")
+
+    price = pd.to_numeric(purchase_df["Birim Maliyet USD"], errors="coerce")
+    valid = (price > 0).to_numpy()
+    log_price = pd.Series(np.where(valid, np.log10(price.where(valid, 1.0)), np.nan))
+
+    codes = _group_codes(purchase_df, group_keys)
+    counts = np.bincount(codes[valid], minlength=codes.max() + 1 if len(codes) else 0)
+    enough = counts[codes] >= min_lines if len(codes) else np.zeros(0, dtype=bool)
+
+    if window is None:
+        by_group = log_price.groupby(codes, sort=False)
+        median = by_group.transform("median").to_numpy()
+        deviation = pd.Series(np.abs(log_price.to_numpy() - median))
+        mad = deviation.groupby(codes, sort=False).transform("median").to_numpy()
+    else:
+        dates = purchase_df["Sipariş Tarihi"].to_numpy()
+        order = np.lexsort((np.arange(len(codes)), dates, codes))
+        median = _rolling_median(log_price, codes, order, window)
+        deviation = pd.Series(np.abs(log_price.to_numpy() - median))
+        mad = _rolling_median(deviation, codes, order, window)
+
+    with np.errstate(invalid="ignore"):
+        z = MAD_Z_FACTOR * (log_price.to_numpy() - median) / np.maximum(mad, MAD_FLOOR)
+    z = np.where(valid & enough, z, np.nan)
+    outlier = np.abs(np.nan_to_num(z)) > threshold
+
+    direction = np.select(
+        [~valid, outlier & (z > 0), outlier & (z < 0)], ["invalid", "high", "low"], ""
+    ).astype(object)
+    direction[direction == ""] = None
+
+    return pd.DataFrame(
+        {
+            "price_median_usd": np.where(enough, np.power(10.0, median), np.nan),
+            "price_robust_z": z,
+            "price_anomaly": outlier | ~valid,
+            "price_anomaly_direction": direction,
+        },
+        index=purchase_df.index,
+    )
+
+
+def flag_price_anomalies(purchase_df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """
+    purchase_df + anomali kolonları (kopya).
+    """
+    return purchase_df.join(detect_price_anomalies(purchase_df, **kwargs))
+
+
+def drop_price_anomalies(purchase_df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """
+    Anomali satırları çıkarılmış purchase_df; maliyet agregasyonlarından önce kullanılır.
+    """
+    flags = detect_price_anomalies(purchase_df, **kwargs)
+    return purchase_df[~flags["price_anomaly"].to_numpy()]
+
+
+def supplier_anomaly_report(flagged: pd.DataFrame) -> pd.DataFrame:
+    """
+    flag_price_anomalies çıktısından tedarikçi bazlı anomali özeti
+    (tedarikçi kolonları yoksa MalzemeGrup bazında).
+    """
+    if "Tedarikçi Num." in flagged.columns:
+        keys = ["Tedarikçi Num.", "İsim"]
+    else:
+        keys = ["MalzemeGrup"]
+
+    df = flagged.assign(
+        _spend=flagged["Kalem Toplam USD"].where(flagged["price_anomaly"], 0.0),
+        _high=flagged["price_anomaly_direction"].eq("high"),
+        _low=flagged["price_anomaly_direction"].eq("low"),
+        _invalid=flagged["price_anomaly_direction"].eq("invalid"),
+        _abs_z=flagged["price_robust_z"].abs(),
+    )
+    report = (
+        df.groupby(keys, dropna=False)
+        .agg(
+            line_count=("price_anomaly", "size"),
+            anomaly_lines=("price_anomaly", "sum"),
+            high_lines=("_high", "sum"),
+            low_lines=("_low", "sum"),
+            invalid_lines=("_invalid", "sum"),
+            anomaly_spend_usd=("_spend", "sum"),
+            total_spend_usd=("Kalem Toplam USD", "sum"),
+            max_abs_z=("_abs_z", "max"),
+        )
+        .reset_index()
+    )
+    report["anomaly_ratio"] = report["anomaly_lines"] / report["line_count"]
+    return report.sort_values(
+        ["anomaly_lines", "anomaly_spend_usd"], ascending=False, kind="stable", ignore_index=True
+    )
+
+
+def price_anomaly_report(purchase_df: pd.DataFrame, **kwargs) -> Dict[str, Any]:
+    """
+    Tek geçişte: satır bayrakları, anomali satırları ve tedarikçi özeti.
+    """
+    with stage("features.price_anomalies.report", rows_in=len(purchase_df)):
+        flagged = flag_price_anomalies(purchase_df, **kwargs)
+        lines = flagged[flagged["price_anomaly"]]
+        suppliers = supplier_anomaly_report(flagged)
+
+    return {
+        "meta": {
+            "lines": len(flagged),
+            "anomaly_lines": len(lines),
+            "anomaly_spend_usd": float(lines["Kalem Toplam USD"].sum()),
+        },
+        "lines": lines,
+        "suppliers": suppliers,
+    }
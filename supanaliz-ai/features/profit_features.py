@@ -3,12 +3,19 @@
 import pandas as pd
 import numpy as np
 from typing import Dict, Any
-from agents.matching_engine import build_matching_table, summarize_matching
+from agents.matching_engine import (
+    build_matching_table,
+    build_matching_table_from_partials,
+    summarize_matching,
+)
+from compute.partials import MaterialPartials
+from monitoring import instrument
 
 
 # ---------------------------------------------------
 # 1) KÂR HESABI
 # ---------------------------------------------------
+@instrument("features.profit.compute_profitability")
 def compute_profitability(matching_df: pd.DataFrame) -> pd.DataFrame:
     df = matching_df.copy()
 
@@ -64,13 +71,39 @@ def compute_profitability(matching_df: pd.DataFrame) -> pd.DataFrame:
 # ---------------------------------------------------
 # 2) ANA FONKSİYON
 # ---------------------------------------------------
-def build_profit_features(sales_df: pd.DataFrame, purchase_df: pd.DataFrame) -> Dict[str, Any]:
+@instrument("features.profit.build_profit_features")
+def build_profit_features(
+    sales_df: pd.DataFrame, purchase_df: pd.DataFrame, backend=None
+) -> Dict[str, Any]:
 
-    matching_df = build_matching_table(sales_df, purchase_df)
-    base_summary = summarize_matching(matching_df)
+    matching_df = build_matching_table(sales_df, purchase_df, backend=backend)
+    profit_df = compute_profitability(matching_df)
+
+    return assemble_profit_features(matching_df, profit_df)
+
+
+@instrument("features.profit.build_profit_features_from_partials")
+def build_profit_features_from_partials(
+    sales_partials: MaterialPartials, purchase_partials: MaterialPartials
+) -> Dict[str, Any]:
+    """
+    build_profit_features'ın partial (map-reduce) karşılığı: chunk / yıl bazında
+    üretilip birleştirilmiş partial'lardan, sınırlı bellekle.
+    """
 
+    matching_df = build_matching_table_from_partials(sales_partials, purchase_partials)
     profit_df = compute_profitability(matching_df)
 
+    return assemble_profit_features(matching_df, profit_df)
+
+
+def assemble_profit_features(matching_df: pd.DataFrame, profit_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Eşleştirme + kâr tablosundan özet, core set, stokout ve sıralamaları üretir.
+    (Paralel yol da malzeme parçalarını birleştirdikten sonra bunu çağırır.)
+    """
+    base_summary = summarize_matching(matching_df)
+
     # Core set = satış + satınalma + maliyet kolonları dolu
     core_mask = (
         profit_df["has_sales"]
@@ -110,6 +143,7 @@ def build_profit_features(sales_df: pd.DataFrame, purchase_df: pd.DataFrame) ->
 
     return {
         "matching_summary": summary,
+        "matching_table": matching_df,
         "product_profit": profit_core,
         "stokout_candidates": stokout_df,
         "top_profitable": top_profitable,
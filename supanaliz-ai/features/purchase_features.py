@@ -4,6 +4,10 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any
 
+from compute import get_backend, source_columns
+from monitoring import instrument
+from .price_anomalies import drop_price_anomalies
+
 
 def _prepare_purchase_base(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -45,6 +49,7 @@ def _prepare_purchase_base(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@instrument("features.purchase.compute_material_features")
 def compute_material_features(purchase_df: pd.DataFrame) -> pd.DataFrame:
     """
     Ürün (Malzeme) bazlı özellikler:
@@ -90,7 +95,8 @@ def compute_material_features(purchase_df: pd.DataFrame) -> pd.DataFrame:
     return agg
 
 
-def compute_supplier_features(purchase_df: pd.DataFrame) -> pd.DataFrame:
+@instrument("features.purchase.compute_supplier_features")
+def compute_supplier_features(purchase_df: pd.DataFrame, backend=None) -> pd.DataFrame:
     """
     Tedarikçi bazlı özellikler:
     - toplam satır sayısı
@@ -101,64 +107,47 @@ def compute_supplier_features(purchase_df: pd.DataFrame) -> pd.DataFrame:
     - gecikme / uzun lead time oranı
     - teslimi olmayan satır oranı
     - tedarikçi risk skoru (0-100)
+    purchase_df: parse edilmiş DataFrame ya da Parquet yolu; backend → compute.get_backend
     """
-    df = _prepare_purchase_base(purchase_df)
-
     # Tedarikçi kolonları yoksa, sadece MalzemeGrup üzerinden analiz yapılır
-    if "Tedarikçi Num." in df.columns:
+    if "Tedarikçi Num." in source_columns(purchase_df):
         supplier_cols = ["Tedarikçi Num.", "İsim"]
     else:
         supplier_cols = ["MalzemeGrup"]  # fall-back
 
-    # Teslimi hiç olmayanları ayır
-    no_delivery = df["Lead Time (days)"].isna()
-
-    # "Uzun lead time" tanımı: 30+ gün (isteğe göre değiştirilebilir)
-    long_lead = df["Lead Time (days)"] >= 30
-
-    grouped = df.groupby(supplier_cols, dropna=False)
-
-    agg = grouped.agg(
-        line_count=("Sipariş Miktarı", "size"),
-        total_qty=("Sipariş Miktarı", "sum"),
-        total_cost_usd=("Kalem Toplam USD", "sum"),
-        avg_unit_cost_usd=("Birim Maliyet USD", "mean"),
-        avg_lead_time_days=("Lead Time (days)", "mean"),
-        median_lead_time=("Lead Time (days)", "median"),
-        max_lead_time=("Lead Time (days)", "max"),
-        long_lead_count=("Lead Time (days)", lambda x: (x >= 30).sum()),
-        no_delivery_count=("Lead Time (days)", lambda x: x.isna().sum()),
-    ).reset_index()
+    # Satır seviyesindeki aggregation backend'de ("uzun lead time" = 30+ gün)
+    agg = get_backend(backend).supplier_aggregates(purchase_df, supplier_cols)
 
     # Oranlar
     agg["long_lead_ratio"] = agg["long_lead_count"] / agg["line_count"]
     agg["no_delivery_ratio"] = agg["no_delivery_count"] / agg["line_count"]
 
-    # Tedarikçi risk skoru:
-    # - uzun lead time oranı (ağırlık 0.6)
-    # - teslim yok oranı (ağırlık 0.4)
-    # - ortalama lead time (normalize, 60 gün ve üzeri = max risk)
-    lead_norm = (
-        agg["avg_lead_time_days"]
-        .fillna(0)
-        .clip(lower=0, upper=60) / 60.0
+    agg["supplier_risk_score"] = supplier_risk_score(
+        agg["long_lead_ratio"], agg["no_delivery_ratio"], agg["avg_lead_time_days"]
     )
 
-    agg["supplier_risk_score"] = (
-        0.6 * agg["long_lead_ratio"].fillna(0)
-        + 0.4 * agg["no_delivery_ratio"].fillna(0)
-        + 0.5 * lead_norm
-    )
+    return agg
 
-    agg["supplier_risk_score"] = (
-        agg["supplier_risk_score"]
-        .clip(lower=0, upper=2.0)  # kaba güvenlik
-        .pipe(lambda s: (s / 2.0) * 100)  # 0-100 skalası
-    )
 
-    return agg
+def supplier_risk_score(long_lead_ratio, no_delivery_ratio, avg_lead_time_days) -> np.ndarray:
+    """
+    Tedarikçi risk skoru (0-100); Series ya da NumPy dizileri üzerinde:
+    - uzun lead time oranı (ağırlık 0.6)
+    - teslim yok oranı (ağırlık 0.4)
+    - ortalama lead time (normalize, 60 gün ve üzeri = max risk)
+    Boş değerler 0 sayılır.
+    """
+    long_lead = np.nan_to_num(np.asarray(long_lead_ratio, dtype=float), nan=0.0)
+    no_delivery = np.nan_to_num(np.asarray(no_delivery_ratio, dtype=float), nan=0.0)
+    lead = np.nan_to_num(np.asarray(avg_lead_time_days, dtype=float), nan=0.0)
+    lead_norm = np.clip(lead, 0, 60) / 60.0
 
+    score = 0.6 * long_lead + 0.4 * no_delivery + 0.5 * lead_norm
+    # kaba güvenlik + 0-100 skalası
+    return np.clip(score, 0, 2.0) / 2.0 * 100
 
+
+@instrument("features.purchase.compute_price_trend")
 def compute_price_trend(purchase_df: pd.DataFrame) -> pd.DataFrame:
     """
     Malzeme bazında aylık ortalama birim maliyet (USD) üzerinden
@@ -227,9 +216,14 @@ def compute_price_trend(purchase_df: pd.DataFrame) -> pd.DataFrame:
 
 
 
-def build_purchase_features(purchase_df: pd.DataFrame) -> Dict[str, Any]:
+@instrument("features.purchase.build_purchase_features")
+def build_purchase_features(
+    purchase_df: pd.DataFrame, backend=None, exclude_price_anomalies: bool = False
+) -> Dict[str, Any]:
     """
     Purchase tarafındaki tüm feature özetlerini tek noktadan üretir.
+    exclude_price_anomalies: birim fiyatı robust z ile anomali çıkan satırlar
+    (bkz. price_anomalies) maliyet agregasyonlarından önce çıkarılır.
     Output JSON-friendly dict yapısı:
     {
         "material_features": [...],
@@ -237,8 +231,11 @@ def build_purchase_features(purchase_df: pd.DataFrame) -> Dict[str, Any]:
         "price_trend": [...],
     }
     """
+    if exclude_price_anomalies:
+        purchase_df = drop_price_anomalies(purchase_df)
+
     material_fe = compute_material_features(purchase_df)
-    supplier_fe = compute_supplier_features(purchase_df)
+    supplier_fe = compute_supplier_features(purchase_df, backend=backend)
     price_trend_fe = compute_price_trend(purchase_df)
 
     return {
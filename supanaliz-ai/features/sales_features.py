@@ -4,6 +4,10 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any
 
+from compute import get_backend
+from monitoring import instrument
+from .abc_xyz import classify_abc_xyz
+
 
 def _prepare_sales_base(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -42,32 +46,24 @@ def _prepare_sales_base(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def compute_monthly_sales(df: pd.DataFrame) -> pd.DataFrame:
+@instrument("features.sales.compute_monthly_sales")
+def compute_monthly_sales(df, backend=None) -> pd.DataFrame:
     """
     Aylık satış hacmi, miktar ve USD bazlı satış toplamları.
+    df: parse edilmiş DataFrame ya da Parquet yolu (duckdb backend'i out-of-core tarar).
+    backend: "pandas" | "duckdb" | ComputeBackend (None → SUPANALIZ_COMPUTE_BACKEND).
     """
 
-    df = _prepare_sales_base(df)
-
-    monthly = (
-        df.groupby(["Malzeme", "MalKodGrup", "YılAy"], dropna=False)
-        .agg(
-            total_qty=("Miktar", "sum"),
-            total_sales_usd=("Genel Toplam (USD)", "sum"),
-            avg_unit_price_usd=("unit_price_usd", "mean"),
-        )
-        .reset_index()
-    )
-
-    return monthly
+    return get_backend(backend).monthly_sales(df)
 
 
-def compute_sales_trend(df: pd.DataFrame) -> pd.DataFrame:
+@instrument("features.sales.compute_sales_trend")
+def compute_sales_trend(df: pd.DataFrame, backend=None) -> pd.DataFrame:
     """
     Malzeme bazında zaman içinde USD satış trendi (slope).
     """
 
-    monthly = compute_monthly_sales(df)
+    monthly = compute_monthly_sales(df, backend=backend)
     monthly = monthly.sort_values(["Malzeme", "MalKodGrup", "YılAy"])
 
     # Time index malzeme bazında verilecek
@@ -114,6 +110,7 @@ def compute_sales_trend(df: pd.DataFrame) -> pd.DataFrame:
     return trend_df
 
 
+@instrument("features.sales.compute_seasonality")
 def compute_seasonality(df: pd.DataFrame) -> pd.DataFrame:
     """
     Ay bazlı mevsimsellik matrisi:
@@ -146,49 +143,77 @@ def compute_seasonality(df: pd.DataFrame) -> pd.DataFrame:
     return season
 
 
+@instrument("features.sales.compute_top_performers")
 def compute_top_performers(df: pd.DataFrame, n=20) -> pd.DataFrame:
     """
     USD bazlı en çok satan ürünler.
     """
 
+    totals = compute_material_totals(df)
+    return rank_top_performers(totals, n)
+
+
+def compute_material_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Malzeme + grup bazında toplam miktar / USD satış / ortalama birim fiyat.
+    """
+
     df = _prepare_sales_base(df)
 
-    rank = (
+    totals = (
         df.groupby(["Malzeme", "MalKodGrup"], dropna=False)
         .agg(
             total_qty=("Miktar", "sum"),
             total_sales_usd=("Genel Toplam (USD)", "sum"),
             avg_unit_price_usd=("unit_price_usd", "mean"),
         )
-        .sort_values("total_sales_usd", ascending=False)
-        .head(n)
         .reset_index()
     )
 
-    return rank
+    return totals
+
+
+def rank_top_performers(totals: pd.DataFrame, n=20) -> pd.DataFrame:
+    """
+    compute_material_totals çıktısından USD satışa göre ilk n ürün.
+    """
+
+    return (
+        totals.sort_values("total_sales_usd", ascending=False)
+        .head(n)
+        .reset_index(drop=True)
+    )
 
 
-def compute_risky_decliners(df: pd.DataFrame, n=20) -> pd.DataFrame:
+@instrument("features.sales.compute_risky_decliners")
+def compute_risky_decliners(df: pd.DataFrame, n=20, backend=None) -> pd.DataFrame:
     """
     Düşüş trendi olan ürünlerden en riskli olanlar.
     """
 
-    trend_df = compute_sales_trend(df)
-    risky = trend_df.sort_values("sales_trend_slope").head(n)
+    trend_df = compute_sales_trend(df, backend=backend)
+    return rank_risky_decliners(trend_df, n)
+
+
+def rank_risky_decliners(trend_df: pd.DataFrame, n=20) -> pd.DataFrame:
+    """
+    compute_sales_trend çıktısından en negatif slope'lu n ürün.
+    """
 
-    return risky
+    return trend_df.sort_values("sales_trend_slope").head(n)
 
 
-def build_sales_features(sales_df: pd.DataFrame) -> Dict[str, Any]:
+@instrument("features.sales.build_sales_features")
+def build_sales_features(sales_df: pd.DataFrame, backend=None) -> Dict[str, Any]:
     """
     Tüm satış features’larını tek fonksiyonla üretir.
     """
 
-    monthly = compute_monthly_sales(sales_df)
-    trend = compute_sales_trend(sales_df)
+    monthly = compute_monthly_sales(sales_df, backend=backend)
+    trend = compute_sales_trend(sales_df, backend=backend)
     season = compute_seasonality(sales_df)
     top = compute_top_performers(sales_df)
-    risky = compute_risky_decliners(sales_df)
+    risky = compute_risky_decliners(sales_df, backend=backend)
 
     return {
         "monthly_sales": monthly,
@@ -196,4 +221,5 @@ def build_sales_features(sales_df: pd.DataFrame) -> Dict[str, Any]:
         "seasonality": season,
         "top_performers": top,
         "risky_decliners": risky,
+        "abc_xyz": classify_abc_xyz(monthly),
     }
@@ -0,0 +1,269 @@
+# features/scenarios.py
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from parser.fx_engine import BASE_CURRENCY, normalize_currency, purchase_currency_column
+from monitoring import instrument, stage
+from .profit_features import build_profit_features
+
+
+@dataclass
+class Scenario:
+    """
+    Tek what-if senaryosu. Oranlar ondalık: -0.20 = %20 düşüş.
+    - fx_shock: TRY'nin USD karşısındaki değer değişimi (-0.20 → USDTRY / 0.80)
+    - fx_from: "YYYY-MM"; kur şoku bu aydan itibaren verilen siparişlere uygulanır
+      (None → tüm dönem)
+    - pass_through: kur hareketinin TL fiyatlara yansıyan oranı (0 → TL fiyatlar sabit)
+    - cost_shock: TL alış fiyatlarında değişim
+    - sales_shock: USD satış fiyatlarında değişim
+    - groups: cost_shock / sales_shock'un uygulanacağı gruplar (MalzemeGrup ya da
+      MalKodGrup); None → tüm malzemeler
+    """
+    name: str
+    fx_shock: float = 0.0
+    fx_from: Optional[str] = None
+    pass_through: float = 0.0
+    cost_shock: float = 0.0
+    sales_shock: float = 0.0
+    groups: Optional[List[str]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ScenarioResult:
+    """
+    Senaryo × malzeme matrisleri (satır sırası: scenarios, kolon sırası: materials).
+    """
+    scenarios: List[Scenario]
+    materials: pd.Index
+    base: pd.DataFrame  # product_profit (core set), materials sırasında
+    total_profit: np.ndarray
+    margin_pct: np.ndarray
+    rank: np.ndarray  # toplam kâra göre 1 = en kârlı
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Senaryo başına: toplam kâr, medyan marj, zarar eden malzeme sayısı,
+        baz senaryoya göre kârdan zarara dönen malzeme sayısı.
+        """
+        base_profit = self.base["total_profit_usd"].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            flipped = (base_profit > 0) & (self.total_profit <= 0)
+            median_margin = np.nanmedian(self.margin_pct, axis=1) if self.margin_pct.size else []
+        return pd.DataFrame(
+            {
+                "scenario": [s.name for s in self.scenarios],
+                "total_profit_usd": np.nansum(self.total_profit, axis=1),
+                "delta_profit_usd": np.nansum(self.total_profit, axis=1) - np.nansum(base_profit),
+                "median_margin_pct": median_margin,
+                "loss_materials": (self.total_profit < 0).sum(axis=1),
+                "flipped_to_loss": flipped.sum(axis=1),
+            }
+        )
+
+    def distribution(self, quantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> pd.DataFrame:
+        """
+        Malzeme başına senaryolar üzerinden dağılım: kâr / marj / sıra quantile'ları
+        ve zarar olasılığı (zarar eden senaryo oranı).
+        """
+        q = np.asarray(quantiles, dtype=float)
+        out = pd.DataFrame({"Malzeme": self.materials})
+        for col in ("MalKodGrup", "MalzemeGrup"):
+            if col in self.base.columns:
+                out[col] = self.base[col].to_numpy()
+        out["base_total_profit_usd"] = self.base["total_profit_usd"].to_numpy()
+        out["base_profit_margin_pct"] = self.base["profit_margin_pct"].to_numpy()
+
+        for name, matrix in (
+            ("total_profit_usd", self.total_profit),
+            ("profit_margin_pct", self.margin_pct),
+            ("rank", self.rank.astype(float)),
+        ):
+            with np.errstate(invalid="ignore"):
+                values = np.nanquantile(matrix, q, axis=0) if len(matrix) else np.full((len(q), len(out)), np.nan)
+            for qi, v in zip(q, values):
+                out[f"{name}_p{int(round(qi * 100)):02d}"] = v
+        out["loss_probability"] = (self.total_profit < 0).mean(axis=0) if len(self.total_profit) else np.nan
+        return out
+
+    def scenario_table(self, index: int) -> pd.DataFrame:
+        """
+        Tek senaryonun malzeme tablosu (product_profit kolon isimleriyle).
+        """
+        out = pd.DataFrame({"Malzeme": self.materials})
+        out["total_profit_usd"] = self.total_profit[index]
+        out["profit_margin_pct"] = self.margin_pct[index]
+        out["profit_rank"] = self.rank[index]
+        return out
+
+
+class ScenarioEngine:
+    """
+    build_profit_features'ı yeniden çalıştırmadan, önceden hesaplanmış maliyet
+    bazları üzerinde yüzlerce senaryoyu tek seferde hesaplar.
+
+    Malzeme başına maliyet (USD) iki parçaya ayrılır:
+    - TL fiyatlı siparişlerin sipariş ayı bazında USD tutarları (M × ay matrisi)
+    - kurdan etkilenmeyen kısım (TRY dışı para birimleri / tarihsiz satırlar)
+    Senaryo başına ay faktörleri F (S × ay) ve malzeme faktörleri C (S × M) ile:
+
+        maliyet[s, m] = sabit[m] + C[s, m] * Σ_ay F[s, ay] * TL_usd[m, ay]
+
+    (tek matris çarpımı). Satış tutarları USD'dir; sadece sales_shock uygulanır.
+    Kâr / marj formülleri compute_profitability ile aynıdır.
+    """
+
+    def __init__(
+        self,
+        base: pd.DataFrame,
+        try_cost: np.ndarray,
+        fixed_cost: np.ndarray,
+        months: pd.PeriodIndex,
+    ):
+        self.base = base.reset_index(drop=True)
+        self.materials = pd.Index(self.base["Malzeme"])
+        self.try_cost = try_cost
+        self.fixed_cost = fixed_cost
+        self.months = months
+
+        self.sales_qty = self.base["total_sales_qty"].to_numpy(dtype=float)
+        self.sales_usd = self.base["total_sales_usd"].to_numpy(dtype=float)
+        self.purchase_qty = self.base["total_purchase_qty"].to_numpy(dtype=float)
+
+        groups = [self.base[c].astype(object) for c in ("MalzemeGrup", "MalKodGrup") if c in self.base.columns]
+        self._group_values = [g.to_numpy() for g in groups]
+
+    @classmethod
+    @instrument("features.scenarios.from_frames")
+    def from_frames(
+        cls,
+        sales_df: pd.DataFrame,
+        purchase_df: pd.DataFrame,
+        product_profit: Optional[pd.DataFrame] = None,
+    ) -> "ScenarioEngine":
+        if product_profit is None:
+            product_profit = build_profit_features(sales_df, purchase_df)["product_profit"]
+        return cls.from_profit(product_profit, purchase_df)
+
+    @classmethod
+    def from_profit(cls, product_profit: pd.DataFrame, purchase_df: pd.DataFrame) -> "ScenarioEngine":
+        """
+        product_profit (core set) + parse edilmiş satınalma satırlarından maliyet bazları.
+        """
+        required = ["Malzeme", "Sipariş Tarihi", "Kalem Toplam USD"]
+        missing = [c for c in required if c not in purchase_df.columns]
+        if missing:
+            raise KeyError(f"Senaryo motoru için eksik kolon(lar): {missing}")
+
+        base = product_profit.reset_index(drop=True)
+        currency_col = purchase_currency_column(purchase_df.columns)
+
+        with stage("features.scenarios.cost_basis", rows_in=len(purchase_df)):
+            lines = purchase_df[purchase_df["Malzeme"].isin(base["Malzeme"])]
+            month = lines["Sipariş Tarihi"].dt.to_period("M")
+            shockable = month.notna()
+            if currency_col is not None:
+                shockable &= lines[currency_col].map(normalize_currency).eq(BASE_CURRENCY)
+
+            tl = lines[shockable.to_numpy()]
+            pivot = (
+                tl.groupby([tl["Malzeme"], month[shockable.to_numpy()].rename("YılAy")])["Kalem Toplam USD"]
+                .sum()
+                .unstack("YılAy", fill_value=0.0)
+                .reindex(base["Malzeme"], fill_value=0.0)
+            )
+            pivot = pivot.reindex(columns=sorted(pivot.columns), fill_value=0.0)
+            try_cost = pivot.to_numpy(dtype=float)
+            total = base["total_purchase_cost_usd"].to_numpy(dtype=float)
+            fixed = total - try_cost.sum(axis=1)
+
+        return cls(base, try_cost, fixed, pd.PeriodIndex(pivot.columns, freq="M"))
+
+    # ---------------------------------------------------
+    # Senaryo vektörleri
+    # ---------------------------------------------------
+    def _group_mask(self, groups: Optional[List[str]]) -> np.ndarray:
+        if not groups:
+            return np.ones(len(self.materials), dtype=bool)
+        wanted = list(groups)
+        mask = np.zeros(len(self.materials), dtype=bool)
+        for values in self._group_values:
+            mask |= pd.Series(values).isin(wanted).to_numpy()
+        return mask
+
+    def scenario_vectors(self, scenarios: Sequence[Scenario]) -> Dict[str, np.ndarray]:
+        """
+        Senaryolar → F (S × ay), C (S × M), satış çarpanı (S × M).
+        """
+        n_s, n_m = len(scenarios), len(self.materials)
+        month_factor = np.ones((n_s, len(self.months)))
+        cost_factor = np.ones((n_s, n_m))
+        sales_factor = np.ones((n_s, n_m))
+
+        for i, sc in enumerate(scenarios):
+            if sc.fx_shock <= -1.0:
+                raise ValueError(f"fx_shock -1'den büyük olmalı: {sc.name}")
+            k = 1.0 / (1.0 + sc.fx_shock)  # USDTRY çarpanı
+            factor = (1.0 + sc.pass_through * (k - 1.0)) / k
+            if sc.fx_from:
+                try:
+                    start = pd.Period(sc.fx_from, freq="M")
+                except (ValueError, TypeError) as exc:
+                    raise ValueError(f"Geçersiz fx_from (YYYY-MM bekleniyor): {sc.fx_from}") from exc
+                active = self.months >= start
+                month_factor[i, active] = factor
+            else:
+                month_factor[i, :] = factor
+
+            mask = self._group_mask(sc.groups)
+            cost_factor[i, mask] = 1.0 + sc.cost_shock
+            sales_factor[i, mask] = 1.0 + sc.sales_shock
+
+        return {"month": month_factor, "cost": cost_factor, "sales": sales_factor}
+
+    # ---------------------------------------------------
+    # Simülasyon
+    # ---------------------------------------------------
+    @instrument("features.scenarios.simulate")
+    def simulate(self, scenarios: Sequence[Scenario]) -> ScenarioResult:
+        scenarios = list(scenarios)
+        v = self.scenario_vectors(scenarios)
+
+        # (S × ay) @ (ay × M) → S × M
+        cost = self.fixed_cost + v["cost"] * (v["month"] @ self.try_cost.T)
+        sales = self.sales_usd * v["sales"]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            unit_price = sales / self.sales_qty
+            unit_cost = cost / self.purchase_qty
+            unit_price[~np.isfinite(unit_price)] = np.nan
+            unit_cost[~np.isfinite(unit_cost)] = np.nan
+            profit_per_unit = unit_price - unit_cost
+            margin = profit_per_unit / unit_cost * 100.0
+            margin[~np.isfinite(margin)] = np.nan
+            total_profit = profit_per_unit * self.sales_qty
+
+        # Sıra: toplam kâra göre azalan, NaN'lar sonda
+        order = np.argsort(-total_profit, axis=1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(1, order.shape[1] + 1)[None, :], axis=1)
+
+        return ScenarioResult(
+            scenarios=scenarios,
+            materials=self.materials,
+            base=self.base,
+            total_profit=total_profit,
+            margin_pct=margin,
+            rank=rank,
+            meta={"materials": len(self.materials), "months": [str(m) for m in self.months]},
+        )
@@ -0,0 +1,230 @@
+# features/segmented.py
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from monitoring import stage
+from .parallel import configured_workers, run_tasks, shared_frame
+from .summaries import (
+    PurchaseFeatureBuilder,
+    PurchaseSummaryFrames,
+    SalesFeatureBuilder,
+    SalesSummaryFrames,
+    json_safe,
+)
+
+
+# Segment anahtarı → (satış kolonu, satınalma kolonu) eşlemesi:
+# - MalKodGrup: satışta doğrudan, satınalmada MalzemeGrup[:-1] (DecisionAgent grup kuralı)
+# - MalzemeGrup: satınalmada doğrudan, satışta malzemenin satınalmadaki grubu
+SEGMENT_KEYS = ("MalKodGrup", "MalzemeGrup")
+UNASSIGNED_SEGMENT = "(grupsuz)"
+
+SUMMARY_COLUMNS = [
+    "segment",
+    "sales_rows",
+    "purchase_rows",
+    "sales_materials",
+    "purchase_materials",
+    "total_sales_usd",
+    "trend_direction",
+    "trend_pct_change",
+    "sales_risk_score",
+    "lead_time_risk_score",
+    "critical_products",
+    "risky_suppliers",
+    "stockout_signals",
+    "priority_items",
+]
+
+
+def segment_labels(
+    sales_df: pd.DataFrame, purchase_df: pd.DataFrame, by: str = "MalKodGrup"
+) -> Tuple[pd.Series, pd.Series]:
+    """
+    Satış ve satınalma satırları için segment etiketleri (boş → UNASSIGNED_SEGMENT).
+    """
+    if by not in SEGMENT_KEYS:
+        raise ValueError(f"Geçersiz segment anahtarı: {by} (mevcut: {list(SEGMENT_KEYS)})")
+
+    purchase_group = purchase_df["MalzemeGrup"].astype(object)
+    if by == "MalKodGrup":
+        sales_labels = sales_df["MalKodGrup"].astype(object)
+        purchase_labels = purchase_group.where(
+            purchase_group.isna(), purchase_group.astype(str).str[:-1]
+        )
+    else:
+        # Malzeme → satınalmada en sık görülen MalzemeGrup
+        counts = (
+            purchase_df.groupby(["Malzeme", "MalzemeGrup"], sort=False)
+            .size()
+            .sort_values(ascending=False, kind="stable")
+            .reset_index()
+            .drop_duplicates("Malzeme")
+        )
+        mapping = pd.Series(counts["MalzemeGrup"].to_numpy(), index=counts["Malzeme"].to_numpy())
+        sales_labels = sales_df["Malzeme"].map(mapping).astype(object)
+        purchase_labels = purchase_group
+
+    def clean(labels: pd.Series) -> pd.Series:
+        labels = labels.where(labels.notna() & (labels.astype(str) != ""), UNASSIGNED_SEGMENT)
+        return labels.astype(str)
+
+    return clean(sales_labels), clean(purchase_labels)
+
+
+def partition_segments(
+    sales_labels: pd.Series, purchase_labels: pd.Series
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Tek geçişte segment → (satış satır pozisyonları, satınalma satır pozisyonları).
+    """
+    codes, uniques = pd.factorize(
+        pd.concat([sales_labels, purchase_labels], ignore_index=True), sort=True
+    )
+    n_sales = len(sales_labels)
+
+    def split(part_codes: np.ndarray) -> List[np.ndarray]:
+        order = np.argsort(part_codes, kind="stable")
+        bounds = np.searchsorted(part_codes[order], np.arange(len(uniques) + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(uniques))]
+
+    sales_parts = split(codes[:n_sales])
+    purchase_parts = split(codes[n_sales:])
+    return {
+        str(label): (sales_parts[i], purchase_parts[i])
+        for i, label in enumerate(uniques)
+    }
+
+
+def _empty_sales() -> SalesSummaryFrames:
+    empty = pd.DataFrame()
+    return SalesSummaryFrames(
+        monthly_series=empty,
+        trend={"direction": "flat", "pct_change": 0.0, "slope": None},
+        seasonality=empty,
+        aggregates={},
+        material_stats=empty,
+        warnings=["Segmentte satış satırı yok."],
+    )
+
+
+def _empty_purchase() -> PurchaseSummaryFrames:
+    empty = pd.DataFrame()
+    return PurchaseSummaryFrames(
+        order_totals=empty,
+        lead_time_stats={},
+        material_stats=empty,
+        supplier_stats=empty,
+        warnings=["Segmentte satınalma satırı yok."],
+    )
+
+
+def analyze_segment(sales_df: pd.DataFrame, purchase_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Tek segment için feature builder'lar + Sales / Purchase / Decision agent zinciri.
+    Bir taraf boşsa boş özetle devam edilir (satınalması olmayan satış → kritik ürün).
+    """
+    from agents import DecisionAgent, PurchaseAgent, SalesAgent
+
+    sales = SalesFeatureBuilder().build_frames(sales_df) if len(sales_df) else _empty_sales()
+    purchase = (
+        PurchaseFeatureBuilder().build_frames(purchase_df) if len(purchase_df) else _empty_purchase()
+    )
+
+    sales_out = SalesAgent().analyze(sales)
+    purchase_out = PurchaseAgent().analyze(purchase)
+    decision = DecisionAgent().analyze(sales, purchase, sales_out, purchase_out)
+
+    match_types = pd.Series([m["match_type"] for m in decision.pop("matches")], dtype=object)
+    return {
+        "sales_rows": len(sales_df),
+        "purchase_rows": len(purchase_df),
+        "sales_materials": len(sales.material_stats),
+        "purchase_materials": len(purchase.material_stats),
+        "aggregates": json_safe(sales.aggregates),
+        "trend": json_safe(sales.trend),
+        "match_counts": {str(k): int(v) for k, v in match_types.value_counts().items()},
+        "warnings": sales.warnings + purchase.warnings,
+        "sales_agent": sales_out,
+        "purchase_agent": purchase_out,
+        "decision": decision,
+    }
+
+
+def _segment_part(token, rows, frame=None) -> Dict[str, Any]:
+    label, sales_rows, purchase_rows = rows
+    sales, purchase = frame if frame is not None else (None, None)
+    sales = shared_frame(token, "sales", sales_rows, sales)
+    purchase = shared_frame(token, "purchase", purchase_rows, purchase)
+    return {"segment": label, **analyze_segment(sales, purchase)}
+
+
+def _summary_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    sales_out, purchase_out, decision = (
+        result["sales_agent"], result["purchase_agent"], result["decision"]
+    )
+    return {
+        "segment": result["segment"],
+        "sales_rows": result["sales_rows"],
+        "purchase_rows": result["purchase_rows"],
+        "sales_materials": result["sales_materials"],
+        "purchase_materials": result["purchase_materials"],
+        "total_sales_usd": result["aggregates"].get("total_sales_usd"),
+        "trend_direction": result["trend"].get("direction"),
+        "trend_pct_change": result["trend"].get("pct_change"),
+        "sales_risk_score": sales_out["risk_score"],
+        "lead_time_risk_score": purchase_out["lead_time_risk_score"],
+        "critical_products": len(decision["critical_products"]),
+        "risky_suppliers": len(purchase_out["risky_suppliers"]),
+        "stockout_signals": len(purchase_out["stockout_signals"]),
+        "priority_items": len(decision["priority_list"]),
+    }
+
+
+def analyze_segments(
+    sales_df: pd.DataFrame,
+    purchase_df: pd.DataFrame,
+    by: str = "MalKodGrup",
+    segments: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    DecisionAgent analizini grup bazında (MalKodGrup / MalzemeGrup) çalıştırır.
+    Veri tek seferde segmentlere ayrılır; her segmentin feature + agent zinciri process
+    pool'da bağımsız bir task'tır (büyük segmentler önce, yük dengesi için).
+    workers verilmezse SUPANALIZ_FEATURE_WORKERS, o da yoksa serial (API isteği başına pool açılmaz).
+    Dönen yapı:
+    - summary: segment başına tek satır (kritik ürün, riskli tedarikçi, risk skorları)
+    - segments: segment → agent çıktıları (management_summary, priority_list, action_plan ...)
+    """
+    workers = (configured_workers() or 1) if workers is None else max(1, workers)
+
+    with stage("features.segmented.analyze", rows_in=len(sales_df) + len(purchase_df)):
+        sales_labels, purchase_labels = segment_labels(sales_df, purchase_df, by)
+        parts = partition_segments(sales_labels, purchase_labels)
+        if segments is not None:
+            wanted = set(map(str, segments))
+            parts = {label: rows for label, rows in parts.items() if label in wanted}
+
+        # Longest-processing-time: satır sayısına göre azalan sırada gönder
+        ordered = sorted(parts.items(), key=lambda kv: -(len(kv[1][0]) + len(kv[1][1])))
+        tasks = []
+        for label, (s_rows, p_rows) in ordered:
+            make = (lambda r=(s_rows, p_rows): (sales_df.take(r[0]), purchase_df.take(r[1])))
+            tasks.append((_segment_part, (label, s_rows, p_rows), make))
+
+        results = run_tasks({"sales": sales_df, "purchase": purchase_df}, tasks, workers)
+        results = sorted(results, key=lambda r: r["segment"])
+
+        summary = pd.DataFrame([_summary_row(r) for r in results], columns=SUMMARY_COLUMNS)
+
+    return {
+        "meta": {"by": by, "segments": len(results), "workers": workers},
+        "summary": summary,
+        "segments": {r.pop("segment"): r for r in results},
+    }
@@ -0,0 +1,263 @@
+# features/stockout_sim.py
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from monitoring import instrument, stage
+from .sales_features import compute_monthly_sales
+
+
+DAYS_PER_MONTH = 30.4375
+# Bir batch'te (malzeme × path × hafta) tutulacak maksimum eleman sayısı
+DEFAULT_BATCH_ELEMENTS = 4_000_000
+
+
+def _csr(groups: pd.Series, values: pd.Series, order: pd.Index) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Grup başına değer listelerini (values, offsets, lengths) dizilerine çevirir;
+    order sırasındaki her grup için values[offsets[i]:offsets[i] + lengths[i]].
+    """
+    frame = pd.DataFrame({"g": groups.to_numpy(), "v": values.to_numpy(dtype=float)})
+    frame = frame[frame["g"].isin(order)]
+    codes = pd.Index(order).get_indexer(frame["g"])
+    sort = np.argsort(codes, kind="stable")
+    lengths = np.bincount(codes, minlength=len(order)).astype(np.int64)
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]].astype(np.int64)
+    return frame["v"].to_numpy()[sort], offsets, lengths
+
+
+def _bootstrap(
+    rng: np.random.Generator,
+    values: np.ndarray,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+    shape: Tuple[int, ...],
+) -> np.ndarray:
+    """
+    Her satır (malzeme) kendi ampirik dağılımından, iadeli örnekleme. shape[0] = malzeme.
+    """
+    u = rng.random(shape)
+    expand = (slice(None),) + (None,) * (len(shape) - 1)
+    pick = offsets[expand] + (u * lengths[expand]).astype(np.int64)
+    return values[pick]
+
+
+class StockoutSimulator:
+    """
+    Malzeme bazlı Monte Carlo stokout simülasyonu (malzeme × path × hafta dizileri).
+
+    Her path için:
+    - haftalık talep: malzemenin aylık satış geçmişinden (satışsız aylar 0) bootstrap,
+      hafta başına ölçeklenmiş (ay / 4.35)
+    - bekleyen sipariş: medyan sipariş miktarı, ampirik lead time sonunda gelir;
+      lead time malzemenin kendi teslimatlarından, yetersizse ana tedarikçisinin,
+      o da yoksa tüm satınalmanın dağılımından örneklenir
+    - eldeki stok: verilmezse net pozisyon max(0, toplam alış - toplam satış)
+    Stokout: ufuk içinde herhangi bir haftada kümülatif talep > eldeki + gelmiş sipariş.
+    Eksik miktar (shortage) en yüksek birikmiş açıktır.
+
+    Rastgele sayılar talep ve lead time için ayrı akışlardan malzeme sırasıyla çekilir;
+    aynı seed → batch boyutundan bağımsız olarak aynı sonuç.
+    """
+
+    def __init__(
+        self,
+        materials: pd.Index,
+        on_hand: np.ndarray,
+        order_qty: np.ndarray,
+        demand: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        lead: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        lead_source: np.ndarray,
+    ):
+        self.materials = pd.Index(materials, name="Malzeme")
+        self.on_hand = np.asarray(on_hand, dtype=float)
+        self.order_qty = np.asarray(order_qty, dtype=float)
+        self.demand = demand
+        self.lead = lead
+        self.lead_source = lead_source
+
+    # ---------------------------------------------------
+    # Kurulum
+    # ---------------------------------------------------
+    @classmethod
+    @instrument("features.stockout.from_frames")
+    def from_frames(
+        cls,
+        sales_df: pd.DataFrame,
+        purchase_df: pd.DataFrame,
+        on_hand: Optional[pd.Series] = None,
+        min_lead_obs: int = 3,
+    ) -> "StockoutSimulator":
+        return cls.from_tables(compute_monthly_sales(sales_df), purchase_df, on_hand, min_lead_obs)
+
+    @classmethod
+    def from_tables(
+        cls,
+        monthly_sales: pd.DataFrame,
+        purchase_df: pd.DataFrame,
+        on_hand: Optional[pd.Series] = None,
+        min_lead_obs: int = 3,
+    ) -> "StockoutSimulator":
+        """
+        monthly_sales: compute_monthly_sales çıktısı (resident tablo da olabilir).
+        on_hand: Malzeme indexli eldeki stok (yoksa net pozisyon kullanılır).
+        """
+        required = ["Malzeme", "Sipariş Miktarı", "Lead Time (days)"]
+        missing = [c for c in required if c not in purchase_df.columns]
+        if missing:
+            raise KeyError(f"Stokout simülasyonu için eksik kolon(lar): {missing}")
+
+        with stage("features.stockout.inputs", rows_in=len(monthly_sales) + len(purchase_df)):
+            # --- Talep: Malzeme × ay, ilk satış ayından son aya kadar (satışsız ay = 0)
+            monthly = (
+                monthly_sales.dropna(subset=["Malzeme", "YılAy"])
+                .groupby(["Malzeme", "YılAy"])["total_qty"]
+                .sum()
+                .unstack("YılAy", fill_value=0.0)
+            )
+            monthly = monthly.reindex(columns=sorted(monthly.columns), fill_value=0.0)
+            materials = monthly.index
+            matrix = monthly.to_numpy(dtype=float)
+            active = np.cumsum(matrix != 0, axis=1) > 0
+            demand = (
+                matrix[active],
+                np.r_[0, np.cumsum(active.sum(axis=1))[:-1]].astype(np.int64),
+                active.sum(axis=1).astype(np.int64),
+            )
+
+            # --- Eldeki stok ve bekleyen sipariş
+            purchases = purchase_df[purchase_df["Malzeme"].notna()]
+            by_mat = purchases.groupby("Malzeme")["Sipariş Miktarı"]
+            total_purchase = by_mat.sum().reindex(materials, fill_value=0.0)
+            total_sales = pd.Series(matrix.sum(axis=1), index=materials)
+            if on_hand is None:
+                stock = (total_purchase - total_sales).clip(lower=0.0)
+            else:
+                stock = on_hand.reindex(materials).fillna(0.0)
+            order_qty = by_mat.median().reindex(materials).fillna(0.0)
+
+            # --- Lead time: malzeme → ana tedarikçi → genel havuz
+            delivered = purchases[purchases["Lead Time (days)"].notna()]
+            lead_vals, lead_off, lead_len = _csr(
+                delivered["Malzeme"], delivered["Lead Time (days)"], materials
+            )
+            source = np.where(lead_len >= min_lead_obs, "material", "global").astype(object)
+
+            pooled_vals = [lead_vals]
+            base = len(lead_vals)
+            if "Tedarikçi Num." in purchases.columns and len(delivered):
+                main_supplier = (
+                    purchases.groupby("Malzeme")["Tedarikçi Num."]
+                    .agg(lambda s: s.mode().iat[0] if s.notna().any() else np.nan)
+                    .reindex(materials)
+                )
+                sup_index = pd.Index(main_supplier.dropna().unique())
+                sup_vals, sup_off, sup_len = _csr(
+                    delivered["Tedarikçi Num."], delivered["Lead Time (days)"], sup_index
+                )
+                pos = sup_index.get_indexer(main_supplier)
+                use_sup = (lead_len < min_lead_obs) & (pos >= 0)
+                use_sup[use_sup] &= sup_len[pos[use_sup]] >= min_lead_obs
+                lead_off = np.where(use_sup, base + sup_off[np.maximum(pos, 0)], lead_off)
+                lead_len = np.where(use_sup, sup_len[np.maximum(pos, 0)], lead_len)
+                source[use_sup] = "supplier"
+                pooled_vals.append(sup_vals)
+                base += len(sup_vals)
+
+            global_vals = delivered["Lead Time (days)"].to_numpy(dtype=float)
+            use_global = source == "global"
+            lead_off = np.where(use_global, base, lead_off)
+            lead_len = np.where(use_global, len(global_vals), lead_len)
+            pooled_vals.append(global_vals)
+            lead = (np.concatenate(pooled_vals), lead_off.astype(np.int64), lead_len.astype(np.int64))
+
+        return cls(materials, stock.to_numpy(), order_qty.to_numpy(), demand, lead, source)
+
+    # ---------------------------------------------------
+    # Simülasyon
+    # ---------------------------------------------------
+    def _simulate_batch(
+        self,
+        sl: slice,
+        weeks: int,
+        paths: int,
+        rng_demand: np.random.Generator,
+        rng_lead: np.random.Generator,
+    ) -> Dict[str, np.ndarray]:
+        d_vals, d_off, d_len = self.demand
+        l_vals, l_off, l_len = self.lead
+        n = len(range(*sl.indices(len(self.materials))))
+
+        weekly = _bootstrap(rng_demand, d_vals, d_off[sl], d_len[sl], (n, paths, weeks))
+        weekly *= 7.0 / DAYS_PER_MONTH
+        cumulative = np.cumsum(weekly, axis=2)
+
+        # Lead time verisi hiç yoksa sipariş ufuk içinde gelmez (inf)
+        has_lead = l_len[sl] > 0
+        lead_days = np.full((n, paths), np.inf)
+        u = rng_lead.random((n, paths))
+        if len(l_vals):
+            pick = l_off[sl][:, None] + (u * l_len[sl][:, None]).astype(np.int64)
+            sampled = l_vals[np.minimum(pick, len(l_vals) - 1)]
+            lead_days = np.where(has_lead[:, None], sampled, np.inf)
+
+        # Hafta w sonunda (gün 7w) gelmiş sipariş
+        day_end = 7.0 * np.arange(1, weeks + 1)
+        arrived = lead_days[:, :, None] <= day_end[None, None, :]
+        supply = self.on_hand[sl][:, None, None] + self.order_qty[sl][:, None, None] * arrived
+        backlog = cumulative - supply
+
+        shortage = np.maximum(backlog.max(axis=2), 0.0)
+        out_any = backlog > 0
+        stockout = out_any.any(axis=2)
+        first_week = np.where(stockout, out_any.argmax(axis=2) + 1, 0).astype(float)
+
+        hits = stockout.sum(axis=1)
+        first_mean = np.where(hits > 0, first_week.sum(axis=1) / np.maximum(hits, 1), np.nan)
+        return {
+            "stockout_probability": stockout.mean(axis=1),
+            "expected_shortage": shortage.mean(axis=1),
+            "shortage_p95": np.quantile(shortage, 0.95, axis=1),
+            "expected_first_stockout_week": first_mean,
+            "weekly_demand_mean": weekly.mean(axis=(1, 2)),
+            "lead_time_mean": np.where(has_lead, np.where(np.isinf(lead_days), 0.0, lead_days).mean(axis=1), np.nan),
+        }
+
+    @instrument("features.stockout.simulate")
+    def simulate(
+        self,
+        weeks: int = 12,
+        paths: int = 1000,
+        seed: int = 42,
+        batch_elements: int = DEFAULT_BATCH_ELEMENTS,
+    ) -> pd.DataFrame:
+        """
+        Malzeme başına stokout olasılığı ve beklenen eksik miktar (N hafta ufku).
+        """
+        if weeks < 1 or paths < 1:
+            raise ValueError("weeks ve paths 1 veya daha büyük olmalı.")
+
+        rng_demand, rng_lead = (
+            np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2)
+        )
+        n = len(self.materials)
+        step = max(1, batch_elements // (paths * weeks))
+
+        parts = [
+            self._simulate_batch(slice(lo, min(lo + step, n)), weeks, paths, rng_demand, rng_lead)
+            for lo in range(0, n, step)
+        ]
+        cols = parts[0].keys() if parts else []
+        result = {c: np.concatenate([p[c] for p in parts]) for c in cols}
+
+        out = pd.DataFrame({"Malzeme": self.materials})
+        out["on_hand"] = self.on_hand
+        out["order_qty"] = self.order_qty
+        out["lead_time_source"] = self.lead_source
+        for c in cols:
+            out[c] = result[c]
+        return out
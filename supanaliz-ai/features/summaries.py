@@ -0,0 +1,339 @@
+# features/summaries.py
+
+import math
+from dataclasses import dataclass, field
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from .sales_features import build_sales_features, _prepare_sales_base
+from .purchase_features import build_purchase_features, _prepare_purchase_base
+from .price_anomalies import drop_price_anomalies
+from .supplier_scorecard import recent_supplier_risk, supplier_columns, supplier_scorecard
+
+
+def _json_value(v: Any) -> Any:
+    """
+    Tek bir hücre değerini JSON uyumlu Python tipine çevirir.
+    NaN / NaT → None, numpy skalerleri → int/float, tarih/period → ISO string.
+    """
+    if v is None or v is pd.NaT:
+        return None
+    if isinstance(v, (np.integer,)):
+        return int(v)
+    if isinstance(v, (np.floating, float)):
+        f = float(v)
+        return None if math.isnan(f) or math.isinf(f) else f
+    if isinstance(v, np.bool_):
+        return bool(v)
+    if isinstance(v, (pd.Timestamp, pd.Period)):
+        return str(v)
+    if isinstance(v, dict):
+        return {str(k): _json_value(x) for k, x in v.items()}
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return v
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    DataFrame → JSON uyumlu list-of-dict.
+    API sınırında ve agent özetlerinde tek dönüşüm noktası.
+    """
+    cols = [str(c) for c in df.columns]
+    return [
+        {c: _json_value(v) for c, v in zip(cols, row)}
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+
+def json_safe(obj: Any) -> Any:
+    """
+    Parser meta gibi iç içe dict/list yapılarını JSON uyumlu hale getirir.
+    """
+    if isinstance(obj, dict):
+        return {str(k): json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [json_safe(v) for v in obj]
+    return _json_value(obj)
+
+
+def _trend_of_series(values: np.ndarray) -> Dict[str, Any]:
+    """
+    Aylık toplam seri için lineer trend.
+    pct_change = (slope * (n-1)) / ortalama * 100
+    %5 üzeri → up, %-5 altı → down, arası → flat
+    """
+    values = values[~np.isnan(values)]
+    if len(values) < 2 or values.mean() == 0:
+        return {"direction": "flat", "pct_change": 0.0, "slope": None}
+
+    x = np.arange(len(values), dtype=float)
+    slope, _b = np.polyfit(x, values, deg=1)
+    pct_change = float(slope * (len(values) - 1) / values.mean() * 100.0)
+
+    if pct_change > 5.0:
+        direction = "up"
+    elif pct_change < -5.0:
+        direction = "down"
+    else:
+        direction = "flat"
+
+    return {"direction": direction, "pct_change": pct_change, "slope": float(slope)}
+
+
+@dataclass
+class SalesSummaryFrames:
+    """
+    sales_summary'nin kolonel hali: agent'lar doğrudan DataFrame'ler üzerinde çalışır,
+    list-of-dict'e sadece API sınırında (to_summary) çevrilir.
+    """
+    monthly_series: pd.DataFrame
+    trend: Dict[str, Any]
+    seasonality: pd.DataFrame
+    aggregates: Dict[str, Any]
+    material_stats: pd.DataFrame
+    meta: Dict[str, Any] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_summary(self) -> Dict[str, Any]:
+        return {
+            "meta": self.meta,
+            "monthly_series": frame_to_records(self.monthly_series),
+            "trend": json_safe(self.trend),
+            "seasonality": frame_to_records(self.seasonality),
+            "aggregates": json_safe(self.aggregates),
+            "material_stats": frame_to_records(self.material_stats),
+            "warnings": list(self.warnings),
+        }
+
+
+@dataclass
+class PurchaseSummaryFrames:
+    """
+    purchase_summary'nin kolonel hali (bkz. SalesSummaryFrames).
+    """
+    order_totals: pd.DataFrame
+    lead_time_stats: Dict[str, Any]
+    material_stats: pd.DataFrame
+    supplier_stats: pd.DataFrame
+    meta: Dict[str, Any] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_summary(self) -> Dict[str, Any]:
+        return {
+            "meta": self.meta,
+            "order_totals": frame_to_records(self.order_totals),
+            "lead_time_stats": json_safe(self.lead_time_stats),
+            "material_stats": frame_to_records(self.material_stats),
+            "supplier_stats": frame_to_records(self.supplier_stats),
+            "warnings": list(self.warnings),
+        }
+
+
+class SalesFeatureBuilder:
+    """
+    build_sales_features çıktısını SalesAgent'ın beklediği
+    JSON uyumlu özet yapısına (sales_summary) çevirir.
+    """
+
+    def build_features(self, sales_df: pd.DataFrame) -> Dict[str, Any]:
+        return self.build_frames(sales_df).to_summary()
+
+    def build_frames(self, sales_df: pd.DataFrame) -> SalesSummaryFrames:
+        features = build_sales_features(sales_df)
+        base = _prepare_sales_base(sales_df)
+
+        # Tüm malzemeler toplamı aylık seri
+        monthly_total = (
+            features["monthly_sales"]
+            .groupby("YılAy")
+            .agg(
+                total_sales=("total_sales_usd", "sum"),
+                total_qty=("total_qty", "sum"),
+            )
+            .sort_index()
+            .reset_index()
+            .rename(columns={"YılAy": "period"})
+        )
+
+        trend = _trend_of_series(
+            monthly_total["total_sales"].to_numpy(dtype=float)
+        )
+
+        # Takvim ayı bazlı mevsimsellik (aylık toplamların ortalaması / genel ortalama)
+        season = monthly_total.copy()
+        season["month"] = season["period"].map(lambda p: p.month)
+        season = (
+            season.groupby("month")
+            .agg(avg_sales=("total_sales", "mean"))
+            .reset_index()
+        )
+        overall = season["avg_sales"].mean()
+        season["normalized_index"] = (
+            season["avg_sales"] / overall if overall else 1.0
+        )
+
+        # Malzeme bazlı istatistikler
+        material = (
+            base.groupby(["Malzeme", "MalKodGrup"], dropna=False)
+            .agg(
+                total_sales=("Genel Toplam (USD)", "sum"),
+                total_qty=("Miktar", "sum"),
+                avg_unit_price=("unit_price_usd", "mean"),
+            )
+            .reset_index()
+            .merge(
+                features["trend"], on=["Malzeme", "MalKodGrup"], how="left"
+            )
+            .merge(
+                features["abc_xyz"][["Malzeme", "MalKodGrup", "abc_class", "xyz_class", "abc_xyz"]],
+                on=["Malzeme", "MalKodGrup"],
+                how="left",
+            )
+            .rename(
+                columns={
+                    "Malzeme": "material",
+                    "MalKodGrup": "material_group",
+                    "sales_trend_slope": "trend_slope",
+                    "sales_trend_label": "trend_label",
+                }
+            )
+        )
+
+        aggregates = {
+            "total_sales_usd": base["Genel Toplam (USD)"].sum(),
+            "total_qty": base["Miktar"].sum(),
+            "material_count": base["Malzeme"].nunique(),
+            "period_count": len(monthly_total),
+        }
+
+        return SalesSummaryFrames(
+            monthly_series=monthly_total,
+            trend=trend,
+            seasonality=season,
+            aggregates=aggregates,
+            material_stats=material,
+        )
+
+
+class PurchaseFeatureBuilder:
+    """
+    build_purchase_features çıktısını PurchaseAgent'ın beklediği
+    JSON uyumlu özet yapısına (purchase_summary) çevirir.
+    exclude_price_anomalies: birim fiyat anomalisi olan satırlar (veri girişi /
+    birim hataları) tüm özetlerden önce çıkarılır.
+    recent_months: verilirse supplier_stats'a son N aylık pencerenin skor kartı
+    metrikleri (recent_risk_score, risk_trend ...) eklenir (bkz. supplier_scorecard).
+    """
+
+    def __init__(self, exclude_price_anomalies: bool = False, recent_months: Optional[int] = None):
+        self.exclude_price_anomalies = exclude_price_anomalies
+        self.recent_months = recent_months
+
+    def build_features(
+        self, purchase_df: pd.DataFrame, stockout: Optional[pd.DataFrame] = None
+    ) -> Dict[str, Any]:
+        """
+        stockout: opsiyonel StockoutSimulator.simulate çıktısı; verilirse
+        material_stats satırlarına stokout olasılığı / beklenen eksik eklenir.
+        """
+        return self.build_frames(purchase_df, stockout).to_summary()
+
+    def build_frames(
+        self, purchase_df: pd.DataFrame, stockout: Optional[pd.DataFrame] = None
+    ) -> PurchaseSummaryFrames:
+        warnings: List[str] = []
+        if self.exclude_price_anomalies:
+            kept = drop_price_anomalies(purchase_df)
+            if len(kept) < len(purchase_df):
+                warnings.append(
+                    f"{len(purchase_df) - len(kept)} satınalma satırı fiyat anomalisi "
+                    "nedeniyle özetlerden çıkarıldı."
+                )
+            purchase_df = kept
+
+        features = build_purchase_features(purchase_df)
+        base = _prepare_purchase_base(purchase_df)
+
+        lead = base["Lead Time (days)"]
+        lead_time_stats = {
+            "overall_avg_lead_time_days": lead.mean(),
+            "overall_std_lead_time_days": lead.std(),
+            "overall_median_lead_time_days": lead.median(),
+            "overall_p90_lead_time_days": lead.quantile(0.9),
+            "no_delivery_ratio": lead.isna().mean(),
+        }
+
+        # Sipariş toplamları: PO numarası olmadığı için
+        # aynı gün + aynı tedarikçi satırları tek sipariş sayılır
+        if "Tedarikçi Num." in base.columns:
+            order_keys = ["Sipariş Tarihi", "Tedarikçi Num.", "İsim"]
+        else:
+            order_keys = ["Sipariş Tarihi", "MalzemeGrup"]
+
+        order_totals = (
+            base.groupby(order_keys, dropna=False)
+            .agg(
+                order_total=("Kalem Toplam USD", "sum"),
+                line_count=("Malzeme", "size"),
+            )
+            .reset_index()
+            .rename(
+                columns={
+                    "Sipariş Tarihi": "order_date",
+                    "Tedarikçi Num.": "supplier_id",
+                    "İsim": "supplier_name",
+                    "MalzemeGrup": "material_group",
+                }
+            )
+        )
+
+        material = features["material_features"].rename(
+            columns={
+                "Malzeme": "material",
+                "MalzemeGrup": "material_group",
+                "Birim": "unit",
+                "avg_unit_cost_usd": "avg_unit_price",
+                "std_unit_cost_usd": "unit_price_std",
+                "total_cost_usd": "total_order_value",
+            }
+        )
+
+        if stockout is not None:
+            sim_cols = ["stockout_probability", "expected_shortage", "expected_first_stockout_week"]
+            material = material.merge(
+                stockout[["Malzeme", *sim_cols]].rename(columns={"Malzeme": "material"}),
+                on="material",
+                how="left",
+            )
+
+        supplier = features["supplier_features"]
+        if self.recent_months is not None:
+            recent = recent_supplier_risk(supplier_scorecard(purchase_df, window=self.recent_months))
+            supplier = supplier.merge(recent, on=supplier_columns(supplier.columns), how="left")
+
+        supplier = supplier.rename(
+            columns={
+                "Tedarikçi Num.": "supplier_id",
+                "İsim": "supplier_name",
+                "supplier_risk_score": "risk_score",
+                "total_cost_usd": "total_order_value",
+            }
+        )
+        if "supplier_id" not in supplier.columns:
+            # MalzemeGrup fall-back'i
+            supplier["supplier_id"] = supplier["MalzemeGrup"]
+            supplier["supplier_name"] = supplier["MalzemeGrup"]
+
+        return PurchaseSummaryFrames(
+            order_totals=order_totals,
+            lead_time_stats=lead_time_stats,
+            material_stats=material,
+            supplier_stats=supplier,
+            warnings=warnings,
+        )
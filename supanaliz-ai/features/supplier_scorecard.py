@@ -0,0 +1,232 @@
+# supanaliz-ai/features/supplier_scorecard.py
+
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from monitoring import instrument
+from .purchase_features import _prepare_purchase_base, supplier_risk_score
+from .price_anomalies import drop_price_anomalies
+
+
+# Kayan pencere (ay) ve risk trendi için bakılan ay sayısı
+SCORECARD_WINDOW = 3
+TREND_MONTHS = 6
+# Risk trendi: aylık eğim (risk puanı / ay) bu eşiği aşarsa worsening / improving
+TREND_SLOPE_THRESHOLD = 2.0
+# "Uzun lead time" sınırı (compute backend'lerindeki long_lead_count ile aynı)
+LONG_LEAD_DAYS = 30
+
+MONTHLY_METRICS = [
+    "line_count",
+    "open_line_count",
+    "spend_usd",
+    "avg_lead_time_days",
+    "long_lead_ratio",
+    "no_delivery_ratio",
+    "price_drift_pct",
+]
+SCORECARD_COLUMNS = [
+    "YılAy",
+    *MONTHLY_METRICS,
+    *(f"window_{name}" for name in MONTHLY_METRICS),
+    "risk_score",
+    "risk_trend_slope",
+    "risk_trend",
+]
+RECENT_COLUMNS = {
+    "window_line_count": "recent_line_count",
+    "window_spend_usd": "recent_spend_usd",
+    "window_avg_lead_time_days": "recent_avg_lead_time_days",
+    "window_long_lead_ratio": "recent_long_lead_ratio",
+    "window_no_delivery_ratio": "recent_no_delivery_ratio",
+    "window_price_drift_pct": "recent_price_drift_pct",
+    "risk_score": "recent_risk_score",
+    "risk_trend_slope": "risk_trend_slope",
+    "risk_trend": "risk_trend",
+}
+
+
+def supplier_columns(columns) -> List[str]:
+    # compute_supplier_features ile aynı seçim: tedarikçi kolonları yoksa MalzemeGrup
+    return ["Tedarikçi Num.", "İsim"] if "Tedarikçi Num." in columns else ["MalzemeGrup"]
+
+
+def _trailing(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    (tedarikçi × ay) matrisinde son `window` ayın toplamı (ilk aylarda kısmi pencere);
+    tek cumsum + iki indeksleme.
+    """
+    n_months = values.shape[1]
+    cum = np.concatenate([np.zeros((len(values), 1)), np.cumsum(values, axis=1)], axis=1)
+    end = np.arange(1, n_months + 1)
+    return cum[:, end] - cum[:, np.maximum(end - window, 0)]
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _metrics(
+    lines, spend, lead_sum, lead_n, long_n, drift_sum, drift_n, due_n, missing_n
+) -> dict:
+    return {
+        "line_count": lines,
+        "open_line_count": lines - lead_n - missing_n,
+        "spend_usd": spend,
+        "avg_lead_time_days": _ratio(lead_sum, lead_n),
+        "long_lead_ratio": _ratio(long_n, lines),
+        # Sadece vadesi gelmiş satırlar: genç satırlardan yalnız hızlı teslim edilenler
+        # görünür, açıklar sayılsa oran şişer, sadece açıklar atılsa düşer
+        "no_delivery_ratio": _ratio(missing_n, due_n),
+        "price_drift_pct": (np.power(10.0, _ratio(drift_sum, drift_n)) - 1.0) * 100.0,
+    }
+
+
+def _trend_slope(risk: np.ndarray, months: int) -> np.ndarray:
+    """
+    Her (tedarikçi, ay) için son `months` aydaki risk skorlarının OLS eğimi;
+    boş aylar atlanır, en az 3 gözlem gerekir. Toplamlar _trailing ile.
+    """
+    mask = np.isfinite(risk).astype(float)
+    y = np.where(mask > 0, risk, 0.0)
+    x = np.broadcast_to(np.arange(risk.shape[1], dtype=float), risk.shape)
+    n = _trailing(mask, months)
+    sx, sy = _trailing(x * mask, months), _trailing(y, months)
+    sxx, sxy = _trailing(x * x * mask, months), _trailing(x * y, months)
+    den = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (n * sxy - sx * sy) / den
+    return np.where((n >= 3) & (den > 0), slope, np.nan)
+
+
+@instrument("features.supplier_scorecard.build")
+def supplier_scorecard(
+    purchase_df: pd.DataFrame,
+    window: int = SCORECARD_WINDOW,
+    trend_months: int = TREND_MONTHS,
+    exclude_price_anomalies: bool = False,
+) -> pd.DataFrame:
+    """
+    Tedarikçi × ay skor kartı küpü.
+    - Aylık metrikler: line_count, open_line_count, spend_usd, avg_lead_time_days,
+      long_lead_ratio, no_delivery_ratio, price_drift_pct (malzeme × birim tüm zaman
+      medyan fiyatına göre ortalama log sapma, %)
+    - no_delivery_ratio sadece vadesi gelmiş satırlar üzerinden: son sipariş tarihine göre
+      yaşı tedarikçinin medyan lead time'ından (teslimatı yoksa genel medyan) küçük satırlar
+      pay ve paydaya girmez; bunlardan teslimatı olmayanlar open_line_count
+    - window_*: son `window` ayın toplamlarından aynı metrikler (oranlar satır ağırlıklı)
+    - risk_score: window metrikleri üzerinden supplier_risk_score (0-100)
+    - risk_trend_slope / risk_trend: son `trend_months` aydaki risk eğimi
+    Toplamlar tek bincount ile (tedarikçi × takvim ayı) matrisine yazılır; kayan
+    pencereler cumsum farkı ile. Sadece penceresinde satırı olan aylar döner.
+    """
+    if window < 1:
+        raise ValueError("Skor kartı penceresi en az 1 ay olmalı.")
+    if trend_months < 3:
+        raise ValueError("Risk trendi için en az 3 ay gerekli.")
+
+    keys = supplier_columns(purchase_df.columns)
+    if exclude_price_anomalies:
+        purchase_df = drop_price_anomalies(purchase_df)
+    if purchase_df.empty:
+        return pd.DataFrame(columns=[*keys, *SCORECARD_COLUMNS])
+
+    df = _prepare_purchase_base(purchase_df)
+    grouped = df.groupby(keys, dropna=False, sort=True)
+    code = grouped.ngroup().to_numpy()
+    suppliers = grouped.size().index
+    n_suppliers = len(suppliers)
+
+    months = pd.PeriodIndex(df["YılAy"], freq="M")
+    calendar = pd.period_range(months.min(), months.max(), freq="M")
+    n_months = len(calendar)
+    flat = code * n_months + (months.asi8 - calendar[0].ordinal)
+    size = n_suppliers * n_months
+
+    lead = pd.to_numeric(df["Lead Time (days)"], errors="coerce").to_numpy(dtype=float)
+    delivered = np.isfinite(lead)
+
+    # Vadesi gelmiş satırlar: export anına (son sipariş tarihi; Teslim Tarihi planlanan
+    # ileri tarih olabilir) göre yaşı tedarikçinin medyan lead time'ına ulaşmış
+    order_date = df["Sipariş Tarihi"]
+    age = (order_date.max() - order_date).dt.days.to_numpy(dtype=float, na_value=np.nan)
+    cutoff = pd.Series(np.where(delivered, lead, np.nan)).groupby(code).transform("median").to_numpy()
+    if delivered.any():
+        cutoff = np.where(np.isnan(cutoff), np.median(lead[delivered]), cutoff)
+    due = ~(age < cutoff)
+
+    # Fiyat sapması: log10(birim fiyat) - malzeme × birim medyanı
+    price = pd.to_numeric(df["Birim Maliyet USD"], errors="coerce")
+    priced = (price > 0).to_numpy()
+    log_price = pd.Series(np.where(priced, np.log10(price.where(priced, 1.0)), np.nan))
+    base = log_price.groupby(
+        df.groupby(["Malzeme", "Birim"], dropna=False, sort=False).ngroup().to_numpy(), sort=False
+    ).transform("median")
+    drift = (log_price - base).to_numpy()
+
+    def cells(mask=None, weights=None) -> np.ndarray:
+        idx = flat if mask is None else flat[mask]
+        w = weights if weights is None or mask is None else weights[mask]
+        return np.bincount(idx, weights=w, minlength=size).reshape(n_suppliers, n_months).astype(float)
+
+    sums = (
+        cells(),
+        cells(weights=df["Kalem Toplam USD"].to_numpy(dtype=float, na_value=0.0)),
+        cells(delivered, lead),
+        cells(delivered),
+        cells(delivered & (lead >= LONG_LEAD_DAYS)),
+        cells(priced, drift),
+        cells(priced),
+        cells(due),
+        cells(due & ~delivered),
+    )
+    monthly = _metrics(*sums)
+    rolling = _metrics(*(_trailing(values, window) for values in sums))
+
+    risk = supplier_risk_score(
+        rolling["long_lead_ratio"], rolling["no_delivery_ratio"], rolling["avg_lead_time_days"]
+    )
+    risk = np.where(rolling["line_count"] > 0, risk, np.nan)
+    slope = _trend_slope(risk, trend_months)
+
+    keep = (rolling["line_count"] > 0).ravel()
+    sup_idx, month_idx = np.divmod(np.flatnonzero(keep), n_months)
+
+    out = pd.DataFrame(
+        {name: suppliers.get_level_values(i).to_numpy()[sup_idx] for i, name in enumerate(keys)}
+    )
+    out["YılAy"] = calendar[month_idx]
+    for name in MONTHLY_METRICS:
+        out[name] = monthly[name].ravel()[keep]
+    for name in MONTHLY_METRICS:
+        out[f"window_{name}"] = rolling[name].ravel()[keep]
+    for name in ("line_count", "open_line_count", "window_line_count", "window_open_line_count"):
+        out[name] = out[name].astype(np.int64)
+    out["risk_score"] = risk.ravel()[keep]
+    out["risk_trend_slope"] = slope.ravel()[keep]
+    trend_slope = out["risk_trend_slope"]
+    trend = np.select(
+        [trend_slope >= TREND_SLOPE_THRESHOLD, trend_slope <= -TREND_SLOPE_THRESHOLD, trend_slope.notna()],
+        ["worsening", "improving", "stable"],
+        "",
+    ).astype(object)
+    trend[trend == ""] = None
+    out["risk_trend"] = trend
+    return out
+
+
+def recent_supplier_risk(scorecard: pd.DataFrame) -> pd.DataFrame:
+    """
+    Skor kartının son takvim ayındaki satırları: tedarikçi başına son pencere
+    metrikleri (recent_*) ve risk trendi. Son pencerede siparişi olmayan tedarikçi dönmez.
+    """
+    keys = supplier_columns(scorecard.columns)
+    if scorecard.empty:
+        return pd.DataFrame(columns=[*keys, *RECENT_COLUMNS.values()])
+    latest = scorecard[scorecard["YılAy"] == scorecard["YılAy"].max()]
+    return latest[[*keys, *RECENT_COLUMNS]].rename(columns=RECENT_COLUMNS).reset_index(drop=True)
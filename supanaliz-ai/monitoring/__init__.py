@@ -0,0 +1,21 @@
+# supanaliz-ai/monitoring/__init__.py
+
+from .stages import (
+    StageRecord,
+    StageTrace,
+    stage,
+    instrument,
+    collect_stages,
+    registry,
+)
+from .prometheus import render_prometheus
+
+__all__ = [
+    "StageRecord",
+    "StageTrace",
+    "stage",
+    "instrument",
+    "collect_stages",
+    "registry",
+    "render_prometheus",
+]
@@ -0,0 +1,53 @@
+# supanaliz-ai/monitoring/prometheus.py
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from .stages import WALL_BUCKETS, StageRegistry, registry as default_registry
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(registry: Optional[StageRegistry] = None) -> str:
+    """
+    Stage metriklerini Prometheus text exposition formatında döner.
+    """
+    stats = (registry or default_registry).snapshot()
+    lines: List[str] = []
+
+    def metric(name: str, mtype: str, help_text: str, attr: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {mtype}")
+        for stage_name, st in sorted(stats.items()):
+            lines.append(f'{name}{{stage="{_label(stage_name)}"}} {getattr(st, attr)}')
+
+    metric("supanaliz_stage_calls_total", "counter", "Stage çağrı sayısı.", "calls")
+    metric("supanaliz_stage_errors_total", "counter", "Hata ile biten stage sayısı.", "errors")
+    metric("supanaliz_stage_cpu_seconds_total", "counter", "Stage thread CPU süresi.", "cpu_s")
+    metric("supanaliz_stage_rows_in_total", "counter", "Stage'e giren satır sayısı.", "rows_in")
+    metric("supanaliz_stage_rows_out_total", "counter", "Stage'den çıkan satır sayısı.", "rows_out")
+    metric(
+        "supanaliz_stage_peak_memory_bytes",
+        "gauge",
+        "Stage başına gözlenen maksimum peak bellek (SUPANALIZ_TRACE_MEMORY=1).",
+        "max_peak_mem_bytes",
+    )
+
+    name = "supanaliz_stage_wall_seconds"
+    lines.append(f"# HELP {name} Stage wall time dağılımı.")
+    lines.append(f"# TYPE {name} histogram")
+    for stage_name, st in sorted(stats.items()):
+        label = _label(stage_name)
+        for bound, count in zip(WALL_BUCKETS, st.wall_buckets):
+            lines.append(f'{name}_bucket{{stage="{label}",le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {st.calls}')
+        lines.append(f'{name}_sum{{stage="{label}"}} {st.wall_s}')
+        lines.append(f'{name}_count{{stage="{label}"}} {st.calls}')
+
+    return "\n".join(lines) + "\n"
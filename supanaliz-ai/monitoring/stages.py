@@ -0,0 +1,230 @@
+# supanaliz-ai/monitoring/stages.py
+
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# Peak bellek ölçümü tracemalloc ile yapılır; pandas/numpy ağır işlerde
+# kayda değer overhead getirdiği için varsayılan kapalı.
+TRACE_MEMORY = os.environ.get("SUPANALIZ_TRACE_MEMORY", "0") == "1"
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+# Wall time histogram sınırları (saniye)
+WALL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+@dataclass
+class StageRecord:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_mem_bytes: Optional[int] = None
+    started_at: float = 0.0
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_mem_bytes": self.peak_mem_bytes,
+        }
+
+
+@dataclass
+class StageTrace:
+    """
+    Bir kapsam (HTTP isteği, parser çağrısı) içinde biten stage kayıtları.
+    """
+    records: List[StageRecord] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for r in self.records:
+            # Aynı isimli stage birden fazla çalıştıysa süreler toplanır
+            if r.name in out:
+                prev = out[r.name]
+                prev["wall_s"] += r.wall_s
+                prev["cpu_s"] += r.cpu_s
+                prev["calls"] += 1
+            else:
+                out[r.name] = {**r.as_dict(), "calls": 1}
+        return out
+
+
+@dataclass
+class _StageStats:
+    calls: int = 0
+    errors: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    max_peak_mem_bytes: int = 0
+    wall_buckets: List[int] = field(default_factory=lambda: [0] * len(WALL_BUCKETS))
+
+
+class StageRegistry:
+    """
+    Süreç ömrü boyunca stage bazlı toplu metrikler (Prometheus için).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _StageStats] = {}
+
+    def observe(self, rec: StageRecord) -> None:
+        with self._lock:
+            st = self._stats.setdefault(rec.name, _StageStats())
+            st.calls += 1
+            st.errors += 1 if rec.error else 0
+            st.wall_s += rec.wall_s
+            st.cpu_s += rec.cpu_s
+            st.rows_in += rec.rows_in or 0
+            st.rows_out += rec.rows_out or 0
+            if rec.peak_mem_bytes:
+                st.max_peak_mem_bytes = max(st.max_peak_mem_bytes, rec.peak_mem_bytes)
+            for i, bound in enumerate(WALL_BUCKETS):
+                if rec.wall_s <= bound:
+                    st.wall_buckets[i] += 1
+
+    def snapshot(self) -> Dict[str, _StageStats]:
+        with self._lock:
+            return {
+                k: _StageStats(**{**v.__dict__, "wall_buckets": list(v.wall_buckets)})
+                for k, v in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+registry = StageRegistry()
+
+# features.parallel worker'ları fork ile açılır; fork anında kilidi başka bir thread
+# tutuyorsa çocuk süreçte kilitlenmemesi için yenilenir
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: setattr(registry, "_lock", threading.Lock()))
+
+# Aktif trace'ler (iç içe collect_stages kapsamları) ve bellek ölçüm yığını
+_active_traces: ContextVar[Tuple[StageTrace, ...]] = ContextVar(
+    "supanaliz_active_traces", default=()
+)
+_mem_stack: ContextVar[Tuple[List[int], ...]] = ContextVar(
+    "supanaliz_mem_stack", default=()
+)
+
+
+@contextmanager
+def collect_stages() -> Iterator[StageTrace]:
+    """
+    Kapsam içinde biten tüm stage kayıtlarını toplar.
+    Dış kapsamlar (örn. HTTP isteği) da aynı kayıtları görmeye devam eder.
+    """
+    trace = StageTrace()
+    token = _active_traces.set(_active_traces.get() + (trace,))
+    try:
+        yield trace
+    finally:
+        _active_traces.reset(token)
+
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None) -> Iterator[StageRecord]:
+    """
+    Bir pipeline adımını ölçer: wall time, CPU time (thread), satır sayıları,
+    SUPANALIZ_TRACE_MEMORY=1 ise peak bellek (stage başlangıcına göre).
+
+        with stage("purchase.fx_lookup", rows_in=len(df)) as st:
+            ...
+            st.rows_out = len(df)
+    """
+    rec = StageRecord(name=name, rows_in=rows_in, started_at=time.time())
+
+    tracing = tracemalloc.is_tracing()
+    mem_token = None
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        parents = _mem_stack.get()
+        if parents:
+            # Dış stage'in şu ana kadarki peak'i reset'ten önce saklanır
+            parents[-1][1] = max(parents[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]  # [başlangıç, şimdiye kadarki max]
+        mem_token = _mem_stack.set(parents + (frame,))
+
+    wall0 = time.perf_counter()
+    cpu0 = time.thread_time()
+    try:
+        yield rec
+    except BaseException as exc:
+        rec.error = type(exc).__name__
+        raise
+    finally:
+        rec.wall_s = time.perf_counter() - wall0
+        rec.cpu_s = time.thread_time() - cpu0
+
+        if tracing and mem_token is not None:
+            _current, peak = tracemalloc.get_traced_memory()
+            frame = _mem_stack.get()[-1]
+            abs_peak = max(frame[1], peak)
+            rec.peak_mem_bytes = max(0, abs_peak - frame[0])
+            _mem_stack.reset(mem_token)
+            parents = _mem_stack.get()
+            if parents:
+                parents[-1][1] = max(parents[-1][1], abs_peak)
+
+        registry.observe(rec)
+        for trace in _active_traces.get():
+            trace.records.append(rec)
+
+
+def _row_count(obj: Any) -> Optional[int]:
+    """
+    DataFrame / Series → len, parser çıktısı ({"data": df}) → len(data).
+    """
+    if hasattr(obj, "shape") and hasattr(obj, "__len__"):
+        return len(obj)
+    if isinstance(obj, dict) and "data" in obj and hasattr(obj["data"], "shape"):
+        return len(obj["data"])
+    return None
+
+
+def instrument(name: Optional[str] = None) -> Callable:
+    """
+    Fonksiyonu stage olarak ölçen dekoratör.
+    İlk DataFrame argümanı rows_in, DataFrame dönüşü rows_out olarak kaydedilir.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        stage_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = None
+            for a in list(args) + list(kwargs.values()):
+                rows_in = _row_count(a)
+                if rows_in is not None:
+                    break
+            with stage(stage_name, rows_in=rows_in) as rec:
+                result = func(*args, **kwargs)
+                rec.rows_out = _row_count(result)
+                return result
+
+        return wrapper
+
+    return decorator
@@ -1,12 +1,17 @@
 # supanaliz-ai/parser/__init__.py
 
 from .excel_loader import load_excel
-from .sales_parser import parse_sales_excel
-from .purchase_parser import parse_purchase_excel
+from .sales_parser import parse_sales_excel, clean_sales_frame
+from .purchase_parser import parse_purchase_excel, clean_purchase_frame
+from .fx_engine import FXEngine, load_fx_engine
 
 
 __all__ = [
     "load_excel",
     "parse_sales_excel",
     "parse_purchase_excel",
+    "clean_sales_frame",
+    "clean_purchase_frame",
+    "FXEngine",
+    "load_fx_engine",
 ]
@@ -0,0 +1,308 @@
+# parser/fx_engine.py
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+BASE_CURRENCY = "TRY"
+
+# Kur dosyasındaki kolon → kur tipi
+RATE_COLUMNS: Dict[str, str] = {
+    "effective_sell": "Efektif Satış Kuru",
+    "effective_buy": "Efektif Alış Kuru",
+    "forex_sell": "Döviz Satış Kuru",
+    "forex_buy": "Döviz Alış Kuru",
+}
+# Orta kur = (alış + satış) / 2
+MID_RATES: Dict[str, Tuple[str, str]] = {
+    "mid": ("effective_buy", "effective_sell"),
+    "forex_mid": ("forex_buy", "forex_sell"),
+}
+DEFAULT_RATE_TYPE = "effective_sell"
+
+# ERP / TCMB exportlarındaki para birimi yazımları
+CURRENCY_ALIASES: Dict[str, str] = {
+    "TL": "TRY",
+    "YTL": "TRY",
+    "₺": "TRY",
+    "$": "USD",
+    "€": "EUR",
+}
+
+# Satınalma satırında fiyatın para birimi kolonu (ilk bulunan kullanılır)
+CURRENCY_COLUMNS = ("P. Br.", "Para Birimi", "Döviz Cinsi")
+
+DateLike = Union[pd.Series, pd.Index, np.ndarray, Iterable]
+
+
+def normalize_currency(code) -> Optional[str]:
+    if code is None or (isinstance(code, float) and np.isnan(code)):
+        return None
+    code = str(code).strip().upper()
+    if not code:
+        return None
+    return CURRENCY_ALIASES.get(code, code)
+
+
+def _to_days(dates: DateLike) -> np.ndarray:
+    values = pd.to_datetime(pd.Series(dates) if not isinstance(dates, pd.Series) else dates)
+    return values.to_numpy().astype("datetime64[D]")
+
+
+def _to_numeric(s: pd.Series) -> pd.Series:
+    # Excel'den "34,1234" gibi virgüllü gelebilir
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)
+    return pd.to_numeric(s.astype(str).str.replace(",", ".", regex=False), errors="coerce")
+
+
+class FXEngine:
+    """
+    Çok para birimli kur motoru.
+    Kur tipi başına yoğun (para birimi × gün) matris tutar; tüm kurlar baz para birimi
+    (TRY) cinsindendir: R[c, d] = 1 birim c'nin d günündeki TRY karşılığı, R[TRY, :] = 1.
+    - çapraz kur: R[a, d] / R[b, d]
+    - dönüşüm: tutar * R[kaynak, gün] / R[hedef, gün]; (para birimi, gün) → düz index
+      hesaplanıp matristen tek `take` ile okunur (milyonlarca satırda Python döngüsü yok)
+    Günlük boşluklar load_fx_rates gibi ffill + bfill ile doldurulur; kur aralığı
+    dışındaki tarihler ve bilinmeyen para birimleri NaN döner.
+    """
+
+    def __init__(
+        self,
+        currencies: List[str],
+        start: np.datetime64,
+        matrices: Dict[str, np.ndarray],
+        base: str = BASE_CURRENCY,
+    ):
+        self.currencies = list(currencies)
+        self.index = {c: i for i, c in enumerate(self.currencies)}
+        self.start = np.datetime64(start, "D")
+        self.matrices = matrices
+        self.base = base
+        shapes = {m.shape for m in matrices.values()}
+        if len(shapes) != 1:
+            raise ValueError(f"Kur matrisleri aynı boyutta olmalı: {shapes}")
+        self.n_days = next(iter(shapes))[1]
+
+        for name, (buy, sell) in MID_RATES.items():
+            if buy in matrices and sell in matrices and name not in matrices:
+                self.matrices[name] = (matrices[buy] + matrices[sell]) / 2.0
+
+    # ---------------------------------------------------
+    # Kurulum
+    # ---------------------------------------------------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, base: str = BASE_CURRENCY) -> "FXEngine":
+        """
+        Uzun formatlı kur tablosu: Tarih, P. Br. (kaynak para birimi),
+        opsiyonel Hedef Para Birimi ve RATE_COLUMNS'taki kur kolonlarından en az biri.
+        P. Br. yoksa tüm satırlar USD kabul edilir (eski tek seri fx_rates.xlsx).
+        Hedefi baz para birimi olmayan satırlar (örn. USD → EUR paritesi) aynı günün
+        baz kurlarıyla zincirlenir; bilinmeyen taraf (kaynak ya da hedef) türetilir.
+        """
+        base = normalize_currency(base)
+        if "Tarih" not in df.columns:
+            raise KeyError("Kur tablosunda 'Tarih' kolonu yok.")
+        rate_cols = {t: c for t, c in RATE_COLUMNS.items() if c in df.columns}
+        if not rate_cols:
+            raise KeyError(f"Kur tablosunda kur kolonu yok. Beklenen: {list(RATE_COLUMNS.values())}")
+
+        data = pd.DataFrame({"Tarih": pd.to_datetime(df["Tarih"], dayfirst=True, errors="coerce")})
+        data["Tarih"] = data["Tarih"].dt.normalize()
+        source = df["P. Br."] if "P. Br." in df.columns else pd.Series("USD", index=df.index)
+        target = (
+            df["Hedef Para Birimi"] if "Hedef Para Birimi" in df.columns
+            else pd.Series(base, index=df.index)
+        )
+        data["cur"] = source.map(normalize_currency)
+        data["target"] = target.map(normalize_currency).fillna(base)
+        for t, c in rate_cols.items():
+            data[t] = _to_numeric(df[c])
+        data = data.dropna(subset=["Tarih", "cur"])
+        data = data[data["cur"] != data["target"]]
+        if data.empty:
+            raise ValueError("Kur tablosunda geçerli satır yok.")
+
+        days = pd.date_range(data["Tarih"].min(), data["Tarih"].max(), freq="D")
+        currencies = [base] + sorted(set(data["cur"]) | set(data["target"]) - {base})
+
+        matrices: Dict[str, np.ndarray] = {}
+        for t in rate_cols:
+            # Aynı gün birden fazla kayıt → ortalama (load_fx_rates ile aynı)
+            wide = (
+                data.pivot_table(index="Tarih", columns=["cur", "target"], values=t, aggfunc="mean")
+                .reindex(days)
+                .ffill()
+                .bfill()
+            )
+            m = np.full((len(currencies), len(days)), np.nan)
+            m[0] = 1.0
+            pos = {c: i for i, c in enumerate(currencies)}
+            # Önce doğrudan baz kotasyonlar, sonra baz dışı pariteler (tek adım zincir):
+            # hedefin baz kuru biliniyorsa kaynak, değilse ters yönde hedef türetilir
+            pairs = sorted(wide.columns, key=lambda p: p[1] != base)
+            for cur, tgt in pairs:
+                values = wide[(cur, tgt)].to_numpy()
+                if tgt == base:
+                    derived, row = values, pos[cur]
+                elif not np.isnan(m[pos[tgt]]).all():
+                    derived, row = values * m[pos[tgt]], pos[cur]
+                else:
+                    derived, row = m[pos[cur]] / values, pos[tgt]
+                m[row] = np.where(np.isnan(m[row]), derived, m[row])
+            matrices[t] = m
+
+        return cls(currencies, days[0].to_datetime64(), matrices, base=base)
+
+    @classmethod
+    def from_series(
+        cls,
+        fx_daily: pd.Series,
+        currency: str = "USD",
+        rate_type: str = DEFAULT_RATE_TYPE,
+        base: str = BASE_CURRENCY,
+    ) -> "FXEngine":
+        """
+        load_fx_rates çıktısı gibi tarih indexli tek kur serisinden (currency → base).
+        """
+        if rate_type not in RATE_COLUMNS:
+            raise KeyError(f"Tek seriden kur tipi kurulamaz: {rate_type}. Geçerli: {list(RATE_COLUMNS)}")
+        df = pd.DataFrame(
+            {
+                "Tarih": fx_daily.index,
+                "P. Br.": currency,
+                "Hedef Para Birimi": base,
+                RATE_COLUMNS[rate_type]: fx_daily.to_numpy(dtype=float),
+            }
+        )
+        return cls.from_frame(df, base=base)
+
+    # ---------------------------------------------------
+    # Okuma
+    # ---------------------------------------------------
+    def rate_types(self) -> List[str]:
+        return sorted(self.matrices)
+
+    def _matrix(self, rate_type: str) -> np.ndarray:
+        m = self.matrices.get(rate_type)
+        if m is None:
+            raise KeyError(f"Kur tipi bulunamadı: {rate_type}. Mevcut: {self.rate_types()}")
+        return m
+
+    def currency_codes(self, currencies) -> np.ndarray:
+        """
+        Para birimi değerleri → matris satır no (bilinmeyen / boş → -1).
+        Tekil değerler üzerinden eşlenir (factorize), satır başına dict lookup yok.
+        """
+        if isinstance(currencies, str) or currencies is None:
+            return np.array([self.index.get(normalize_currency(currencies), -1)])
+        codes, uniques = pd.factorize(pd.Series(currencies), use_na_sentinel=True)
+        lookup = np.array(
+            [self.index.get(normalize_currency(u), -1) for u in uniques] + [-1], dtype=np.int64
+        )
+        return lookup[codes]  # -1 sentinel → lookup[-1] = -1
+
+    def day_codes(self, dates: DateLike) -> np.ndarray:
+        """
+        Tarih → gün kolonu (aralık dışı / NaT → -1).
+        """
+        days = _to_days(dates)
+        idx = (days - self.start).astype(np.int64)
+        valid = ~np.isnat(days) & (idx >= 0) & (idx < self.n_days)
+        return np.where(valid, idx, -1)
+
+    def _gather(self, m: np.ndarray, cur: np.ndarray, day: np.ndarray) -> np.ndarray:
+        cur, day = np.broadcast_arrays(cur, day)
+        valid = (cur >= 0) & (day >= 0)
+        flat = np.where(valid, cur * self.n_days + day, 0)
+        out = m.ravel().take(flat)
+        out[~valid] = np.nan
+        return out
+
+    def rates(
+        self, currencies, dates: DateLike, rate_type: str = DEFAULT_RATE_TYPE
+    ) -> np.ndarray:
+        """
+        Satır başına 1 birim para biriminin baz (TRY) karşılığı.
+        currencies: tek kod ya da satır başına kod dizisi.
+        """
+        return self._gather(self._matrix(rate_type), self.currency_codes(currencies), self.day_codes(dates))
+
+    def cross_rates(
+        self, from_currency, to_currency, dates: DateLike, rate_type: str = DEFAULT_RATE_TYPE
+    ) -> np.ndarray:
+        """
+        1 birim from_currency = ? to_currency (baz üzerinden çapraz kur).
+        """
+        m = self._matrix(rate_type)
+        day = self.day_codes(dates)
+        return self._gather(m, self.currency_codes(from_currency), day) / self._gather(
+            m, self.currency_codes(to_currency), day
+        )
+
+    def convert(
+        self,
+        amounts,
+        from_currency,
+        dates: DateLike,
+        to_currency="USD",
+        rate_type: str = DEFAULT_RATE_TYPE,
+    ) -> np.ndarray:
+        """
+        amounts * R[kaynak, gün] / R[hedef, gün]. Kaynak / hedef tek kod ya da satır
+        başına kod dizisi olabilir.
+        """
+        m = self._matrix(rate_type)
+        day = self.day_codes(dates)
+        values = np.asarray(amounts, dtype=float)
+        return values * self._gather(m, self.currency_codes(from_currency), day) / self._gather(
+            m, self.currency_codes(to_currency), day
+        )
+
+    def convert_column(
+        self,
+        df: pd.DataFrame,
+        amount_col: str,
+        currency_col: str,
+        date_col: str,
+        to_currency: str = "USD",
+        rate_type: str = DEFAULT_RATE_TYPE,
+    ) -> pd.Series:
+        missing = [c for c in (amount_col, currency_col, date_col) if c not in df.columns]
+        if missing:
+            raise KeyError(f"Kur dönüşümü için eksik kolon(lar): {missing}")
+        out = self.convert(df[amount_col], df[currency_col], df[date_col], to_currency, rate_type)
+        return pd.Series(out, index=df.index, name=f"{amount_col} {to_currency}")
+
+    def to_frame(self, rate_type: str = DEFAULT_RATE_TYPE) -> pd.DataFrame:
+        """
+        Gün × para birimi tablo (inceleme / export için).
+        """
+        days = pd.date_range(pd.Timestamp(self.start), periods=self.n_days, freq="D", name="Tarih")
+        return pd.DataFrame(self._matrix(rate_type).T, index=days, columns=self.currencies)
+
+    def __repr__(self) -> str:
+        return (
+            f"FXEngine(base={self.base!r}, currencies={self.currencies}, "
+            f"days={self.n_days}, rate_types={self.rate_types()})"
+        )
+
+
+def load_fx_engine(path: str, base: str = BASE_CURRENCY) -> FXEngine:
+    """
+    Kur Excel'ini (bir ya da çok para birimli, bir ya da çok kur tipli) FXEngine'e yükler.
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Kur dosyası bulunamadı: {file_path}")
+    return FXEngine.from_frame(pd.read_excel(file_path), base=base)
+
+
+def purchase_currency_column(columns) -> Optional[str]:
+    return next((c for c in CURRENCY_COLUMNS if c in columns), None)
@@ -1,21 +1,32 @@
 # parser/purchase_parser.py
 
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from .excel_loader import load_excel
-from .fx_parser import load_fx_rates
+from .fx_engine import (
+    FXEngine,
+    DEFAULT_RATE_TYPE,
+    load_fx_engine,
+    purchase_currency_column,
+)
+from monitoring import stage, collect_stages
 
 
 PURCHASE_SHEET_NAME = "IASPURHEADLISTTREE"
 
 
-def parse_purchase_excel(
-    path: str,
-    fx_path: str,
-    sheet_name: str = PURCHASE_SHEET_NAME,
-) -> Dict[str, Any]:
+def clean_purchase_frame(
+    df: pd.DataFrame,
+    fx: Union[pd.Series, FXEngine],
+    rate_type: str = DEFAULT_RATE_TYPE,
+) -> pd.DataFrame:
     """
-    Satınalma Excel'ini ve kur tablosunu okur, temizlenmiş DataFrame döner.
+    Ham satınalma sheet'ini temizler ve sipariş günündeki kurla USD'ye çevirir.
+    Excel okumasından bağımsızdır; sentetik veri / benchmark için de kullanılır.
+
+    fx: FXEngine ya da load_fx_rates çıktısı günlük USD/TRY serisi.
+    Fiyat'ın para birimi CURRENCY_COLUMNS'taki kolondan (örn. 'P. Br.') okunur;
+    kolon yoksa tüm fiyatlar TRY kabul edilir.
 
     Zorunlu kolonlar:
     - 'Sipariş Tarihi'
@@ -27,8 +38,6 @@ def parse_purchase_excel(
     - 'Birim'
     """
 
-    df = load_excel(path, sheet_name=sheet_name).copy()
-
     required_cols = [
         "Sipariş Tarihi",
         "Teslim Tarihi",
@@ -42,53 +51,83 @@ def parse_purchase_excel(
     if missing:
         raise KeyError(f"Satınalma datasında eksik kolon(lar) var: {missing}")
 
+    df = df.copy()
+
     # Tarihler
-    df["Sipariş Tarihi"] = pd.to_datetime(
-        df["Sipariş Tarihi"], dayfirst=True, errors="coerce"
-    )
-    df["Teslim Tarihi"] = pd.to_datetime(
-        df["Teslim Tarihi"], dayfirst=True, errors="coerce"
-    )
-
-    # 1975 -> geçersiz teslim tarihi
-    mask_1975 = df["Teslim Tarihi"].dt.year == 1975
-    df.loc[mask_1975, "Teslim Tarihi"] = pd.NaT
-
-    # Numerikler
-    df["Sipariş Miktarı"] = pd.to_numeric(df["Sipariş Miktarı"], errors="coerce")
-    df["Fiyat"] = pd.to_numeric(df["Fiyat"], errors="coerce")
-
-    # Kalem toplamı (lokal para birimi)
-    df["Kalem Toplam TL"] = df["Sipariş Miktarı"] * df["Fiyat"]
-
-    # Lead time (gün)
-    df["Lead Time (days)"] = (
-        df["Teslim Tarihi"] - df["Sipariş Tarihi"]
-    ).dt.days
-    # Teslim yoksa lead time NaN zaten
-
-    # Birim string
-    df["Birim"] = df["Birim"].astype(str)
-
-    # Kur serisini yükle
-    fx_daily = load_fx_rates(fx_path)  # Tarih indexli Series
-
-    # Her sipariş tarihi için kur çek
-    # (tarih indexli seride direkt loc ile – önceden ffill/bfill yaptık)
-    def get_fx(date):
-        if pd.isna(date):
-            return pd.NA
-        try:
-            return fx_daily.loc[date.normalize()]
-        except KeyError:
-            # Teoride olmamalı, asfreq+ffill+bfill yaptık
-            return pd.NA
-
-    df["FX_USDTRY"] = df["Sipariş Tarihi"].apply(get_fx)
-
-    # USD cinsinden birim maliyet ve toplam maliyet
-    df["Birim Maliyet USD"] = df["Fiyat"] / df["FX_USDTRY"]
-    df["Kalem Toplam USD"] = df["Kalem Toplam TL"] / df["FX_USDTRY"]
+    with stage("purchase.parse_dates", rows_in=len(df)):
+        df["Sipariş Tarihi"] = pd.to_datetime(
+            df["Sipariş Tarihi"], dayfirst=True, errors="coerce"
+        )
+        df["Teslim Tarihi"] = pd.to_datetime(
+            df["Teslim Tarihi"], dayfirst=True, errors="coerce"
+        )
+
+        # 1975 -> geçersiz teslim tarihi
+        mask_1975 = df["Teslim Tarihi"].dt.year == 1975
+        df.loc[mask_1975, "Teslim Tarihi"] = pd.NaT
+
+    with stage("purchase.clean_columns", rows_in=len(df)):
+        # Numerikler
+        df["Sipariş Miktarı"] = pd.to_numeric(df["Sipariş Miktarı"], errors="coerce")
+        df["Fiyat"] = pd.to_numeric(df["Fiyat"], errors="coerce")
+
+        # Kalem toplamı (lokal para birimi)
+        df["Kalem Toplam TL"] = df["Sipariş Miktarı"] * df["Fiyat"]
+
+        # Lead time (gün)
+        df["Lead Time (days)"] = (
+            df["Teslim Tarihi"] - df["Sipariş Tarihi"]
+        ).dt.days
+        # Teslim yoksa lead time NaN zaten
+
+        # Birim string
+        df["Birim"] = df["Birim"].astype(str)
+
+    engine = fx if isinstance(fx, FXEngine) else FXEngine.from_series(fx, "USD", rate_type)
+    currency_col = purchase_currency_column(df.columns)
+
+    # Sipariş günü kurları: (para birimi, gün) → yoğun kur matrisinden vektörel okuma
+    with stage("purchase.fx_lookup", rows_in=len(df)):
+        dates = df["Sipariş Tarihi"]
+        df["FX_USDTRY"] = engine.rates("USD", dates, rate_type)
+
+        if currency_col is not None:
+            # TRY dışı fiyatlar önce TL'ye (kalem toplamı TL cinsinden kalır)
+            price_try = df["Fiyat"] * engine.rates(df[currency_col], dates, rate_type)
+            df["Kalem Toplam TL"] = df["Sipariş Miktarı"] * price_try
+        else:
+            price_try = df["Fiyat"]
+
+        # USD cinsinden birim maliyet ve toplam maliyet
+        df["Birim Maliyet USD"] = price_try / df["FX_USDTRY"]
+        df["Kalem Toplam USD"] = df["Kalem Toplam TL"] / df["FX_USDTRY"]
+
+    return df
+
+
+def parse_purchase_excel(
+    path: str,
+    fx_path: str,
+    sheet_name: str = PURCHASE_SHEET_NAME,
+    rate_type: str = DEFAULT_RATE_TYPE,
+) -> Dict[str, Any]:
+    """
+    Satınalma Excel'ini ve kur tablosunu okur, temizlenmiş DataFrame döner.
+    Kolon temizliği ve USD dönüşümü clean_purchase_frame içinde.
+    rate_type: effective_sell (varsayılan), effective_buy, forex_*, mid, forex_mid.
+    """
+
+    with collect_stages() as trace:
+        with stage("purchase.load_excel") as st:
+            raw = load_excel(path, sheet_name=sheet_name)
+            st.rows_out = len(raw)
+
+        # Kur matrisini yükle (para birimi × gün)
+        with stage("purchase.load_fx") as st:
+            fx = load_fx_engine(fx_path)
+            st.rows_out = fx.n_days
+
+        df = clean_purchase_frame(raw, fx, rate_type=rate_type)
 
     info = {
         "rows": len(df),
@@ -97,7 +136,10 @@ def parse_purchase_excel(
         "qty_missing": df["Sipariş Miktarı"].isna().sum(),
         "price_missing": df["Fiyat"].isna().sum(),
         "fx_missing": df["FX_USDTRY"].isna().sum(),
+        "fx_rate_type": rate_type,
+        "fx_currencies": fx.currencies,
         "unit_counts": df["Birim"].value_counts().to_dict(),
+        "timings": trace.as_dict(),
     }
 
     return {"data": df, "meta": info}
@@ -3,17 +3,16 @@
 import pandas as pd
 from typing import Dict, Any
 from .excel_loader import load_excel
+from monitoring import stage, collect_stages
 
 
 SALES_SHEET_NAME = "IASSALHEADLIST"
 
 
-def parse_sales_excel(
-    path: str,
-    sheet_name: str = SALES_SHEET_NAME,
-) -> Dict[str, Any]:
+def clean_sales_frame(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Satış Excel'ini okur ve analiz için temiz bir DataFrame + meta bilgiler döner.
+    Ham satış sheet'ini (load_excel çıktısı) analiz için temizler.
+    Excel okumasından bağımsızdır; sentetik veri / benchmark için de kullanılır.
 
     Zorunlu kolonlar:
     - 'Başlangıç Tarihi'
@@ -24,8 +23,6 @@ def parse_sales_excel(
     - 'Miktar Br.'
     """
 
-    df = load_excel(path, sheet_name=sheet_name).copy()
-
     required_cols = [
         "Başlangıç Tarihi",
         "Genel Toplam (USD)",
@@ -39,23 +36,47 @@ def parse_sales_excel(
     if missing:
         raise KeyError(f"Satış datasında eksik kolon(lar) var: {missing}")
 
+    df = df.copy()
+
     # Tarih
-    df["Başlangıç Tarihi"] = pd.to_datetime(
-        df["Başlangıç Tarihi"], dayfirst=True, errors="coerce"
-    )
+    with stage("sales.parse_dates", rows_in=len(df)):
+        df["Başlangıç Tarihi"] = pd.to_datetime(
+            df["Başlangıç Tarihi"], dayfirst=True, errors="coerce"
+        )
+
+    with stage("sales.clean_columns", rows_in=len(df)) as st:
+        # Numerikler
+        df["Genel Toplam (USD)"] = pd.to_numeric(
+            df["Genel Toplam (USD)"], errors="coerce"
+        )
+        df["Miktar"] = pd.to_numeric(df["Miktar"], errors="coerce")
+
+        # Birimler string
+        df["Miktar Br."] = df["Miktar Br."].astype(str)
+
+        # Yardımcı zaman kolonları
+        df["Yıl"] = df["Başlangıç Tarihi"].dt.year
+        df["Ay"] = df["Başlangıç Tarihi"].dt.month
+        st.rows_out = len(df)
 
-    # Numerikler
-    df["Genel Toplam (USD)"] = pd.to_numeric(
-        df["Genel Toplam (USD)"], errors="coerce"
-    )
-    df["Miktar"] = pd.to_numeric(df["Miktar"], errors="coerce")
+    return df
+
+
+def parse_sales_excel(
+    path: str,
+    sheet_name: str = SALES_SHEET_NAME,
+) -> Dict[str, Any]:
+    """
+    Satış Excel'ini okur ve analiz için temiz bir DataFrame + meta bilgiler döner.
+    Kolon temizliği clean_sales_frame içinde.
+    """
 
-    # Birimler string
-    df["Miktar Br."] = df["Miktar Br."].astype(str)
+    with collect_stages() as trace:
+        with stage("sales.load_excel") as st:
+            raw = load_excel(path, sheet_name=sheet_name)
+            st.rows_out = len(raw)
 
-    # Yardımcı zaman kolonları
-    df["Yıl"] = df["Başlangıç Tarihi"].dt.year
-    df["Ay"] = df["Başlangıç Tarihi"].dt.month
+        df = clean_sales_frame(raw)
 
     # Basic kalite metrikleri
     info = {
@@ -65,6 +86,7 @@ def parse_sales_excel(
         "usd_sales_missing": df["Genel Toplam (USD)"].isna().sum(),
         "qty_missing": df["Miktar"].isna().sum(),
         "unit_counts": df["Miktar Br."].value_counts().to_dict(),
+        "timings": trace.as_dict(),
     }
 
     return {"data": df, "meta": info}
@@ -0,0 +1,11 @@
+# supanaliz-ai/services/__init__.py
+
+from .events import EventBus, format_sse
+from .watcher import PipelineWatcher, dirty_stages
+
+__all__ = [
+    "EventBus",
+    "format_sse",
+    "PipelineWatcher",
+    "dirty_stages",
+]
@@ -0,0 +1,64 @@
+# supanaliz-ai/services/events.py
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from typing import Any, Dict, List, Tuple
+
+
+class EventBus:
+    """
+    Watcher thread'inden asyncio tarafındaki SSE aboneliklerine olay dağıtır.
+    Her abone kendi event loop'u + asyncio.Queue'su ile kaydolur;
+    publish() thread-safe olarak call_soon_threadsafe ile kuyruğa yazar.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._ids = itertools.count(1)
+
+    def subscribe(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        # Yavaş istemci kuyruğu doldurursa en eski olay atılır
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        event = {"id": next(self._ids), "event": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Loop kapanmış; abone temizlenir
+                self.unsubscribe(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Olayı text/event-stream formatına çevirir.
+    """
+    data = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
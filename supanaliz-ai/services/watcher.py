@@ -0,0 +1,231 @@
+# supanaliz-ai/services/watcher.py
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+from parser.sales_parser import parse_sales_excel
+from parser.purchase_parser import parse_purchase_excel
+from store.loader import (
+    sales_result_tables,
+    purchase_result_tables,
+    profit_result_tables,
+)
+from store.table_store import TableStore
+from monitoring import stage
+from .events import EventBus
+
+
+logger = logging.getLogger("supanaliz-watcher")
+
+
+# Stage → bağımlı olduğu kaynak dosyalar / stage'ler.
+# Sıra topolojik; recompute bu sırayla yapılır.
+STAGE_DEPENDENCIES: Dict[str, tuple] = {
+    "sales_parsed": ("sales",),
+    "purchase_parsed": ("purchase", "fx"),
+    "sales_tables": ("sales_parsed",),
+    "purchase_tables": ("purchase_parsed",),
+    "profit_tables": ("sales_parsed", "purchase_parsed"),
+}
+
+# Sonucu resident store'a yazılan stage'ler
+TABLE_STAGES = ("sales_tables", "purchase_tables", "profit_tables")
+
+
+def dirty_stages(changed_sources: Set[str]) -> List[str]:
+    """
+    Değişen kaynaklardan etkilenen stage'leri (geçişli) topolojik sırada döner.
+    """
+    dirty: Set[str] = set(changed_sources)
+    out: List[str] = []
+    for name, deps in STAGE_DEPENDENCIES.items():
+        if dirty.intersection(deps):
+            dirty.add(name)
+            out.append(name)
+    return out
+
+
+@dataclass
+class FileFingerprint:
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+def _sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PipelineWatcher:
+    """
+    data/ altındaki ERP exportlarını izler:
+    - mtime/size değişince dosya hash'lenir; hash aynıysa (sadece touch) yok sayılır
+    - değişen kaynağa bağlı stage'ler yeniden hesaplanır, diğerleri cache'ten gelir
+    - yeni tablo seti resident store'a atomik olarak publish edilir
+    - içeriği gerçekten değişen tablolar için "tables_updated" olayı yayınlanır
+    """
+
+    def __init__(
+        self,
+        sales_path: str,
+        purchase_path: str,
+        fx_path: str,
+        store: TableStore,
+        events: Optional[EventBus] = None,
+        interval_seconds: float = 10.0,
+    ):
+        self.sources: Dict[str, Path] = {
+            "sales": Path(sales_path),
+            "purchase": Path(purchase_path),
+            "fx": Path(fx_path),
+        }
+        self.store = store
+        self.events = events
+        self.interval_seconds = interval_seconds
+
+        self._fingerprints: Dict[str, FileFingerprint] = {}
+        self._results: Dict[str, Any] = {}
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+        self._runners: Dict[str, Callable[[], Any]] = {
+            "sales_parsed": lambda: parse_sales_excel(str(self.sources["sales"]))["data"],
+            "purchase_parsed": lambda: parse_purchase_excel(
+                str(self.sources["purchase"]), str(self.sources["fx"])
+            )["data"],
+            "sales_tables": lambda: sales_result_tables(self._results["sales_parsed"]),
+            "purchase_tables": lambda: purchase_result_tables(
+                self._results["purchase_parsed"]
+            ),
+            "profit_tables": lambda: profit_result_tables(
+                self._results["sales_parsed"], self._results["purchase_parsed"]
+            ),
+        }
+
+    # ---------------------------------------------------
+    # Değişiklik tespiti
+    # ---------------------------------------------------
+    def changed_sources(self) -> Dict[str, FileFingerprint]:
+        changed: Dict[str, FileFingerprint] = {}
+        for name, path in self.sources.items():
+            if not path.exists():
+                continue
+            st = path.stat()
+            prev = self._fingerprints.get(name)
+            if prev and prev.mtime_ns == st.st_mtime_ns and prev.size == st.st_size:
+                continue
+
+            digest = _sha256(path)
+            fp = FileFingerprint(mtime_ns=st.st_mtime_ns, size=st.st_size, sha256=digest)
+            if prev and prev.sha256 == digest:
+                # İçerik aynı, sadece zaman damgası değişmiş
+                self._fingerprints[name] = fp
+                continue
+            changed[name] = fp
+        return changed
+
+    # ---------------------------------------------------
+    # Recompute
+    # ---------------------------------------------------
+    def poll_once(self) -> List[str]:
+        """
+        Tek tarama: değişen kaynak varsa bağımlı stage'leri çalıştırır.
+        Dönüş: içeriği değişen tablo isimleri.
+        """
+        with self._run_lock:
+            changed = self.changed_sources()
+            if not changed:
+                return []
+
+            missing = [n for n, p in self.sources.items() if not p.exists()]
+            if missing:
+                logger.warning("Kaynak dosya(lar) eksik, recompute bekletiliyor: %s", missing)
+                return []
+
+            # İlk çalıştırmada hiçbir sonuç yoksa tüm stage'ler kirli
+            sources = set(changed) if self._results else set(self.sources)
+            stages = dirty_stages(sources)
+            logger.info("Değişen kaynaklar: %s → stage'ler: %s", sorted(changed), stages)
+
+            results = dict(self._results)
+            previous = self._results
+            try:
+                self._results = results
+                for name in stages:
+                    with stage(f"watcher.{name}"):
+                        results[name] = self._runners[name]()
+            except Exception:
+                # Yarım kalan hesap store'a yansımaz; bir sonraki taramada tekrar denenir
+                self._results = previous
+                logger.exception("Recompute başarısız")
+                return []
+
+            self._fingerprints.update(changed)
+
+            new_tables = dict(self._tables)
+            for name in stages:
+                if name in TABLE_STAGES:
+                    new_tables.update(results[name])
+
+            updated = [
+                t for t, df in new_tables.items()
+                if t not in self._tables or not self._tables[t].equals(df)
+            ]
+            self._tables = new_tables
+
+            if not updated:
+                return []
+
+            # Sadece değişen tablolar yeniden indexlenir; swap yine tek adımda
+            version = self.store.publish(
+                {t: new_tables[t] for t in updated}, replace=False
+            )
+            if self.events is not None:
+                self.events.publish(
+                    "tables_updated",
+                    {
+                        "version": version,
+                        "tables": sorted(updated),
+                        "sources": sorted(changed),
+                    },
+                )
+            return sorted(updated)
+
+    # ---------------------------------------------------
+    # Arka plan thread'i
+    # ---------------------------------------------------
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Watcher taraması başarısız")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="supanaliz-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
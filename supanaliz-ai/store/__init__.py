@@ -0,0 +1,24 @@
+# supanaliz-ai/store/__init__.py
+
+from .arrow import arrow_safe, write_parquet
+from .table_store import IndexedTable, TableStore
+from .query import run_query
+from .loader import build_result_tables, load_result_tables
+from .snapshots import SnapshotStore, diff_tables, snapshot_keys
+from .mapped import MappedFeatureStore, write_feature_store, build_feature_store
+
+__all__ = [
+    "arrow_safe",
+    "write_parquet",
+    "IndexedTable",
+    "TableStore",
+    "run_query",
+    "build_result_tables",
+    "load_result_tables",
+    "SnapshotStore",
+    "diff_tables",
+    "snapshot_keys",
+    "MappedFeatureStore",
+    "write_feature_store",
+    "build_feature_store",
+]
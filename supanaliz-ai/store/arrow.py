@@ -0,0 +1,32 @@
+# supanaliz-ai/store/arrow.py
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+
+def arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arrow'a çevrilemeyen karışık tipli object kolonları (örn. Excel'den
+    hem int hem str gelen Malzeme kodları) string'e çevirir; null'lar korunur.
+    Diğer kolonlara dokunulmaz, kopya yalnızca gerekiyorsa alınır.
+    """
+    mixed = [
+        c for c in df.columns
+        if df[c].dtype == object
+        and pd.api.types.infer_dtype(df[c], skipna=True)
+        not in ("string", "empty", "boolean")
+    ]
+    if not mixed:
+        return df
+    return df.assign(**{c: df[c].where(df[c].isna(), df[c].astype(str)) for c in mixed})
+
+
+def write_parquet(df: pd.DataFrame, path: Union[str, Path], index: bool = False) -> None:
+    """
+    DataFrame → parquet; karışık tipli kolonlar arrow_safe ile string'e çevrilir.
+    """
+    arrow_safe(df).to_parquet(path, index=index)
@@ -0,0 +1,125 @@
+# supanaliz-ai/store/loader.py
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional
+
+import pandas as pd
+
+from parser.sales_parser import parse_sales_excel
+from parser.purchase_parser import parse_purchase_excel
+from features.sales_features import build_sales_features
+from features.purchase_features import build_purchase_features
+from features.profit_features import build_profit_features
+from features.supplier_scorecard import supplier_scorecard
+from features.abc_xyz import classify_abc_xyz
+from features.incremental import IncrementalFeatureStore
+from features.parallel import (
+    configured_workers,
+    build_sales_features_parallel,
+    build_purchase_features_parallel,
+    build_profit_features_parallel,
+)
+
+
+def _parallel() -> bool:
+    # SUPANALIZ_FEATURE_WORKERS > 1 ise malzeme-partition'lı paralel mod (çıktı aynı)
+    return (configured_workers() or 1) > 1
+
+
+_INCREMENTAL: Dict[str, IncrementalFeatureStore] = {}
+_INCREMENTAL_LOCK = threading.Lock()
+
+
+def _incremental_tables(**frames: pd.DataFrame) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    SUPANALIZ_INCREMENTAL_DIR tanımlıysa per-malzeme / per-tedarikçi tablolar
+    IncrementalFeatureStore'dan gelir: sadece satır kümesi değişen key'ler yeniden
+    hesaplanır (çıktı tam hesapla aynı). Tanımlı değilse None.
+    """
+    state_dir = os.environ.get("SUPANALIZ_INCREMENTAL_DIR")
+    if not state_dir:
+        return None
+    with _INCREMENTAL_LOCK:
+        store = _INCREMENTAL.get(state_dir)
+        if store is None:
+            store = _INCREMENTAL[state_dir] = IncrementalFeatureStore(state_dir)
+        store.update(**frames)
+        return store.result_tables()
+
+
+def sales_result_tables(sales_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    tables = _incremental_tables(sales_df=sales_df)
+    if tables is not None:
+        sales_fe = {
+            "monthly_sales": tables["monthly_sales"],
+            "trend": tables["sales_trend"],
+            "seasonality": tables["seasonality"],
+            "abc_xyz": classify_abc_xyz(tables["monthly_sales"]),
+        }
+    elif _parallel():
+        sales_fe = build_sales_features_parallel(sales_df)
+    else:
+        sales_fe = build_sales_features(sales_df)
+    return {
+        "monthly_sales": sales_fe["monthly_sales"],
+        "sales_trend": sales_fe["trend"],
+        "seasonality": sales_fe["seasonality"],
+        "abc_xyz": sales_fe["abc_xyz"],
+    }
+
+
+def purchase_result_tables(purchase_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    tables = _incremental_tables(purchase_df=purchase_df)
+    if tables is not None:
+        purchase_fe = {
+            name: tables[name] for name in ("material_features", "supplier_features", "price_trend")
+        }
+    elif _parallel():
+        purchase_fe = build_purchase_features_parallel(purchase_df)
+    else:
+        purchase_fe = build_purchase_features(purchase_df)
+    return {
+        "material_features": purchase_fe["material_features"],
+        "supplier_features": purchase_fe["supplier_features"],
+        "price_trend": purchase_fe["price_trend"],
+        "supplier_scorecard": supplier_scorecard(purchase_df),
+    }
+
+
+def profit_result_tables(
+    sales_df: pd.DataFrame, purchase_df: pd.DataFrame
+) -> Dict[str, pd.DataFrame]:
+    if _parallel():
+        profit_fe = build_profit_features_parallel(sales_df, purchase_df)
+    else:
+        profit_fe = build_profit_features(sales_df, purchase_df)
+    return {
+        "matching": profit_fe["matching_table"],
+        "product_profit": profit_fe["product_profit"],
+        "stokout_candidates": profit_fe["stokout_candidates"],
+    }
+
+
+def build_result_tables(
+    sales_df: pd.DataFrame, purchase_df: pd.DataFrame
+) -> Dict[str, pd.DataFrame]:
+    """
+    Parse edilmiş satış + satınalma verisinden API'de resident tutulacak
+    tüm sonuç tablolarını üretir (isim → DataFrame).
+    """
+    return {
+        **profit_result_tables(sales_df, purchase_df),
+        **sales_result_tables(sales_df),
+        **purchase_result_tables(purchase_df),
+    }
+
+
+def load_result_tables(
+    sales_path: str, purchase_path: str, fx_path: str
+) -> Dict[str, pd.DataFrame]:
+    sales_df = parse_sales_excel(sales_path)["data"]
+    purchase_df = parse_purchase_excel(purchase_path, fx_path)["data"]
+    return build_result_tables(sales_df, purchase_df)
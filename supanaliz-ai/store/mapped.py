@@ -0,0 +1,209 @@
+# supanaliz-ai/store/mapped.py
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from parser.sales_parser import parse_sales_excel
+from parser.purchase_parser import parse_purchase_excel
+from monitoring import stage
+from .arrow import arrow_safe
+from .loader import build_result_tables
+
+
+# Parse edilmiş ham frame'ler de store'a yazılır; resident TableStore'a publish edilmez
+PARSED_TABLES = ("sales_parsed", "purchase_parsed")
+CURRENT_FILE = "CURRENT"
+
+
+def _arrow_table(df: pd.DataFrame):
+    """
+    DataFrame → pyarrow.Table, memory-map'ten kopyasız okunacak şekilde:
+    - float kolonlarda NaN değer olarak kalır (null'a çevrilmez); null bitmap'li
+      float kolon pandas'a dönerken kopyalanırdı
+    - karışık tipli object kolonlar (Excel'den int + str gelen kodlar) string'e çevrilir
+    """
+    import pyarrow as pa
+
+    df = arrow_safe(df.reset_index(drop=True))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    columns = []
+    for field, col in zip(table.schema, table.columns):
+        if pa.types.is_floating(field.type) and col.null_count:
+            col = pa.array(df[field.name].to_numpy(), type=field.type)
+        columns.append(col)
+    return pa.Table.from_arrays(columns, schema=table.schema)
+
+
+def write_feature_store(
+    tables: Dict[str, pd.DataFrame],
+    root: str,
+    keep: int = 2,
+    meta: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Tablo setini <root>/<versiyon>/<tablo>.arrow (sıkıştırmasız Arrow IPC file) olarak
+    yazar ve CURRENT işaretçisini atomik olarak yeni versiyona çevirir.
+    Eski versiyonlardan son `keep` tanesi tutulur; açık mmap'ler silinen dosyalarda da
+    geçerli kalır (Linux), worker'lar bir sonraki refresh'te yeni versiyona geçer.
+    """
+    import pyarrow as pa
+
+    base = Path(root)
+    base.mkdir(parents=True, exist_ok=True)
+    now = time.time_ns()
+    # Sözlük sırası = yazım sırası (saniye + ns), pid eşzamanlı yazımları ayırır
+    version = (
+        time.strftime("%Y%m%dT%H%M%S", time.gmtime(now // 10**9))
+        + f".{now % 10**9:09d}-{os.getpid()}"
+    )
+    tmp = base / f".tmp-{version}"
+    tmp.mkdir()
+
+    rows = sum(len(df) for df in tables.values())
+    with stage("store.mapped.write", rows_in=rows):
+        try:
+            info = {}
+            for name, df in tables.items():
+                table = _arrow_table(df)
+                with pa.OSFile(str(tmp / f"{name}.arrow"), "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                info[name] = {"rows": table.num_rows, "nbytes": table.nbytes}
+
+            manifest = {"version": version, "created_at": time.time(), "meta": meta or {}, "tables": info}
+            (tmp / "manifest.json").write_text(
+                json.dumps(manifest, ensure_ascii=False, indent=2, default=str), encoding="utf-8"
+            )
+            os.replace(tmp, base / version)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        pointer = base / f".{CURRENT_FILE}.{version}"
+        pointer.write_text(version, encoding="utf-8")
+        os.replace(pointer, base / CURRENT_FILE)
+
+    versions = sorted(p.name for p in base.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep] if keep > 0 else []:
+        if old != version:
+            shutil.rmtree(base / old, ignore_errors=True)
+
+    return version
+
+
+class MappedFeatureStore:
+    """
+    write_feature_store ile yazılmış tabloları read-only memory-map ile açar.
+    - numerik / tarih / str kolonlar mmap buffer'larına kopyasız bağlanır; aynı dosyayı
+      açan tüm uvicorn worker'ları fiziksel belleği page cache üzerinden paylaşır
+    - açılış sadece IPC footer okur → milisaniyeler
+    - DataFrame'ler read-only'dir (yazma denemesi CoW ile kopya üretir)
+    refresh(): CURRENT değiştiyse yeni versiyonu map eder.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.version: Optional[str] = None
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._manifest: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def current_version(self) -> Optional[str]:
+        pointer = self.root / CURRENT_FILE
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding="utf-8").strip() or None
+
+    def available(self) -> bool:
+        return self.current_version() is not None
+
+    def refresh(self) -> bool:
+        """
+        Yeni versiyon varsa map eder; değiştiyse True döner.
+        """
+        version = self.current_version()
+        if version is None:
+            raise KeyError(f"Feature store bulunamadı: {self.root}")
+        if version == self.version:
+            return False
+
+        import pyarrow as pa
+
+        path = self.root / version
+        manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        frames: Dict[str, pd.DataFrame] = {}
+        with stage("store.mapped.open", rows_in=sum(t["rows"] for t in manifest["tables"].values())):
+            for name in manifest["tables"]:
+                source = pa.memory_map(str(path / f"{name}.arrow"), "r")
+                table = pa.ipc.open_file(source).read_all()
+                frames[name] = table.to_pandas(split_blocks=True)
+
+        with self._lock:
+            self._frames = frames
+            self._manifest = manifest
+            self.version = version
+        return True
+
+    def names(self) -> List[str]:
+        return sorted(self._frames)
+
+    def table(self, name: str) -> pd.DataFrame:
+        frames = self._frames
+        if name not in frames:
+            raise KeyError(f"Feature store'da tablo yok: {name}. Mevcut tablolar: {sorted(frames)}")
+        return frames[name]
+
+    def result_tables(self) -> Dict[str, pd.DataFrame]:
+        """
+        Resident TableStore'a publish edilecek sonuç tabloları (parse edilmiş ham frame'ler hariç).
+        """
+        return {name: df for name, df in self._frames.items() if name not in PARSED_TABLES}
+
+    def describe(self) -> Dict[str, Any]:
+        return {"root": str(self.root), "version": self.version, **self._manifest}
+
+
+def build_feature_store(
+    sales_path: str, purchase_path: str, fx_path: str, root: str, keep: int = 2
+) -> str:
+    """
+    Excel'leri parse eder, sonuç tablolarını üretir ve parse edilmiş frame'lerle
+    birlikte feature store'a yazar (uvicorn worker'larını başlatmadan önce bir kez).
+    """
+    sales_df = parse_sales_excel(sales_path)["data"]
+    purchase_df = parse_purchase_excel(purchase_path, fx_path)["data"]
+    tables = {
+        "sales_parsed": sales_df,
+        "purchase_parsed": purchase_df,
+        **build_result_tables(sales_df, purchase_df),
+    }
+    meta = {"sales_path": sales_path, "purchase_path": purchase_path, "fx_path": fx_path}
+    return write_feature_store(tables, root, keep=keep, meta=meta)
+
+
+def main(argv: List[str] = None) -> None:
+    ap = argparse.ArgumentParser(description="Memory-mapped feature store üretimi")
+    ap.add_argument("--sales", default="data/AllTimeSatisPivotLast.xls")
+    ap.add_argument("--purchase", default="data/AllTimeSatinAlmaPivotLast.xls")
+    ap.add_argument("--fx", default="data/fx_rates.xlsx")
+    ap.add_argument("--out", default=os.environ.get("SUPANALIZ_FEATURE_STORE_DIR", "data/feature_store"))
+    ap.add_argument("--keep", type=int, default=2)
+    args = ap.parse_args(argv)
+
+    version = build_feature_store(args.sales, args.purchase, args.fx, args.out, keep=args.keep)
+    print(f"Feature store yazıldı: {Path(args.out) / version}")
+
+
+if __name__ == "__main__":
+    main()
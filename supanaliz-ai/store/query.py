@@ -0,0 +1,293 @@
+# supanaliz-ai/store/query.py
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .table_store import IndexedTable
+
+
+RANGE_OPS = ("<", "<=", ">", ">=", "between")
+SET_OPS = ("==", "!=", "in", "not_in")
+NULL_OPS = ("isna", "notna")
+AGG_FUNCS = ("sum", "mean", "count", "min", "max", "median", "std", "nunique")
+
+
+def _packed_all(n: int) -> np.ndarray:
+    return np.packbits(np.ones(n, dtype=bool))
+
+
+def _packed_none(n: int) -> np.ndarray:
+    return np.zeros((n + 7) // 8, dtype=np.uint8)
+
+
+def _packed_from_rows(rows: np.ndarray, n: int) -> np.ndarray:
+    mask = np.zeros(n, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask)
+
+
+def _categorical_filter(table: IndexedTable, col: str, op: str, value: Any) -> np.ndarray:
+    idx = table.categorical[col]
+    n = table.n
+
+    if op in NULL_OPS:
+        mask = np.packbits(idx.codes == -1)
+        return mask if op == "isna" else np.bitwise_not(mask)
+
+    values = value if op in ("in", "not_in") else [value]
+    if not isinstance(values, (list, tuple)):
+        raise ValueError(f"'{op}' operatörü liste bekler: {col}")
+
+    out = _packed_none(n)
+    for v in values:
+        code = idx.code_of(v)
+        if code is not None:
+            out = np.bitwise_or(out, idx.bitmap(code))
+
+    if op in ("!=", "not_in"):
+        # NaN satırlar "eşit değil" kümesine dahil edilmez
+        out = np.bitwise_and(np.bitwise_not(out), np.packbits(idx.codes != -1))
+    return out
+
+
+def _number(op: str, value: Any) -> float:
+    # null / liste / sayıya çevrilemeyen değer → 400 (ValueError)
+    if value is None or isinstance(value, (list, tuple, dict)):
+        raise ValueError(f"'{op}' operatörü sayısal değer bekler: {value!r}")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{op}' operatörü sayısal değer bekler: {value!r}") from None
+
+
+def _range_rows(idx, op: str, value: Any) -> np.ndarray:
+    vals = idx.values
+    if op == "between":
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise ValueError("'between' operatörü [alt, üst] bekler.")
+        lo = np.searchsorted(vals, _number(op, value[0]), side="left")
+        hi = np.searchsorted(vals, _number(op, value[1]), side="right")
+    elif op == "<":
+        lo, hi = 0, np.searchsorted(vals, _number(op, value), side="left")
+    elif op == "<=":
+        lo, hi = 0, np.searchsorted(vals, _number(op, value), side="right")
+    elif op == ">":
+        lo, hi = np.searchsorted(vals, _number(op, value), side="right"), idx.n_valid
+    elif op == ">=":
+        lo, hi = np.searchsorted(vals, _number(op, value), side="left"), idx.n_valid
+    else:  # "=="
+        lo = np.searchsorted(vals, _number(op, value), side="left")
+        hi = np.searchsorted(vals, _number(op, value), side="right")
+    return idx.order[lo:hi]
+
+
+def _numeric_filter(table: IndexedTable, col: str, op: str, value: Any) -> np.ndarray:
+    idx = table.sorted[col]
+    n = table.n
+
+    if op in NULL_OPS:
+        nan_rows = idx.order[idx.n_valid:]
+        mask = _packed_from_rows(nan_rows, n)
+        return mask if op == "isna" else np.bitwise_not(mask)
+
+    if op in RANGE_OPS or op == "==":
+        return _packed_from_rows(_range_rows(idx, op, value), n)
+
+    if op in ("in", "not_in"):
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"'{op}' operatörü liste bekler: {col}")
+        # Listedeki null → NaN satırlar (not_in'de zaten valid ile dışarıda kalır)
+        rows = [_range_rows(idx, "==", v) for v in value if v is not None]
+        if op == "in" and any(v is None for v in value):
+            rows.append(idx.order[idx.n_valid:])
+        mask = _packed_from_rows(
+            np.concatenate(rows) if rows else np.array([], dtype=np.int64), n
+        )
+        if op == "in":
+            return mask
+        valid = _packed_from_rows(idx.order[: idx.n_valid], n)
+        return np.bitwise_and(np.bitwise_not(mask), valid)
+
+    if op == "!=":
+        valid = _packed_from_rows(idx.order[: idx.n_valid], n)
+        eq = _packed_from_rows(_range_rows(idx, "==", value), n)
+        return np.bitwise_and(np.bitwise_not(eq), valid)
+
+    raise ValueError(f"Desteklenmeyen operatör: {op}")
+
+
+def _fallback_filter(table: IndexedTable, col: str, op: str, value: Any) -> np.ndarray:
+    """
+    Index'i olmayan kolonlar (örn. datetime) için pandas ile değerlendirme.
+    """
+    s = table.df[col]
+    if op == "isna":
+        mask = s.isna()
+    elif op == "notna":
+        mask = s.notna()
+    elif op in ("in", "not_in"):
+        mask = s.isin(value)
+        mask = ~mask & s.notna() if op == "not_in" else mask
+    elif op == "between":
+        mask = s.between(value[0], value[1])
+    else:
+        mask = {
+            "==": s.__eq__, "!=": s.__ne__, "<": s.__lt__,
+            "<=": s.__le__, ">": s.__gt__, ">=": s.__ge__,
+        }[op](value)
+    return np.packbits(mask.fillna(False).to_numpy(dtype=bool))
+
+
+def filter_rows(table: IndexedTable, filters: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Filtre listesini (AND) index'ler üzerinden değerlendirir.
+    Dönüş: eşleşen satır id'leri (artan sırada).
+    """
+    n = table.n
+    mask = _packed_all(n)
+
+    for f in filters:
+        col = f.get("column")
+        op = f.get("op", "==")
+        value = f.get("value")
+
+        if col not in table.df.columns:
+            raise KeyError(f"Bilinmeyen kolon: {col}")
+        if op not in RANGE_OPS + SET_OPS + NULL_OPS:
+            raise ValueError(f"Desteklenmeyen operatör: {op}")
+        if value is None and op in ("==", "!="):
+            # null ile eşitlik → boşluk kontrolü
+            op = "isna" if op == "==" else "notna"
+
+        if col in table.categorical:
+            if op in RANGE_OPS:
+                part = _fallback_filter(table, col, op, value)
+            else:
+                part = _categorical_filter(table, col, op, value)
+        elif col in table.sorted:
+            part = _numeric_filter(table, col, op, value)
+        else:
+            part = _fallback_filter(table, col, op, value)
+
+        mask = np.bitwise_and(mask, part)
+
+    return np.flatnonzero(np.unpackbits(mask, count=n))
+
+
+def _sorted_rows(
+    table: IndexedTable,
+    rows: np.ndarray,
+    sort: List[Dict[str, Any]],
+    limit: Optional[int],
+) -> Optional[np.ndarray]:
+    """
+    Tek numerik kolona göre sıralamada önceden hesaplanmış argsort'u kullanır:
+    sıralı satır dizisi seçili maskeyle süzülür, ilk k alınır.
+    Index kullanılamıyorsa None döner (pandas fall-back).
+    """
+    if len(sort) != 1 or sort[0].get("column") not in table.sorted:
+        return None
+
+    idx = table.sorted[sort[0]["column"]]
+    ascending = sort[0].get("ascending", True)
+
+    selected = np.zeros(table.n, dtype=bool)
+    selected[rows] = True
+
+    # Her iki yön de NaN'ları sonda tutar (pandas na_position="last")
+    ordered = idx.order if ascending else idx.order_desc
+    ordered = ordered[selected[ordered]]
+    return ordered[:limit] if limit is not None else ordered
+
+
+def _group_by(
+    df: pd.DataFrame,
+    group_by: List[str],
+    aggregations: Dict[str, Any],
+) -> pd.DataFrame:
+    named = {}
+    for col, funcs in aggregations.items():
+        if col not in df.columns:
+            raise KeyError(f"Bilinmeyen kolon: {col}")
+        for fn in ([funcs] if isinstance(funcs, str) else funcs):
+            if fn not in AGG_FUNCS:
+                raise ValueError(f"Desteklenmeyen aggregation: {fn}")
+            named[f"{col}_{fn}"] = (col, fn)
+
+    if not named:
+        named["row_count"] = (group_by[0], "size")
+
+    return (
+        df.groupby(group_by, dropna=False, observed=True)
+        .agg(**named)
+        .reset_index()
+    )
+
+
+def run_query(table: IndexedTable, spec: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Resident tablo üzerinde deklaratif sorgu:
+    {
+        "filters": [{"column": "profit_quality", "op": "==", "value": "unit_mismatch"}, ...],
+        "sort": [{"column": "total_profit_usd", "ascending": true}],
+        "limit": 50,
+        "columns": [...],
+        "group_by": ["MalKodGrup"],
+        "aggregations": {"total_profit_usd": ["sum", "mean"]}
+    }
+    Sıra: filtre → (group-by) → sort → limit → kolon seçimi
+    """
+    filters = spec.get("filters") or []
+    sort = spec.get("sort") or []
+    limit = spec.get("limit")
+    columns = spec.get("columns")
+    group_by = spec.get("group_by")
+    aggregations = spec.get("aggregations") or {}
+
+    for s in sort:
+        if s.get("column") not in table.df.columns and not group_by:
+            raise KeyError(f"Bilinmeyen sıralama kolonu: {s.get('column')}")
+    if group_by:
+        for g in group_by:
+            if g not in table.df.columns:
+                raise KeyError(f"Bilinmeyen group_by kolonu: {g}")
+
+    rows = filter_rows(table, filters)
+
+    if group_by:
+        out = _group_by(table.df.iloc[rows], group_by, aggregations)
+        if sort:
+            out = out.sort_values(
+                [s["column"] for s in sort],
+                ascending=[s.get("ascending", True) for s in sort],
+                kind="stable",
+            )
+        if limit is not None:
+            out = out.head(limit)
+        return out.reset_index(drop=True)
+
+    ordered = _sorted_rows(table, rows, sort, limit) if sort else None
+    if ordered is not None:
+        out = table.df.iloc[ordered]
+    else:
+        out = table.df.iloc[rows]
+        if sort:
+            out = out.sort_values(
+                [s["column"] for s in sort],
+                ascending=[s.get("ascending", True) for s in sort],
+                kind="stable",
+            )
+        if limit is not None:
+            out = out.head(limit)
+
+    if columns:
+        missing = [c for c in columns if c not in out.columns]
+        if missing:
+            raise KeyError(f"Bilinmeyen kolon(lar): {missing}")
+        out = out[columns]
+
+    return out.reset_index(drop=True)
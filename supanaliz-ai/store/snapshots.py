@@ -0,0 +1,355 @@
+# supanaliz-ai/store/snapshots.py
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .arrow import write_parquet
+
+
+# Tablo → diff'te satırları eşleyen key kolonları
+SNAPSHOT_KEYS: Dict[str, List[str]] = {
+    "matching": ["Malzeme"],
+    "product_profit": ["Malzeme"],
+    "stokout_candidates": ["Malzeme"],
+    "material_features": ["Malzeme", "MalzemeGrup", "Birim"],
+    "price_trend": ["Malzeme", "MalzemeGrup"],
+    "monthly_sales": ["Malzeme", "MalKodGrup", "YılAy"],
+    "sales_trend": ["Malzeme", "MalKodGrup"],
+    "seasonality": ["Malzeme", "MalKodGrup", "Ay"],
+    "abc_xyz": ["period", "Malzeme", "MalKodGrup"],
+    "decision_critical_products": ["material", "reason"],
+    "decision_priority_list": ["type", "id"],
+}
+
+TableLike = Union[pd.DataFrame, List[Dict[str, Any]]]
+
+
+def snapshot_keys(name: str, columns: Sequence[str]) -> List[str]:
+    """
+    Tablo için key kolonları. supplier_features'ta key, tedarikçi kolonları varsa
+    (Tedarikçi Num., İsim), yoksa MalzemeGrup (compute_supplier_features ile aynı seçim);
+    supplier_scorecard'da buna YılAy eklenir.
+    """
+    if name in ("supplier_features", "supplier_scorecard"):
+        keys = ["Tedarikçi Num.", "İsim"] if "Tedarikçi Num." in columns else ["MalzemeGrup"]
+        return keys + ["YılAy"] if name == "supplier_scorecard" else keys
+    keys = SNAPSHOT_KEYS.get(name)
+    if keys is None:
+        raise KeyError(f"'{name}' tablosu için key kolonları tanımlı değil.")
+    return keys
+
+
+# ---------------------------------------------------
+# Diff
+# ---------------------------------------------------
+def diff_tables(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    keys: List[str],
+    columns: Optional[List[str]] = None,
+    atol: float = 1e-9,
+) -> Dict[str, Any]:
+    """
+    İki tablo versiyonunu key kolonları üzerinden karşılaştırır.
+    Dönüş:
+    - added / removed: sadece bir tarafta olan satırlar
+    - changed: en az bir kolonu değişen satırlar; değişen kolonlar için
+      `<kolon>_old`, `<kolon>_new` ve numerik kolonlarda `<kolon>_delta`
+    - summary: sayılar + kolon başına değişen satır sayısı
+    Numerik kolonlar |delta| > atol ise değişmiş sayılır; NaN ↔ NaN eşittir.
+    """
+    for side, df in (("eski", old), ("yeni", new)):
+        missing = [k for k in keys if k not in df.columns]
+        if missing:
+            raise KeyError(f"Diff için {side} tabloda eksik key kolon(lar): {missing}")
+        if df.duplicated(keys).any():
+            raise ValueError(f"Diff key'leri {side} tabloda tekil değil: {keys}")
+
+    if columns is None:
+        columns = [c for c in new.columns if c in old.columns and c not in keys]
+
+    merged = old[keys + [c for c in columns if c in old.columns]].merge(
+        new[keys + [c for c in columns if c in new.columns]],
+        on=keys,
+        how="outer",
+        suffixes=("_old", "_new"),
+        indicator=True,
+        sort=True,
+    )
+    side = merged.pop("_merge")
+    both = merged[side.eq("both").to_numpy()].reset_index(drop=True)
+
+    changed_mask = np.zeros(len(both), dtype=bool)
+    per_column: Dict[str, int] = {}
+    out_cols: List[str] = []
+    for col in columns:
+        if col not in old.columns or col not in new.columns:
+            continue
+        a, b = both[f"{col}_old"], both[f"{col}_new"]
+        na_a, na_b = a.isna().to_numpy(), b.isna().to_numpy()
+
+        numeric = all(
+            pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x) for x in (a, b)
+        )
+        if numeric:
+            delta = b.astype(float) - a.astype(float)
+            both[f"{col}_delta"] = delta
+            diff = (na_a != na_b) | (np.abs(delta.to_numpy()) > atol)
+        else:
+            diff = (na_a != na_b) | (~na_a & ~na_b & a.ne(b).to_numpy())
+
+        count = int(diff.sum())
+        if count:
+            # Çıktıda sadece en az bir satırda değişen kolonlar yer alır
+            per_column[col] = count
+            out_cols += [f"{col}_old", f"{col}_new"] + ([f"{col}_delta"] if numeric else [])
+        changed_mask |= diff
+
+    changed = both.loc[changed_mask, keys + out_cols].reset_index(drop=True)
+    added = new.merge(merged.loc[side.eq("right_only").to_numpy(), keys], on=keys)
+    removed = old.merge(merged.loc[side.eq("left_only").to_numpy(), keys], on=keys)
+
+    return {
+        "keys": keys,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "summary": {
+            "rows_old": len(old),
+            "rows_new": len(new),
+            "added": len(added),
+            "removed": len(removed),
+            "changed": len(changed),
+            "unchanged": len(both) - len(changed),
+            "changed_by_column": per_column,
+        },
+    }
+
+
+# ---------------------------------------------------
+# Snapshot store
+# ---------------------------------------------------
+class SnapshotStore:
+    """
+    Her çalıştırmanın sonuç tablolarını versiyonlu Parquet dosyaları olarak saklar:
+
+        <root>/<snapshot_id>/<tablo>.parquet
+        <root>/<snapshot_id>/manifest.json   (etiket, zaman, satır / kolon / key bilgisi)
+
+    snapshot_id zaman damgası + sıra no'dur (sözlük sırası = kronolojik sıra).
+    Snapshot önce geçici klasöre yazılır, sonra rename ile yayınlanır; yarım kalan
+    yazımlar listede görünmez. Diff'ler sadece gereken kolonları okur, ham Excel'e
+    dönülmez.
+    """
+
+    def __init__(self, root: str = "data/snapshots"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------
+    # Yazma
+    # ---------------------------------------------------
+    def save(
+        self,
+        tables: Dict[str, TableLike],
+        label: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        tables: isim → DataFrame ya da dict listesi (örn. DecisionAgent çıktısındaki listeler).
+        """
+        frames = {
+            name: t if isinstance(t, pd.DataFrame) else pd.DataFrame(list(t))
+            for name, t in tables.items()
+        }
+
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            existing = self.ids()
+            seq = int(existing[-1].rsplit("-", 1)[-1]) + 1 if existing else 1
+            snapshot_id = time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + f"-{seq:06d}"
+
+            tmp = self.root / f".tmp-{snapshot_id}"
+            tmp.mkdir()
+            try:
+                info: Dict[str, Any] = {}
+                for name, df in frames.items():
+                    write_parquet(df, tmp / f"{name}.parquet")
+                    try:
+                        keys = snapshot_keys(name, df.columns)
+                    except KeyError:
+                        keys = None
+                    info[name] = {
+                        "rows": len(df),
+                        "columns": [str(c) for c in df.columns],
+                        "keys": keys,
+                    }
+
+                manifest = {
+                    "id": snapshot_id,
+                    "label": label,
+                    "created_at": time.time(),
+                    "meta": meta or {},
+                    "tables": info,
+                }
+                (tmp / "manifest.json").write_text(
+                    json.dumps(manifest, ensure_ascii=False, indent=2, default=str),
+                    encoding="utf-8",
+                )
+                os.replace(tmp, self.root / snapshot_id)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+
+        return snapshot_id
+
+    def prune(self, keep: int) -> List[str]:
+        """
+        En yeni `keep` snapshot dışındakileri siler; silinen id'leri döner.
+        """
+        with self._lock:
+            ids = self.ids()
+            drop = ids[:-keep] if keep > 0 else ids
+            for snapshot_id in drop:
+                shutil.rmtree(self.root / snapshot_id, ignore_errors=True)
+        return drop
+
+    # ---------------------------------------------------
+    # Okuma
+    # ---------------------------------------------------
+    def ids(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith(".") and (p / "manifest.json").exists()
+        )
+
+    def resolve(self, ref: str) -> str:
+        """
+        "latest", "previous", "latest~N" ya da snapshot id → snapshot id.
+        """
+        ids = self.ids()
+        if ref in ids:
+            return ref
+
+        back = None
+        if ref == "latest":
+            back = 0
+        elif ref == "previous":
+            back = 1
+        elif ref.startswith("latest~") and ref[7:].isdigit():
+            back = int(ref[7:])
+
+        if back is None or back >= len(ids):
+            raise KeyError(f"Snapshot bulunamadı: {ref}. Mevcut snapshot sayısı: {len(ids)}")
+        return ids[-1 - back]
+
+    def manifest(self, ref: str) -> Dict[str, Any]:
+        path = self.root / self.resolve(ref) / "manifest.json"
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [self.manifest(snapshot_id) for snapshot_id in self.ids()]
+
+    def load(self, ref: str, table: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        snapshot_id = self.resolve(ref)
+        path = self.root / snapshot_id / f"{table}.parquet"
+        if not path.exists():
+            raise KeyError(f"'{snapshot_id}' snapshot'ında tablo yok: {table}")
+        return pd.read_parquet(path, columns=columns)
+
+    # ---------------------------------------------------
+    # Diff
+    # ---------------------------------------------------
+    def diff(
+        self,
+        old: str,
+        new: str,
+        table: str,
+        columns: Optional[List[str]] = None,
+        keys: Optional[List[str]] = None,
+        atol: float = 1e-9,
+    ) -> Dict[str, Any]:
+        """
+        İki snapshot'taki aynı tabloyu karşılaştırır. columns verilirse sadece key'ler
+        + bu kolonlar okunur ve karşılaştırılır (added / removed satırlarında da).
+        """
+        old_id, new_id = self.resolve(old), self.resolve(new)
+        old_info = self.manifest(old_id)["tables"].get(table)
+        new_info = self.manifest(new_id)["tables"].get(table)
+        if old_info is None or new_info is None:
+            missing = old_id if old_info is None else new_id
+            raise KeyError(f"'{missing}' snapshot'ında tablo yok: {table}")
+
+        if keys is None:
+            keys = new_info.get("keys") or snapshot_keys(table, new_info["columns"])
+
+        read_cols = None if columns is None else list(dict.fromkeys(keys + columns))
+        result = diff_tables(
+            self.load(old_id, table, read_cols),
+            self.load(new_id, table, read_cols),
+            keys,
+            columns=columns,
+            atol=atol,
+        )
+        result["old"], result["new"], result["table"] = old_id, new_id, table
+        return result
+
+    def highlights(
+        self,
+        old: str = "previous",
+        new: str = "latest",
+        risk_jump: float = 10.0,
+    ) -> Dict[str, Any]:
+        """
+        Yönetim özeti için öne çıkan değişimler:
+        - yeni stokout adayları (stokout_candidates'a yeni giren malzemeler)
+        - risk skoru `risk_jump` puandan fazla artan tedarikçiler
+        - kâr marjı işareti değişen malzemeler (kârlı ↔ zararlı)
+        Snapshot'ta olmayan tablolar atlanır; değişen satırı olmayan kolonun diff'i
+        (<col>_delta yok) boş liste döner.
+        """
+        old_id, new_id = self.resolve(old), self.resolve(new)
+        old_tables = self.manifest(old_id)["tables"]
+        new_tables = self.manifest(new_id)["tables"]
+        present = [t for t in new_tables if t in old_tables]
+        out: Dict[str, Any] = {"old": old_id, "new": new_id}
+
+        if "stokout_candidates" in present:
+            d = self.diff(old_id, new_id, "stokout_candidates", columns=["stockout_severity"])
+            out["new_stokout_candidates"] = d["added"]
+            out["resolved_stokout_candidates"] = d["removed"]
+
+        if "supplier_features" in present:
+            d = self.diff(old_id, new_id, "supplier_features", columns=["supplier_risk_score"])
+            changed = d["changed"]
+            if "supplier_risk_score_delta" in changed.columns:
+                jumped = changed[changed["supplier_risk_score_delta"] > risk_jump]
+                out["supplier_risk_jumps"] = jumped.sort_values(
+                    "supplier_risk_score_delta", ascending=False, kind="mergesort"
+                ).reset_index(drop=True)
+            else:
+                out["supplier_risk_jumps"] = changed.iloc[0:0].reset_index(drop=True)
+
+        if "product_profit" in present:
+            d = self.diff(old_id, new_id, "product_profit", columns=["profit_margin_pct"])
+            changed = d["changed"]
+            if "profit_margin_pct_old" in changed.columns:
+                old_m, new_m = changed["profit_margin_pct_old"], changed["profit_margin_pct_new"]
+                flipped = (np.sign(old_m) != np.sign(new_m)) & old_m.notna() & new_m.notna()
+                out["margin_flips"] = changed[flipped.to_numpy()].reset_index(drop=True)
+            else:
+                out["margin_flips"] = changed.iloc[0:0].reset_index(drop=True)
+
+        return out
@@ -0,0 +1,192 @@
+# supanaliz-ai/store/table_store.py
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Bu kolonlar her zaman kategorik index alır (kardinaliteden bağımsız)
+CATEGORICAL_COLUMNS = (
+    "Malzeme",
+    "MalKodGrup",
+    "MalzemeGrup",
+    "profit_quality",
+    "match_status",
+    "sales_unit",
+    "purchase_unit",
+    "Birim",
+    "price_trend_label",
+    "sales_trend_label",
+    "YılAy",
+)
+
+# Kategori başına bitmap tutulacak maksimum kategori sayısı.
+# Üstündeki kolonlarda sadece kod dizisi (codes == k) kullanılır.
+MAX_BITMAP_CATEGORIES = 256
+
+
+@dataclass
+class CategoricalIndex:
+    """
+    pd.factorize kodları + kategori → kod sözlüğü.
+    Düşük kardinaliteli kolonlarda her kategori için paketlenmiş bitmap.
+    """
+    codes: np.ndarray  # int64, NaN → -1
+    lookup: Dict[Any, int]
+    str_lookup: Dict[str, int]
+    bitmaps: Optional[List[np.ndarray]]  # np.packbits(codes == k)
+
+    def code_of(self, value: Any) -> Optional[int]:
+        """
+        Filtre değerini kategori koduna çevirir.
+        JSON'dan gelen "2024-01" gibi string'ler Period/int kategorilere
+        string karşılığı üzerinden eşlenir.
+        """
+        try:
+            code = self.lookup.get(value)
+        except TypeError:
+            code = None
+        if code is None:
+            code = self.str_lookup.get(str(value))
+        return code
+
+    def bitmap(self, code: int) -> np.ndarray:
+        if self.bitmaps is not None:
+            return self.bitmaps[code]
+        return np.packbits(self.codes == code)
+
+
+@dataclass
+class SortedIndex:
+    """
+    Numerik kolon için argsort sırası (NaN'lar sonda) ve sıralı değerler.
+    Aralık filtreleri searchsorted ile O(log n) sınır + O(k) satır.
+    """
+    order: np.ndarray  # satır id'leri, değere göre artan
+    order_desc: np.ndarray  # satır id'leri, değere göre azalan (eşitlerde stabil)
+    values: np.ndarray  # order sırasındaki NaN olmayan değerler
+    n_valid: int
+
+
+class IndexedTable:
+    """
+    Bellekte tutulan (resident) sonuç tablosu + önceden hesaplanmış indexler.
+    - Kategorik kolonlar: kod dizisi + kategori bitmap'leri
+    - Numerik kolonlar: sıralı dizi (argsort)
+    Tablo publish anında bir kez indexlenir, sonrasında sadece okunur.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.reset_index(drop=True)
+        self.n = len(self.df)
+        self.categorical: Dict[str, CategoricalIndex] = {}
+        self.sorted: Dict[str, SortedIndex] = {}
+
+        for col in self.df.columns:
+            s = self.df[col]
+            if pd.api.types.is_bool_dtype(s) or col in CATEGORICAL_COLUMNS:
+                self.categorical[col] = self._build_categorical(s)
+            elif pd.api.types.is_numeric_dtype(s):
+                self.sorted[col] = self._build_sorted(s)
+            elif not pd.api.types.is_datetime64_any_dtype(s):
+                self.categorical[col] = self._build_categorical(s)
+
+    @staticmethod
+    def _build_categorical(s: pd.Series) -> CategoricalIndex:
+        codes, uniques = pd.factorize(s, use_na_sentinel=True)
+        codes = codes.astype(np.int64, copy=False)
+        values = uniques.tolist()
+        lookup = {v: i for i, v in enumerate(values)}
+        str_lookup = {str(v): i for i, v in enumerate(values)}
+
+        bitmaps = None
+        if len(uniques) <= MAX_BITMAP_CATEGORIES:
+            bitmaps = [np.packbits(codes == k) for k in range(len(uniques))]
+
+        return CategoricalIndex(
+            codes=codes, lookup=lookup, str_lookup=str_lookup, bitmaps=bitmaps
+        )
+
+    @staticmethod
+    def _build_sorted(s: pd.Series) -> SortedIndex:
+        values = s.to_numpy(dtype=float, na_value=np.nan)
+        order = np.argsort(values, kind="stable")  # NaN'lar sona düşer
+        order_desc = np.argsort(-values, kind="stable")
+        n_valid = int((~np.isnan(values)).sum())
+        return SortedIndex(
+            order=order,
+            order_desc=order_desc,
+            values=values[order][:n_valid],
+            n_valid=n_valid,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        total = int(self.df.memory_usage(deep=False).sum())
+        for idx in self.categorical.values():
+            total += idx.codes.nbytes
+            if idx.bitmaps:
+                total += sum(b.nbytes for b in idx.bitmaps)
+        for idx in self.sorted.values():
+            total += idx.order.nbytes + idx.order_desc.nbytes + idx.values.nbytes
+        return total
+
+
+class TableStore:
+    """
+    API'nin resident sonuç tabloları.
+    publish() tüm tablo setini tek seferde değiştirir (atomik swap);
+    okuyucular her zaman tutarlı bir versiyon görür.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: Dict[str, IndexedTable] = {}
+        self.version = 0
+        self.updated_at: Optional[float] = None
+
+    def publish(self, tables: Dict[str, pd.DataFrame], replace: bool = True) -> int:
+        # İndexleme lock dışında yapılır, swap sadece referans değişimi
+        indexed = {name: IndexedTable(df) for name, df in tables.items()}
+
+        with self._lock:
+            if replace:
+                new_tables = indexed
+            else:
+                new_tables = {**self._tables, **indexed}
+            self._tables = new_tables
+            self.version += 1
+            self.updated_at = time.time()
+            return self.version
+
+    def get(self, name: str) -> IndexedTable:
+        tables = self._tables
+        if name not in tables:
+            raise KeyError(
+                f"Tablo bulunamadı: {name}. Mevcut tablolar: {sorted(tables)}"
+            )
+        return tables[name]
+
+    def names(self) -> List[str]:
+        return sorted(self._tables)
+
+    def describe(self) -> Dict[str, Any]:
+        tables = self._tables
+        return {
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "tables": {
+                name: {
+                    "rows": t.n,
+                    "columns": [str(c) for c in t.df.columns],
+                    "nbytes": t.nbytes,
+                }
+                for name, t in sorted(tables.items())
+            },
+        }
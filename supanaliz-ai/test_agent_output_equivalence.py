@@ -0,0 +1,57 @@
+# Eşdeğerlik: agent çıktısı girdinin biçiminden bağımsız olmalı. Aynı özet
+# - dict (feature builder'ın to_summary çıktısı)
+# - JSON'a yazılıp geri okunmuş dict (API'ye gelen hali)
+# - kolonel frame'ler (build_frames) ve Arrow tabloları
+# ile verildiğinde Sales / Purchase / Decision agent çıktıları birebir aynı olmalı.
+import copy
+import dataclasses
+import json
+
+import pyarrow as pa
+
+from agents import SalesAgent, PurchaseAgent, DecisionAgent
+from bench.synthetic import SyntheticConfig, parsed_dataset
+from features.summaries import SalesFeatureBuilder, PurchaseFeatureBuilder
+from features.stockout_sim import StockoutSimulator
+
+CFG = SyntheticConfig(sales_rows=20_000, purchase_rows=10_000, materials=1_000, groups=20, suppliers=50)
+
+
+def run_agents(sales_summary, purchase_summary):
+    sales_out = SalesAgent().analyze(sales_summary)
+    purchase_out = PurchaseAgent().analyze(purchase_summary)
+    decision = DecisionAgent().analyze(sales_summary, purchase_summary, sales_out, purchase_out)
+    # NaN'lar da dahil karşılaştırılabilir, sıralı metin
+    return json.dumps([sales_out, purchase_out, decision], default=str, ensure_ascii=False)
+
+
+def arrow_tables(summary):
+    return {
+        k: pa.Table.from_pylist(v) if isinstance(v, list) and v and isinstance(v[0], dict) else v
+        for k, v in summary.items()
+    }
+
+
+sales, purchase = parsed_dataset(CFG)
+sim = StockoutSimulator.from_frames(sales, purchase).simulate(paths=100)
+
+for stockout in (None, sim):
+    sales_frames = SalesFeatureBuilder().build_frames(sales)
+    purchase_frames = PurchaseFeatureBuilder().build_frames(purchase, stockout)
+
+    for direction in ("up", "down", "flat"):
+        sales_frames = dataclasses.replace(sales_frames, trend={**sales_frames.trend, "direction": direction})
+        sales_dict = sales_frames.to_summary()
+        purchase_dict = purchase_frames.to_summary()
+
+        expected = run_agents(sales_dict, purchase_dict)
+        variants = {
+            "json": (json.loads(json.dumps(sales_dict)), json.loads(json.dumps(purchase_dict))),
+            "frames": (sales_frames, purchase_frames),
+            "arrow": (arrow_tables(sales_dict), arrow_tables(purchase_dict)),
+        }
+        for name, (s_in, p_in) in variants.items():
+            assert run_agents(copy.deepcopy(s_in), copy.deepcopy(p_in)) == expected, (name, direction)
+        print(f"stockout={'var' if stockout is not None else 'yok'} trend={direction}: OK")
+
+print("Agent çıktısı girdi biçiminden bağımsız: OK")
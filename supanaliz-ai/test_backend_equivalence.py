@@ -0,0 +1,62 @@
+# Eşdeğerlik: duckdb compute backend'i pandas backend'i ile birebir aynı tabloları
+# üretmeli; hem DataFrame hem Parquet yolu girdiyle. duckdb kurulu değilse atlanır.
+import os
+import tempfile
+
+import pandas as pd
+
+from bench.synthetic import SyntheticConfig, parsed_dataset
+from features.sales_features import compute_monthly_sales, build_sales_features
+from features.purchase_features import compute_supplier_features, build_purchase_features
+from features.profit_features import build_profit_features
+from agents.matching_engine import build_matching_table
+
+try:
+    import duckdb  # noqa: F401
+except ImportError:
+    print("duckdb kurulu değil, backend eşdeğerliği atlandı.")
+    raise SystemExit(0)
+
+CFG = SyntheticConfig(sales_rows=20_000, purchase_rows=10_000, materials=1_000, groups=20, suppliers=50)
+
+
+def assert_same(a, b, path="") -> None:
+    if isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(a, b, check_exact=True, obj=path)
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys(), (path, a.keys(), b.keys())
+        for k in a:
+            assert_same(a[k], b[k], f"{path}/{k}")
+    else:
+        assert a == b, (path, a, b)
+
+
+sales, purchase = parsed_dataset(CFG)
+
+out_dir = tempfile.mkdtemp()
+sales_path = os.path.join(out_dir, "sales.parquet")
+purchase_path = os.path.join(out_dir, "purchase.parquet")
+sales.to_parquet(sales_path)
+purchase.to_parquet(purchase_path)
+paths = {id(sales): sales_path, id(purchase): purchase_path}
+
+cases = [
+    ("compute_monthly_sales", compute_monthly_sales, (sales,), True),
+    ("compute_supplier_features", compute_supplier_features, (purchase,), True),
+    ("build_matching_table", build_matching_table, (sales, purchase), True),
+    ("build_sales_features", build_sales_features, (sales,), False),
+    ("build_purchase_features", build_purchase_features, (purchase,), False),
+    ("build_profit_features", build_profit_features, (sales, purchase), False),
+]
+
+for name, fn, args, parquet in cases:
+    expected = fn(*args, backend="pandas")
+    assert_same(expected, fn(*args, backend="duckdb"), name)
+    if parquet:
+        # Out-of-core yol: duckdb Parquet'i doğrudan tarar
+        parquet_args = tuple(paths[id(a)] for a in args)
+        assert_same(expected, fn(*parquet_args, backend="duckdb"), f"{name}[parquet]")
+        assert_same(expected, fn(*parquet_args, backend="pandas"), f"{name}[parquet/pandas]")
+    print(f"{name}: OK")
+
+print("duckdb == pandas: OK")
@@ -0,0 +1,49 @@
+# Regresyon: satınalma tarafı boş (ya da grupsuz) olduğunda DecisionAgent eşleştirmesi
+# "none" dönmeli; sadece satış satırı olan segment /segments/decision'ı düşürmemeli.
+import pandas as pd
+
+from agents import DecisionAgent
+from bench.synthetic import SyntheticConfig, generate_dataset
+from features.segmented import analyze_segment, analyze_segments
+from parser.sales_parser import clean_sales_frame
+from parser.purchase_parser import clean_purchase_frame
+
+sales_summary = {
+    "trend": {"direction": "up"},
+    "material_stats": [{"material": "A", "material_group": "G", "total_sales": 10.0}],
+}
+sales_out = {"risk_score": 0, "top_performers": [], "risky_decliners": []}
+purchase_out = {"lead_time_risk_score": 0, "risky_suppliers": [], "stockout_signals": []}
+
+# 1) Boş satınalma material_stats
+out = DecisionAgent().analyze(
+    sales_summary, {"material_stats": [], "supplier_stats": []}, sales_out, purchase_out
+)
+assert [m["match_type"] for m in out["matches"]] == ["none"], out["matches"]
+
+# 2) Grup indeksi boş (satınalma malzemelerinin grubu yok)
+purchase_summary = {
+    "material_stats": [{"material": "B", "material_group": None, "total_order_value": 1.0}],
+    "supplier_stats": [],
+}
+out = DecisionAgent().analyze(sales_summary, purchase_summary, sales_out, purchase_out)
+assert [m["match_type"] for m in out["matches"]] == ["none"], out["matches"]
+
+# 3) Segment bazında: satınalması olmayan segment
+raw = generate_dataset(
+    SyntheticConfig(sales_rows=2_000, purchase_rows=1_000, materials=200, groups=10, suppliers=20)
+)
+fx = raw["fx"].set_index("Tarih")["Efektif Satış Kuru"]
+fx.index = pd.to_datetime(fx.index, dayfirst=True)
+sales = clean_sales_frame(raw["sales"])
+purchase = clean_purchase_frame(raw["purchase"], fx.asfreq("D").ffill())
+
+result = analyze_segment(sales.head(200), purchase.iloc[0:0])
+assert set(result["match_counts"]) == {"none"}, result["match_counts"]
+
+sales.loc[sales.index[:100], "MalKodGrup"] = "SADECE_SATIS"
+summary = analyze_segments(sales, purchase, workers=1)["summary"]
+row = summary[summary["segment"] == "SADECE_SATIS"].iloc[0]
+assert row["purchase_rows"] == 0 and row["critical_products"] > 0, row
+
+print("Boş satınalma / grup indeksi / satış-only segment: OK")
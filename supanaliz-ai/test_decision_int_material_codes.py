@@ -0,0 +1,38 @@
+# Regresyon: list-of-dict girdide int malzeme kodu + null karışık geldiğinde pandas kolonu
+# float'a çevirir; eşleştirme anahtarları ve etiketler yine de girdideki int kodla kurulmalı
+# ("123" ↔ "123", "123.0" değil).
+from agents import DecisionAgent
+
+sales_summary = {
+    "trend": {"direction": "up"},
+    "material_stats": [
+        {"material": 123, "material_group": 45, "total_sales": 10.0},
+        {"material": None, "material_group": 45, "total_sales": 5.0},
+        {"material": 999, "material_group": None, "total_sales": 8.0},
+    ],
+}
+purchase_summary = {
+    "material_stats": [
+        {"material": "123", "material_group": "450", "total_order_value": 4.0},
+        {"material": None, "material_group": "450", "total_order_value": 1.0},
+    ],
+    "supplier_stats": [],
+}
+sales_out = {"risk_score": 0, "top_performers": [], "risky_decliners": []}
+purchase_out = {"lead_time_risk_score": 0, "risky_suppliers": [], "stockout_signals": []}
+
+out = DecisionAgent().analyze(sales_summary, purchase_summary, sales_out, purchase_out)
+
+# 123 direkt, kodsuz satır grup (45 ↔ "450"), 999 eşleşmez
+assert [m["match_type"] for m in out["matches"]] == ["direct", "group", "none"], out["matches"]
+assert [m["sales_material"] for m in out["matches"]] == [123, None, 999], out["matches"]
+
+# Stokout riski sadece gerçekten eşleşmeyen malzemede
+stockout = [c["material"] for c in out["critical_products"] if "stokout" in c["reason"]]
+assert stockout == [999], out["critical_products"]
+
+labels = [p["label"] for p in out["priority_list"] if p["type"] == "material"]
+assert "Malzeme: 999 (None)" in labels and "Malzeme: 123 (45)" in labels, labels
+assert all(".0" not in label for label in labels), labels
+
+print("int + null malzeme kodları: OK")
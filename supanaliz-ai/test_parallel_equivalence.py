@@ -0,0 +1,78 @@
+# Eşdeğerlik: malzeme-partition'lı paralel feature builder'lar ve segment bazlı karar
+# analizi serial çıktıyla birebir aynı olmalı. Thread'li çağıran (API threadpool,
+# PipelineWatcher) durumunda pool fork yerine forkserver ile açılır; çıktı yine aynı.
+import threading
+
+import pandas as pd
+
+from bench.synthetic import SyntheticConfig, parsed_dataset
+from features.sales_features import build_sales_features
+from features.purchase_features import build_purchase_features
+from features.profit_features import build_profit_features
+from features.parallel import (
+    build_sales_features_parallel,
+    build_purchase_features_parallel,
+    build_profit_features_parallel,
+)
+from features.segmented import analyze_segments
+
+CFG = SyntheticConfig(sales_rows=20_000, purchase_rows=10_000, materials=1_000, groups=20, suppliers=50)
+
+
+def assert_same(a, b, path="") -> None:
+    if isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(a, b, check_exact=True, obj=path)
+    elif isinstance(a, dict):
+        assert a.keys() == b.keys(), (path, a.keys(), b.keys())
+        for k in a:
+            assert_same(a[k], b[k], f"{path}/{k}")
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b), (path, len(a), len(b))
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_same(x, y, f"{path}[{i}]")
+    elif isinstance(a, float) and a != a:
+        assert isinstance(b, float) and b != b, (path, a, b)
+    else:
+        assert a == b, (path, a, b)
+
+
+def run_parallel(sales, purchase, workers):
+    return {
+        "sales": build_sales_features_parallel(sales, workers=workers),
+        "purchase": build_purchase_features_parallel(purchase, workers=workers),
+        "profit": build_profit_features_parallel(sales, purchase, workers=workers),
+    }
+
+
+def main():
+    sales, purchase = parsed_dataset(CFG)
+    serial = {
+        "sales": build_sales_features(sales),
+        "purchase": build_purchase_features(purchase),
+        "profit": build_profit_features(sales, purchase),
+    }
+
+    # 1) Tek thread'li süreç: fork pool
+    assert_same(serial, run_parallel(sales, purchase, workers=2))
+
+    # 2) Arka planda başka bir thread varken: forkserver pool
+    stop = threading.Event()
+    other = threading.Thread(target=stop.wait)
+    other.start()
+    try:
+        assert_same(serial, run_parallel(sales, purchase, workers=2))
+    finally:
+        stop.set()
+        other.join()
+
+    # 3) Segment bazlı karar analizi (meta.workers hariç)
+    one = analyze_segments(sales, purchase, workers=1)
+    two = analyze_segments(sales, purchase, workers=2)
+    assert_same(one["summary"], two["summary"], "summary")
+    assert_same(one["segments"], two["segments"], "segments")
+
+    print("Paralel == serial: OK")
+
+
+if __name__ == "__main__":
+    main()